@@ -9,7 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from core.config import settings
 from infra.database import Base
-from domain.models import Operadora, DespesaTrimestral, MetricaOperadora, ImportReject, ImportLog
+from domain.models import Operadora, DespesaTrimestral, MetricaOperadora, ImportReject, ImportLog, DataVersion
 
 config = context.config
 
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark de get_estatisticas_agregadas em uma tabela sintética (SQLite).
+
+Compara as três consultas originais (totais, top UFs, top operadoras)
+executadas em sequência numa sessão, as mesmas três em paralelo em conexões
+separadas, e a consulta única atual do AnalyticsService.
+
+    cd backend
+    python scripts/bench/bench_estatisticas.py --rows 2000000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "src"))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from infra.database import Base
+from domain.services import AnalyticsService
+
+UFS = [
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MG", "MS", "MT", "PA",
+    "PB", "PE", "PI", "PR", "RJ", "RN", "RO", "RR", "RS", "SC", "SE", "SP", "TO", "",
+]
+
+LEGACY_TOTAIS = """
+    SELECT
+        (SELECT COUNT(DISTINCT registro_ans) FROM operadoras) AS total_operadoras,
+        (SELECT COALESCE(SUM(valor_despesas), 0) FROM despesas_trimestrais WHERE 1=1) AS total_despesas,
+        (SELECT COALESCE(AVG(valor_despesas), 0) FROM despesas_trimestrais WHERE valor_despesas > 0) AS media_geral
+"""
+LEGACY_TOP_UFS = """
+    SELECT CASE WHEN uf IS NULL OR uf = '' THEN 'Sem UF*' ELSE uf END AS uf, SUM(valor_despesas) AS total
+    FROM despesas_trimestrais
+    WHERE 1=1
+    GROUP BY CASE WHEN uf IS NULL OR uf = '' THEN 'Sem UF*' ELSE uf END
+    ORDER BY total DESC
+    LIMIT 5
+"""
+LEGACY_TOP_OPERADORAS = """
+    SELECT razao_social, cnpj, SUM(valor_despesas) AS total
+    FROM despesas_trimestrais
+    WHERE valor_despesas > 0
+    GROUP BY razao_social, cnpj
+    ORDER BY total DESC
+    LIMIT 5
+"""
+LEGACY_QUERIES = (LEGACY_TOTAIS, LEGACY_TOP_UFS, LEGACY_TOP_OPERADORAS)
+
+
+def populate(path: Path, rows: int, operadoras: int = 1500) -> None:
+    Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    rng = random.Random(42)
+    ops = [(i, f"{300000 + i}", f"{i:014d}", f"OPERADORA {i:05d}", rng.choice(UFS)) for i in range(1, operadoras + 1)]
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO operadoras (id, registro_ans, cnpj, razao_social, uf) VALUES (?, ?, ?, ?, ?)", ops
+    )
+
+    def despesas():
+        for i in range(1, rows + 1):
+            op_id, registro, cnpj, razao, uf = ops[i % operadoras]
+            periodo = i // operadoras
+            valor = round(rng.uniform(-1000, 1_000_000), 2) if rng.random() > 0.05 else 0
+            yield (i, op_id, registro, cnpj, razao, uf, 2020 + (periodo // 4) % 10, periodo % 4 + 1, valor)
+
+    conn.executemany(
+        "INSERT INTO despesas_trimestrais "
+        "(id, operadora_id, registro_ans, cnpj, razao_social, uf, ano, trimestre, valor_despesas) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        despesas(),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def legacy_sequential(factory) -> None:
+    async with factory() as session:
+        for query in LEGACY_QUERIES:
+            (await session.execute(text(query))).fetchall()
+
+
+async def legacy_concurrent(factory) -> None:
+    async def run(query: str) -> None:
+        async with factory() as session:
+            (await session.execute(text(query))).fetchall()
+    await asyncio.gather(*(run(query) for query in LEGACY_QUERIES))
+
+
+async def single_scan(factory) -> None:
+    async with factory() as session:
+        await AnalyticsService(session).get_estatisticas_agregadas()
+
+
+def single_query(query: str):
+    async def run(factory) -> None:
+        async with factory() as session:
+            (await session.execute(text(query))).fetchall()
+    return run
+
+
+async def measure(fn, factory, repeat: int) -> float:
+    await fn(factory)  # aquecimento (cache de páginas do SQLite)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn(factory)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        started = time.perf_counter()
+        populate(path, args.rows)
+        print(f"{args.rows} linhas geradas em {time.perf_counter() - started:.1f}s")
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        print(f"(SQLite usa um núcleo por conexão; {os.cpu_count()} CPU(s) disponíveis)")
+        for name, fn in (
+            ("  só totais", single_query(LEGACY_TOTAIS)),
+            ("  só top UFs", single_query(LEGACY_TOP_UFS)),
+            ("  só top operadoras", single_query(LEGACY_TOP_OPERADORAS)),
+            ("3 consultas em sequência", legacy_sequential),
+            ("3 consultas em paralelo", legacy_concurrent),
+            ("consulta única", single_scan),
+        ):
+            print(f"{name:<28}{await measure(fn, factory, args.repeat):>10.0f} ms (mediana)")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da pilha de middlewares: BaseHTTPMiddleware (antes) vs ASGI puro (depois).
+
+Roda a aplicação em processo via httpx.ASGITransport, sem rede nem banco: a
+sessão e o OperadoraRepository são substituídos por stubs que devolvem dados
+fixos, então o que se mede é o custo do framework e dos middlewares.
+
+    cd backend
+    python scripts/bench/bench_middleware.py --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "src"))
+
+from fastapi import Depends, FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from api.middleware import CompressionMiddleware, HttpCacheMiddleware, TimingMiddleware
+from api.routes import operadoras
+from domain.models import Operadora
+from infra.database import get_db
+
+ROWS = [
+    Operadora(
+        id=i,
+        registro_ans=f"{300000 + i}",
+        cnpj=f"{i:014d}",
+        razao_social=f"OPERADORA DE SAUDE EXEMPLO {i:04d} LTDA",
+        modalidade="Medicina de Grupo",
+        uf="SP",
+    )
+    for i in range(1, 22)
+]
+
+
+class StubSession:
+    async def execute(self, *args, **kwargs):
+        return None
+
+
+class StubOperadoraRepository:
+    def __init__(self, session):
+        pass
+
+    async def search(self, **kwargs):
+        return ROWS
+
+    async def search_with_offset(self, **kwargs):
+        return ROWS
+
+    async def count_filtered(self, **kwargs):
+        return 1000
+
+
+async def stub_db():
+    yield StubSession()
+
+
+async def stub_version() -> int:
+    return 1
+
+
+class LegacyNoCacheMiddleware(BaseHTTPMiddleware):
+    """Middleware original (BaseHTTPMiddleware), mantido aqui só para comparação."""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.url.path.startswith("/api/"):
+            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
+            response.headers["Pragma"] = "no-cache"
+            response.headers["Expires"] = "0"
+            response.headers["X-Data-Version"] = str(await stub_version())
+        return response
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+    if stack == "before":
+        app.add_middleware(LegacyNoCacheMiddleware)
+    else:
+        app.add_middleware(HttpCacheMiddleware, version_provider=stub_version)
+        if stack == "after+gzip":
+            app.add_middleware(CompressionMiddleware)
+        app.add_middleware(TimingMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(operadoras.router, prefix="/api/operadoras")
+
+    @app.get("/health")
+    async def health(db=Depends(get_db)):
+        await db.execute(text("SELECT 1"))
+        return {"status": "healthy", "database": "healthy"}
+
+    app.dependency_overrides[get_db] = stub_db
+    return app
+
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int) -> tuple[float, float]:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Aquecimento
+        for _ in range(50):
+            await client.get(path)
+
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    return total / elapsed, p99 * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    operadoras.OperadoraRepository = StubOperadoraRepository
+
+    print(f"{'rota':<18}{'pilha':<12}{'req/s':>10}{'p99 (ms)':>12}")
+    for path in ("/health", "/api/operadoras"):
+        for stack in ("before", "after", "after+gzip"):
+            rps, p99 = await run(build_app(stack), path, args.requests, args.concurrency)
+            print(f"{path:<18}{stack:<12}{rps:>10.0f}{p99:>12.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark da serialização das rotas de listagem (100 e 1000 linhas).
+
+Compara, para linhas ORM de Operadora e MetricaOperadora:
+  - baseline:    model_validate por linha + revalidação pelo response_model
+                 + jsonable_encoder + json.dumps (o caminho padrão do FastAPI)
+  - type_adapter: uma validação em lote por TypeAdapter em cache + dump_json
+  - projection:  projeção direta linha -> dict + orjson (api.responses.project_rows)
+
+    cd backend
+    python scripts/bench/bench_serialization.py --repeat 50
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "src"))
+
+from fastapi.encoders import jsonable_encoder
+
+import infra.database  # noqa: F401  (ordem de import dos modelos)
+from api.responses import encode, encode_projected, get_adapter, project_rows
+from domain.models import MetricaOperadora, Operadora
+from domain.schemas import MetricaOperadoraResponse, OperadoraResponse
+
+
+def make_operadoras(n: int) -> list[Operadora]:
+    return [
+        Operadora(
+            id=i,
+            registro_ans=f"{300000 + i}",
+            cnpj=f"{i:014d}",
+            razao_social=f"OPERADORA DE SAUDE EXEMPLO {i:05d} LTDA",
+            modalidade="Medicina de Grupo",
+            uf="SP",
+            created_at=datetime(2025, 1, 1, 12, 0, 0),
+            updated_at=datetime(2025, 1, 2, 8, 30, 0),
+        )
+        for i in range(n)
+    ]
+
+
+def make_metricas(n: int) -> list[MetricaOperadora]:
+    return [
+        MetricaOperadora(
+            id=i,
+            operadora_id=i,
+            registro_ans=f"{300000 + i}",
+            cnpj=f"{i:014d}",
+            razao_social=f"OPERADORA DE SAUDE EXEMPLO {i:05d} LTDA",
+            modalidade="Medicina de Grupo",
+            uf="SP",
+            total_despesas=Decimal("123456789.12"),
+            media_trimestral=Decimal("30864197.28"),
+            desvio_padrao=Decimal("1234.56"),
+            coeficiente_variacao=Decimal("0.040000"),
+            quantidade_trimestres=4,
+            ranking=i,
+            alta_variabilidade=False,
+            cadastro_incompleto=False,
+            cnpj_conflict=False,
+            razao_social_ausente=False,
+            created_at=datetime(2025, 1, 1, 12, 0, 0),
+        )
+        for i in range(n)
+    ]
+
+
+def baseline(rows, model) -> bytes:
+    items = [model.model_validate(row) for row in rows]
+    adapter = get_adapter(list[model])
+    content = adapter.dump_python(adapter.validate_python(items), mode="json")
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+def type_adapter(rows, model) -> bytes:
+    return encode(rows, list[model])
+
+
+def projection(rows, model) -> bytes:
+    return encode_projected(project_rows(rows, model))
+
+
+def measure(fn, rows, model, repeat: int) -> float:
+    fn(rows, model)  # aquecimento (cria os TypeAdapters)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows, model)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'schema':<28}{'linhas':>7}{'baseline':>11}{'adapter':>11}{'projeção':>11}  (ms, mediana)")
+    for model, factory in ((OperadoraResponse, make_operadoras), (MetricaOperadoraResponse, make_metricas)):
+        for n in (100, 1000):
+            rows = factory(n)
+            assert json.loads(baseline(rows, model)) == json.loads(projection(rows, model))
+            results = [measure(fn, rows, model, args.repeat) for fn in (baseline, type_adapter, projection)]
+            print(f"{model.__name__:<28}{n:>7}" + "".join(f"{r:>11.2f}" for r in results))
+
+
+if __name__ == "__main__":
+    main()
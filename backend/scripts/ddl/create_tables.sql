@@ -2,6 +2,7 @@ DROP TABLE IF EXISTS `despesas_trimestrais`;
 DROP TABLE IF EXISTS `metricas_operadoras`;
 DROP TABLE IF EXISTS `import_logs`;
 DROP TABLE IF EXISTS `import_rejects`;
+DROP TABLE IF EXISTS `data_version`;
 DROP TABLE IF EXISTS `operadoras`;
 
 
@@ -97,4 +98,14 @@ CREATE TABLE `metricas_operadoras` (
   KEY `idx_ranking` (`ranking`),
   KEY `idx_total_despesas` (`total_despesas`),
   KEY `idx_uf` (`uf`)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin;
\ No newline at end of file
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin;
+
+-- Versão dos dados: incrementada a cada importação para invalidar caches da API
+CREATE TABLE `data_version` (
+  `id` tinyint NOT NULL,
+  `version` bigint NOT NULL DEFAULT '0',
+  `updated_at` datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin;
+
+INSERT INTO `data_version` (`id`, `version`) VALUES (1, 0);
@@ -82,6 +82,14 @@ def main():
         conn.commit()
         print(f"✓ Atualizadas {updated_metricas} métricas com operadora_id linkado.")
         
+        # 5. Incrementar a versão dos dados para invalidar os caches da API
+        cursor.execute("""
+            INSERT INTO data_version (id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """)
+        conn.commit()
+        print("✓ Versão dos dados atualizada.")
+        
     conn.close()
     print("\n✓ Processo concluído!")
 
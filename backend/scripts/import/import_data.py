@@ -86,6 +86,23 @@ def update_import_log(conn, log_id, total, success, reject, status='completed',
         conn.commit()
 
 
+def bump_data_version(conn):
+    """
+    Incrementa a versão dos dados. A API inclui essa versão nas chaves de cache,
+    então os resultados antigos deixam de ser servidos assim que ela muda.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO data_version (id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """)
+        conn.commit()
+        cursor.execute("SELECT version FROM data_version WHERE id = 1")
+        version = cursor.fetchone()['version']
+    print(f"✓ Versão dos dados atualizada para {version}")
+    return version
+
+
 def str_to_bool(value):
     """Converte string para boolean."""
     if value is None:
@@ -388,6 +405,10 @@ def main():
             print(__doc__)
             sys.exit(0)
     
+    conn = None
+    # Se a importação falhar depois de mexer nas tabelas, a versão ainda precisa
+    # mudar: senão a API continua servindo do cache os resultados de antes
+    tables_modified = False
     try:
         print(f"Conectando a {DB_CONFIG['host']}:{DB_CONFIG['port']}...")
         conn = get_connection()
@@ -398,18 +419,23 @@ def main():
             print("\n⚠️  ATENÇÃO: Limpando TODAS as tabelas (incluindo operadoras)!")
             confirm = input("Tem certeza? Digite 'SIM' para confirmar: ")
             if confirm == 'SIM':
+                tables_modified = True
                 clean_tables(conn, clean_all=True)
             else:
                 print("Operação cancelada.")
                 sys.exit(0)
         elif clean_mode == 'partial':
             print("\n⚠️  Limpando tabelas de despesas e métricas...")
+            tables_modified = True
             clean_tables(conn, clean_all=False)
         
-        # Executar importações
+        # Executar importações (gravam em lotes: já alteram as tabelas)
+        tables_modified = True
         import_operadoras(conn)
         import_despesas(conn)
         import_metricas(conn)
+        bump_data_version(conn)
+        tables_modified = False
         
         print("\n✓ Importação completa!")
         
@@ -417,7 +443,13 @@ def main():
         print(f"Erro: {e}")
         sys.exit(1)
     finally:
-        if 'conn' in locals() and conn:
+        if conn and tables_modified:
+            try:
+                conn.rollback()
+                bump_data_version(conn)
+            except Exception as e:
+                print(f"Erro ao atualizar a versão dos dados: {e}")
+        if conn:
             conn.close()
 
 
@@ -0,0 +1,187 @@
+"""
+Exportação em Apache Arrow (IPC stream) e Parquet.
+
+Os record batches são montados direto dos blocos de linhas lidos do cursor
+no servidor, coluna a coluna, sem dicts por linha. O arquivo de cada
+combinação de tabela e filtros é gerado uma vez por versão dos dados e
+guardado em disco; as requisições seguintes só o enviam.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy import Select
+from sqlalchemy import types as sqltypes
+
+from infra.data_version import read_session
+from core.config import settings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional; sem ele as rotas respondem 501
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+ARROW = "arrow"
+PARQUET = "parquet"
+
+MEDIA_TYPES = {
+    ARROW: "application/vnd.apache.arrow.stream",
+    PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def is_available() -> bool:
+    return pa is not None
+
+
+def arrow_type(column_type: sqltypes.TypeEngine) -> "pa.DataType":
+    """Tipo Arrow equivalente ao tipo da coluna no banco."""
+    if isinstance(column_type, sqltypes.Numeric) and not isinstance(column_type, sqltypes.Float):
+        return pa.decimal128(column_type.precision, column_type.scale)
+    if isinstance(column_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, sqltypes.SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, sqltypes.BigInteger):
+        return pa.int64()
+    if isinstance(column_type, sqltypes.Integer):
+        return pa.int32()
+    if isinstance(column_type, sqltypes.DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def schema_for(query: Select) -> "pa.Schema":
+    return pa.schema([(column.key, arrow_type(column.type)) for column in query.selected_columns])
+
+
+def record_batch(schema: "pa.Schema", rows: list) -> "pa.RecordBatch":
+    """Transpõe um bloco de linhas em colunas e monta o RecordBatch."""
+    columns = zip(*rows) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+async def write_export(
+    query: Select, path: Path, fmt: str, batch_size: int | None = None, version: int = 0
+) -> int:
+    """
+    Lê a consulta com cursor no servidor e grava um RecordBatch (no Parquet,
+    um row group) a cada batch_size linhas. Retorna o número de linhas. A
+    leitura precisa ver a versão `version` dos dados, a do nome do arquivo.
+    """
+    batch_size = batch_size or settings.export_arrow_batch_size
+    schema = schema_for(query)
+    rows_written = 0
+    if fmt == PARQUET:
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(str(path), schema)
+    try:
+        async with read_session(version) as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            try:
+                async for partition in result.partitions(batch_size):
+                    writer.write_batch(record_batch(schema, partition))
+                    rows_written += len(partition)
+            finally:
+                await result.close()
+        if fmt == PARQUET and rows_written == 0:
+            # Parquet sem row groups ainda precisa do schema para ser lido
+            writer.write_batch(record_batch(schema, []))
+    finally:
+        writer.close()
+    return rows_written
+
+
+def export_file_name(table: str, version: int, params: str, fmt: str) -> str:
+    digest = hashlib.sha1(params.encode()).hexdigest()[:16]
+    return f"{table}_v{version}_{digest}.{fmt}"
+
+
+class ExportFileCache:
+    """
+    Arquivos de exportação em disco, por versão dos dados. O arquivo é gravado
+    com outro nome e renomeado ao final (atômico), para que ninguém leia um
+    arquivo pela metade; gerações simultâneas do mesmo arquivo no processo
+    esperam a primeira. Ao gerar uma versão nova, os arquivos de versões
+    anteriores são removidos depois de grace_seconds sem modificação: um
+    worker ainda pode estar enviando um deles, ou servindo a versão anterior.
+    """
+
+    def __init__(self, directory: str | Path | None = None, grace_seconds: float | None = None):
+        self._directory = Path(directory) if directory else None
+        self._grace_seconds = grace_seconds
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @property
+    def directory(self) -> Path:
+        directory = self._directory or Path(
+            settings.export_cache_dir or Path(tempfile.gettempdir()) / "healthcare_saas_exports"
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    async def get_or_build(
+        self,
+        table: str,
+        version: int,
+        params: str,
+        fmt: str,
+        build: Callable[[Path], Awaitable[object]],
+    ) -> Path:
+        name = export_file_name(table, version, params, fmt)
+        path = self.directory / name
+        if path.exists():
+            return path
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if not path.exists():
+                tmp = path.with_name(f".{name}.{uuid.uuid4().hex}.tmp")
+                try:
+                    await build(tmp)
+                    os.replace(tmp, path)
+                finally:
+                    tmp.unlink(missing_ok=True)
+                self.purge_older_versions(table, version)
+        self._locks.pop(name, None)
+        return path
+
+    def purge_older_versions(self, table: str, version: int) -> int:
+        """Remove os arquivos de versões anteriores a `version` fora do prazo de carência."""
+        grace = self._grace_seconds
+        if grace is None:
+            grace = settings.export_cache_grace_seconds
+        cutoff = time.time() - grace
+        pattern = re.compile(rf"{re.escape(table)}_v(\d+)_")
+        removed = 0
+        for path in self.directory.glob(f"{table}_v*"):
+            match = pattern.match(path.name)
+            if match is None or int(match.group(1)) >= version:
+                continue
+            try:
+                if path.stat().st_mtime > cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} stale {table} export file(s)")
+        return removed
+
+
+export_cache = ExportFileCache()
@@ -0,0 +1,84 @@
+"""
+Negociação e codificação de compressão (gzip e, se instalado, brotli).
+
+Usado pelo CompressionMiddleware, para respostas geradas a cada requisição,
+e pelo CachedBody, que guarda as variantes já comprimidas junto do corpo.
+"""
+import zlib
+
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele, apenas gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Preferência do servidor quando o cliente aceita mais de uma
+SUPPORTED_ENCODINGS: tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def is_compressible(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def is_excluded(path: str, excluded: list[str] | tuple[str, ...] | None = None) -> bool:
+    """Rotas que optaram por não ter compressão (COMPRESSION_EXCLUDED_PATHS)."""
+    prefixes = settings.compression_excluded_paths if excluded is None else excluded
+    return any(path == prefix or path.startswith(prefix.rstrip("/") + "/") for prefix in prefixes)
+
+
+def negotiate(accept_encoding: str | None, supported: tuple[str, ...] = SUPPORTED_ENCODINGS) -> str | None:
+    """
+    Escolhe a codificação a partir do Accept-Encoding, respeitando q=0 e
+    desempatando pela ordem de preferência do servidor.
+    """
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, level: int | None = None) -> bytes:
+    """Comprime um corpo completo. level é o nível do gzip ou a qualidade do brotli."""
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.compression_brotli_quality if level is None else level)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(settings.compression_level if level is None else level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """Compressão incremental; flush a cada bloco para não atrasar o cliente."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.compression_brotli_quality)
+        else:
+            # wbits=31: formato gzip (cabeçalho + trailer)
+            self._compressor = zlib.compressobj(settings.compression_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._compressor.process(data) if data else b""
+            return out + (self._compressor.finish() if final else self._compressor.flush())
+        out = self._compressor.compress(data)
+        return out + (self._compressor.flush() if final else self._compressor.flush(zlib.Z_SYNC_FLUSH))
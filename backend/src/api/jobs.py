@@ -0,0 +1,222 @@
+"""
+Jobs em segundo plano para consultas analíticas que passam do timeout do proxy.
+
+Os jobs entram numa fila limitada e são executados por um pool de workers
+asyncio no próprio processo. Cada job é identificado pelo tipo, pelos
+parâmetros e pela versão dos dados na submissão: submissões idênticas recebem
+o mesmo job. O resultado fica no cache das rotas analíticas, com a versão na
+chave; se uma importação terminar enquanto o job espera na fila, ele calcula
+e informa a versão que o banco tem quando começa a rodar.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Awaitable, Callable
+
+import orjson
+from pydantic import BaseModel
+
+from infra.data_version import data_version, read_version
+from domain.schemas import (
+    AcimaMediaJobParams,
+    CrescimentoJobParams,
+    DespesasPorUFJobParams,
+    EstatisticasJobParams,
+)
+from core.admission import AdmissionRejected
+from core.config import settings
+from api.responses import CachedBody
+from api.routes import analytics
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class JobKind:
+    params_model: type[BaseModel]
+    run: Callable[..., Awaitable[CachedBody]]
+
+
+# Computações disponíveis: as mesmas funções das rotas analíticas, sem os
+# limites de parâmetros que as mantêm dentro do timeout; recebem também a
+# versão dos dados (keyword `version`)
+JOB_KINDS: dict[str, JobKind] = {
+    "estatisticas": JobKind(EstatisticasJobParams, analytics.estatisticas_body),
+    "crescimento": JobKind(CrescimentoJobParams, analytics.crescimento_body),
+    "despesas_por_uf": JobKind(DespesasPorUFJobParams, analytics.despesas_por_uf_body),
+    "acima_media": JobKind(AcimaMediaJobParams, analytics.acima_media_body),
+}
+
+
+def job_id(kind: str, params: dict, version: int) -> str:
+    key = f"{kind}:v{version}:" + orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode()
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    data_version: int
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+    result: CachedBody | None = None
+    # Relógio monotônico do fim, para a retenção
+    finished_monotonic: float | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status.value,
+            "data_version": self.data_version,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+        }
+
+
+class JobQueueFull(Exception):
+    """A fila de jobs está cheia."""
+
+
+class JobManager:
+    """
+    Fila limitada de jobs com um pool de workers. Jobs concluídos ficam
+    disponíveis para consulta por `retention` segundos; um job que falhou
+    pode ser submetido de novo.
+    """
+
+    def __init__(
+        self,
+        kinds: dict[str, JobKind] = JOB_KINDS,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        retention: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.kinds = kinds
+        self._workers_count = max(1, settings.jobs_workers if workers is None else workers)
+        self._queue_size = settings.jobs_queue_size if queue_size is None else queue_size
+        self._retention = settings.jobs_retention if retention is None else retention
+        self._clock = clock
+        self._jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[Job] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def start(self) -> None:
+        """Inicia os workers no event loop atual (idempotente)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._loop = loop
+        pending = [job for job in self._jobs.values() if job.status is JobStatus.QUEUED]
+        self._queue = asyncio.Queue(maxsize=max(self._queue_size, len(pending)))
+        for job in pending:
+            self._queue.put_nowait(job)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._workers_count)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+
+    def get(self, job_id: str) -> Job | None:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def submit(self, kind: str, params: dict) -> tuple[Job, bool]:
+        """
+        Enfileira o job, ou devolve o job idêntico já existente (mesmo tipo,
+        parâmetros e versão dos dados). Retorna (job, criado).
+        """
+        self.start()
+        self._prune()
+        version = await data_version.current()
+        identifier = job_id(kind, params, version)
+        existing = self._jobs.get(identifier)
+        if existing is not None and existing.status is not JobStatus.FAILED:
+            return existing, False
+
+        job = Job(id=identifier, kind=kind, params=params, data_version=version)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull() from None
+        self._jobs[identifier] = job
+        return job, True
+
+    def _prune(self) -> None:
+        now = self._clock()
+        expired = [
+            job.id for job in self._jobs.values()
+            if job.finished_monotonic is not None and now - job.finished_monotonic > self._retention
+        ]
+        for identifier in expired:
+            del self._jobs[identifier]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            kind = self.kinds[job.kind]
+            # A versão da submissão é só um mínimo: a réplica (ou o primário)
+            # pode já ter dados mais novos, que são os que a consulta vai ler
+            try:
+                job.data_version = await read_version(job.data_version)
+            except Exception as e:
+                logger.warning(f"Could not read data version for job {job.id}, keeping v{job.data_version}: {e}")
+            for attempt in range(settings.jobs_admission_retries + 1):
+                try:
+                    body = await kind.run(**job.params, version=job.data_version)
+                    break
+                except AdmissionRejected as e:
+                    # Banco ocupado com as rotas síncronas: o job pode esperar
+                    if attempt == settings.jobs_admission_retries:
+                        raise
+                    await asyncio.sleep(e.retry_after)
+            job.finished_at = datetime.utcnow()
+            job.status = JobStatus.COMPLETED
+            # Resposta composta montada uma vez: as consultas seguintes só a enviam
+            job.result = CachedBody.from_parts({
+                "job": CachedBody(body=orjson.dumps(job.as_dict())),
+                "result": body,
+            })
+        except Exception as e:
+            job.finished_at = datetime.utcnow()
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            logger.warning(f"Job {job.id} ({job.kind}) failed: {e}")
+        finally:
+            job.finished_monotonic = self._clock()
+
+
+job_manager = JobManager()
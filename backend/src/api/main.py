@@ -1,17 +1,28 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from contextlib import asynccontextmanager
 import logging
 
 from core.config import settings, Environment
-from infra.database import get_db, async_create_tables
-from api.routes import operadoras, analytics, logs
+from core.cache import cache
+from core import metrics
+from core.admission import AdmissionRejected
+from infra.database import get_db, async_create_tables, read_engine, replica_engines, replica_router, warm_up_pool
+from infra.data_version import data_version
+from api.routes import operadoras, analytics, dashboard, export, jobs, logs, admin
+from api.warmup import CacheWarmer
+from api.jobs import job_manager
+from api.responses import FastJSONResponse
+from api.middleware import HttpCacheMiddleware, CompressionMiddleware, TimingMiddleware, MetricsMiddleware
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+warmer = CacheWarmer(concurrency=settings.cache_warmup_concurrency)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -22,9 +33,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error verifying tables: {e}")
     
+    opened = await warm_up_pool()
+    logger.info(f"Database pool warmed up with {opened} connection(s)")
+    for name, engine in {"read": read_engine, **replica_engines}.items():
+        opened = await warm_up_pool(engine)
+        logger.info(f"Database {name} pool warmed up with {opened} connection(s)")
+    
+    version = await data_version.refresh()
+    logger.info(f"Data version: v{version}")
+    
+    # Aquecimento em segundo plano: não atrasa o início do atendimento
+    if settings.cache_warmup_enabled:
+        warmer.start()
+    job_manager.start()
+    
     yield
     
     logger.info("Shutting down...")
+    await warmer.stop()
+    await job_manager.stop()
 
 
 app = FastAPI(
@@ -34,8 +61,18 @@ app = FastAPI(
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Middlewares ASGI puros (ver api/middleware.py). O último registrado é o mais
+# externo: CORS > métricas > tempo > compressão > cache HTTP > rotas. O cache HTTP fica
+# por dentro do CORS para que respostas 304 também recebam os cabeçalhos CORS,
+# e por dentro da compressão para que a ETag seja marcada como fraca no gzip.
+app.add_middleware(HttpCacheMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Configurar origens CORS permitidas
 allowed_origins = [
     settings.frontend_url,
@@ -55,28 +92,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Data-Version", "ETag", "X-Process-Time", "Server-Timing", "Retry-After"],
 )
 
 
-# Middleware para prevenir cache em endpoints de API
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-
-class NoCacheMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        if request.url.path.startswith("/api/"):
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-        return response
-
-app.add_middleware(NoCacheMiddleware)
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Sobrecarga nas consultas caras: o cliente deve tentar de novo mais tarde"""
+    logger.warning(f"Admission rejected ({exc.limiter}, {exc.reason}): {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Serviço sobrecarregado, tente novamente em instantes"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 app.include_router(operadoras.router, prefix="/api/operadoras", tags=["operadoras"])
 app.include_router(analytics.router, prefix="/api/estatisticas", tags=["estatisticas"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(export.router, prefix="/api/export", tags=["export"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 app.include_router(logs.router, prefix="/api/logs", tags=["logs"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 
 @app.get("/")
@@ -90,6 +127,12 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Métricas da API, do banco e do cache no formato texto do Prometheus"""
+    return PlainTextResponse(metrics.render(metrics.registry.collect()), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check(db: AsyncSession = Depends(get_db)):
     try:
@@ -103,6 +146,9 @@ async def health_check(db: AsyncSession = Depends(get_db)):
     return {
         "status": "healthy" if db_status == "healthy" else "degraded",
         "database": db_status,
+        "replicas": replica_router.status(),
+        "cache": cache.stats.as_dict(),
+        "warmup": warmer.progress.as_dict(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
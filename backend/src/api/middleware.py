@@ -0,0 +1,342 @@
+"""
+Middlewares ASGI puros da API.
+
+Escritos sobre a interface ASGI (scope/receive/send) em vez de
+BaseHTTPMiddleware: não criam uma task extra nem reempacotam o corpo a cada
+requisição, e respostas em streaming continuam sendo enviadas aos poucos.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.metrics import RequestTiming, current_timing, registry
+from api import compression
+from infra.data_version import data_version
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Política de cache HTTP de um grupo de rotas."""
+    max_age: int = 0
+    stale_while_revalidate: int = 0
+    no_store: bool = False
+
+    @property
+    def header(self) -> str:
+        if self.no_store:
+            return "no-cache, no-store, must-revalidate"
+        value = f"public, max-age={self.max_age}"
+        if self.stale_while_revalidate:
+            value += f", stale-while-revalidate={self.stale_while_revalidate}"
+        return value
+
+
+NO_STORE = CachePolicy(no_store=True)
+
+# Política por prefixo de rota; vale o prefixo mais longo que casar.
+# Rotas de /api/ fora da tabela são revalidadas a cada uso (max-age=0 + ETag).
+CACHE_POLICIES: dict[str, CachePolicy] = {
+    "/api/estatisticas": CachePolicy(
+        max_age=settings.http_cache_max_age,
+        stale_while_revalidate=settings.http_cache_stale_while_revalidate,
+    ),
+    "/api/dashboard": CachePolicy(
+        max_age=settings.http_cache_max_age,
+        stale_while_revalidate=settings.http_cache_stale_while_revalidate,
+    ),
+    "/api/operadoras": CachePolicy(
+        max_age=settings.http_cache_max_age,
+        stale_while_revalidate=settings.http_cache_stale_while_revalidate,
+    ),
+    # Logs de importação são operacionais: nunca guardar
+    "/api/logs": NO_STORE,
+    # Status de job muda enquanto ele roda
+    "/api/jobs": NO_STORE,
+}
+DEFAULT_POLICY = CachePolicy()
+
+
+def policy_for(path: str, policies: dict[str, CachePolicy] = CACHE_POLICIES) -> CachePolicy | None:
+    if not path.startswith("/api/"):
+        return None
+    matches = [prefix for prefix in policies if path == prefix or path.startswith(prefix + "/")]
+    if not matches:
+        return DEFAULT_POLICY
+    return policies[max(matches, key=len)]
+
+
+def make_etag(version: int, path: str, query_items: list[tuple[str, str]]) -> str:
+    """
+    ETag forte: a resposta é função apenas da versão dos dados, da rota e dos
+    parâmetros, então não é preciso gerar (nem ler) o corpo para calculá-la.
+    """
+    query = "&".join(f"{k}={v}" for k, v in sorted(query_items))
+    digest = hashlib.sha1(f"v{version}:{path}?{query}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match usa comparação fraca (RFC 9110, 13.1.2)
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class HttpCacheMiddleware:
+    """
+    Cache HTTP para as rotas de /api/: ETag derivada da versão dos dados e dos
+    parâmetros, resposta 304 para If-None-Match sem executar a rota, e
+    Cache-Control conforme a política da rota. Também informa X-Data-Version.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: dict[str, CachePolicy] = CACHE_POLICIES,
+        version_provider: Callable[[], Awaitable[int]] = data_version.current,
+    ):
+        self.app = app
+        self._policies = policies
+        self._version_provider = version_provider
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        policy = policy_for(scope["path"], self._policies)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        version = await self._version_provider()
+        headers = {"X-Data-Version": str(version)}
+        cacheable = scope["method"] in ("GET", "HEAD") and not policy.no_store
+
+        if cacheable:
+            query_items = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+            headers["ETag"] = make_etag(version, scope["path"], query_items)
+            headers["Cache-Control"] = policy.header
+            if etag_matches(Headers(scope=scope).get("if-none-match"), headers["ETag"]):
+                await Response(status_code=304, headers=headers)(scope, receive, send)
+                return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                extra = dict(headers)
+                if not cacheable or message["status"] != 200:
+                    # Erros e métodos que alteram estado não devem ser guardados
+                    extra.pop("ETag", None)
+                    extra["Cache-Control"] = NO_STORE.header
+                    extra["Pragma"] = "no-cache"
+                    extra["Expires"] = "0"
+                MutableHeaders(scope=message).update(extra)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class TimingMiddleware:
+    """
+    Informa o tempo (ms) até o início da resposta em X-Process-Time e em
+    Server-Timing (visível no devtools), separando o tempo gasto no banco.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = f"{elapsed_ms:.2f}"
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={elapsed_ms:.2f}, '
+                    f'db;dur={timing.db_seconds * 1000:.2f};desc="{timing.db_queries} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timing.reset(token)
+
+
+http_requests = registry.counter(
+    "http_requests_total", "Requisições HTTP por rota e status", ("method", "route", "status")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento", ("method",)
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP por rota e status",
+    ("method", "route", "status"),
+)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Template da rota (ex.: /api/operadoras/registro/{registro_ans}), definido
+    pelo roteamento; caminhos sem rota viram "unmatched" para não explodir a
+    cardinalidade das métricas.
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Contagem, requisições em andamento e histograma de latência por rota."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method=method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec(method=method)
+            labels = {"method": method, "route": route_template(scope), "status": str(status)}
+            http_requests.inc(**labels)
+            http_request_duration.observe(time.perf_counter() - started, **labels)
+
+
+def _add_vary(headers: MutableHeaders, value: str) -> None:
+    current = headers.get("vary")
+    if not current:
+        headers["Vary"] = value
+    elif value.lower() not in current.lower():
+        headers["Vary"] = f"{current}, {value}"
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """
+    Compressão negociada (brotli ou gzip) de respostas textuais (JSON, NDJSON, CSV...).
+
+    Respostas de um único bloco abaixo de minimum_size seguem sem compressão;
+    respostas em streaming são comprimidas bloco a bloco. Rotas em
+    COMPRESSION_EXCLUDED_PATHS não são comprimidas. Respostas que já chegam
+    com Content-Encoding (ex.: CachedBody pré-comprimido) não são tocadas,
+    apenas têm a ETag marcada como fraca, como a variante comprimida aqui.
+    Um 304 repete os validadores que o 200 teria: Vary e, com uma codificação
+    negociada, a ETag fraca.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.compression_min_size,
+        excluded_paths: list[str] | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_paths = excluded_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or compression.is_excluded(scope["path"], self.excluded_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = compression.negotiate(Headers(scope=scope).get("accept-encoding"))
+        start_message: Message | None = None
+        compressor: compression.StreamCompressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # Sem corpo nem Content-Type: nada a comprimir, só os validadores
+                    headers = MutableHeaders(scope=message)
+                    _add_vary(headers, "Accept-Encoding")
+                    if encoding is not None:
+                        _weaken_etag(headers)
+                    await send(message)
+                    return
+                # Adiado até o primeiro bloco do corpo, que decide se comprime
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(scope=start)
+                if compression.is_compressible(headers.get("content-type")):
+                    _add_vary(headers, "Accept-Encoding")
+                    content_encoding = headers.get("content-encoding")
+                    if content_encoding and content_encoding != "identity":
+                        _weaken_etag(headers)
+                    elif (
+                        content_encoding is None
+                        and encoding is not None
+                        and (more_body or len(body) >= self.minimum_size)
+                    ):
+                        compressor = compression.StreamCompressor(encoding)
+                if compressor is None:
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers["Content-Encoding"] = encoding
+                _weaken_etag(headers)
+                data = compressor.compress(body, final=not more_body)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(data))
+                await send(start)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            if compressor is None:
+                await send(message)
+                return
+            data = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
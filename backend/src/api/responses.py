@@ -0,0 +1,207 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+from api import compression
+from core.config import settings
+from core.redis_cache import register_l2_type
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def _default(obj: Any) -> Any:
+    # Mesmo tratamento do jsonable_encoder do FastAPI para conteúdo sem response_model
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _model_default(obj: Any) -> Any:
+    # Mesmo formato do Pydantic em modo JSON (Decimal como string)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    return _default(obj)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse codificada com orjson; classe de resposta padrão da aplicação."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def get_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter reaproveitado por tipo (criar um a cada chamada é caro)."""
+    return TypeAdapter(tp)
+
+
+def encode(content: Any, response_type: Any = None) -> bytes:
+    """
+    Serializa o conteúdo em JSON. Com response_type, valida (aceitando objetos
+    ORM) e serializa pelo Pydantic em modo JSON, como o FastAPI faz com
+    response_model, para que o formato (ex.: Decimal como string) seja o mesmo.
+    """
+    if response_type is not None:
+        adapter = get_adapter(response_type)
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _field_names(model: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(model.model_fields)
+
+
+def parse_fields(fields: str | None, model: type[BaseModel]) -> tuple[str, ...] | None:
+    """
+    Lê o parâmetro `fields=` (sparse fieldset, ex.: "id,razao_social,uf").
+    Devolve os campos na ordem do schema, para que a mesma seleção em outra
+    ordem gere a mesma consulta e a mesma chave de cache; None = todos.
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    available = _field_names(model)
+    unknown = requested.difference(available)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Campos inválidos: {', '.join(sorted(unknown))}; disponíveis: {', '.join(available)}",
+        )
+    return tuple(name for name in available if name in requested) or None
+
+
+def project_rows(rows: Any, model: type[BaseModel], fields: tuple[str, ...] | None = None) -> list[dict]:
+    """
+    Projeta objetos ORM (ou linhas de uma projeção Core) diretamente em dicts
+    com os campos do schema, ou só com `fields`, sem validação. É o caminho
+    rápido para listas grandes: só serve quando as colunas já têm os tipos do
+    schema (o que vale para linhas vindas do banco).
+    """
+    names = fields or _field_names(model)
+    return [{name: getattr(row, name) for name in names} for row in rows]
+
+
+def encode_projected(content: Any) -> bytes:
+    """
+    Serializa conteúdo montado com project_rows: orjson trata datetime de forma
+    nativa e Decimal vira string, no mesmo formato do response_model.
+    """
+    return orjson.dumps(content, default=_model_default)
+
+
+def fast_response(content: Any, status_code: int = 200) -> Response:
+    """Resposta para conteúdo de project_rows; dispensa a revalidação do response_model."""
+    return Response(content=encode_projected(content), status_code=status_code, media_type=JSON_MEDIA_TYPE)
+
+
+def precompress(body: bytes) -> dict[str, bytes]:
+    """
+    Variantes comprimidas de um corpo que vai para o cache: a compressão é
+    paga uma vez por versão dos dados, não a cada requisição.
+    """
+    if len(body) < settings.compression_min_size:
+        return {}
+    levels = {"gzip": settings.compression_cached_level, "br": settings.compression_cached_brotli_quality}
+    return {
+        encoding: compression.compress(body, encoding, levels[encoding])
+        for encoding in compression.SUPPORTED_ENCODINGS
+    }
+
+
+class CachedBodyResponse(Response):
+    """
+    Resposta de um CachedBody: escolhe, pelo Accept-Encoding da requisição,
+    a variante já comprimida (ou o corpo original) no momento do envio.
+    """
+
+    def __init__(self, cached: "CachedBody"):
+        super().__init__(
+            content=cached.body,
+            status_code=cached.status_code,
+            headers=cached.headers,
+            media_type=cached.media_type,
+        )
+        self.variants = cached.variants
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.variants and not compression.is_excluded(scope["path"]):
+            self.headers["Vary"] = "Accept-Encoding"
+            encoding = compression.negotiate(
+                Headers(scope=scope).get("accept-encoding"), tuple(self.variants)
+            )
+            if encoding is not None:
+                self.body = self.variants[encoding]
+                self.headers["Content-Encoding"] = encoding
+                self.headers["Content-Length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+
+@dataclass
+class CachedBody:
+    """
+    Resposta já serializada, guardada no cache para ser devolvida sem
+    reprocessamento, junto com as variantes comprimidas (gzip/brotli).
+    """
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    media_type: str = JSON_MEDIA_TYPE
+    status_code: int = 200
+    variants: dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def from_content(cls, content: Any, response_type: Any = None) -> "CachedBody":
+        body = encode(content, response_type)
+        return cls(body=body, variants=precompress(body))
+
+    @classmethod
+    def from_rows(cls, rows: Any, model: type[BaseModel], fields: tuple[str, ...] | None = None) -> "CachedBody":
+        body = encode_projected(project_rows(rows, model, fields))
+        return cls(body=body, variants=precompress(body))
+
+    @classmethod
+    def from_parts(cls, parts: dict[str, "CachedBody"]) -> "CachedBody":
+        """Objeto JSON composto pelos corpos já serializados de outras respostas."""
+        body = b"{" + b",".join(dumps(name) + b":" + part.body for name, part in parts.items()) + b"}"
+        return cls(body=body, variants=precompress(body))
+
+    def to_response(self) -> Response:
+        return CachedBodyResponse(self)
+
+    def l2_dump(self) -> tuple[dict[str, Any], list[bytes]]:
+        meta = {
+            "headers": self.headers,
+            "media_type": self.media_type,
+            "status_code": self.status_code,
+            "variants": list(self.variants),
+        }
+        return meta, [self.body, *self.variants.values()]
+
+    @classmethod
+    def l2_load(cls, meta: dict[str, Any], blobs: list[bytes]) -> "CachedBody":
+        body, *variants = blobs
+        return cls(
+            body=body,
+            headers=dict(meta["headers"]),
+            media_type=str(meta["media_type"]),
+            status_code=int(meta["status_code"]),
+            variants=dict(zip(meta["variants"], variants, strict=True)),
+        )
+
+
+register_l2_type("cached_body", CachedBody)
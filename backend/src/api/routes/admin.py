@@ -0,0 +1,70 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+from core.cache import cache, cache_metric_families, operadora_cache
+from core.config import settings, Environment
+from core import metrics
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Protege as rotas administrativas. Sem ADMIN_TOKEN configurado, as rotas
+    ficam fechadas; só o ambiente de testes dispensa o token.
+    """
+    if settings.admin_token is None:
+        if settings.environment == Environment.TESTING:
+            return
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN não configurado")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Token administrativo inválido")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Estatísticas do cache por namespace (hits, misses, despejos, bytes...)"""
+    l2 = cache.l2
+    return {
+        "entries": len(cache),
+        "bytes": cache.size_bytes,
+        "max_entries": cache.max_entries,
+        "max_bytes": cache.max_bytes,
+        "l2": {
+            "enabled": l2 is not None,
+            "available": l2.available if l2 is not None else False,
+        },
+        "totals": cache.stats.as_dict(),
+        "operadoras": {
+            "entries": len(operadora_cache),
+            "bytes": operadora_cache.size_bytes,
+            "max_entries": operadora_cache.max_entries,
+            "max_bytes": operadora_cache.max_bytes,
+        },
+        "namespaces": {
+            namespace: stats.as_dict()
+            for namespace, stats in {**cache.namespace_stats(), **operadora_cache.namespace_stats()}.items()
+        },
+    }
+
+
+@router.get("/cache/metrics", response_class=PlainTextResponse)
+async def get_cache_metrics():
+    """Mesmas estatísticas no formato texto do Prometheus"""
+    return PlainTextResponse(
+        metrics.render(cache_metric_families()),
+        media_type=metrics.CONTENT_TYPE,
+    )
+
+
+@router.delete("/cache")
+async def purge_cache(
+    prefix: str = Query("", description="Remove apenas chaves com este prefixo (ex.: 'estatisticas:')")
+):
+    """Remove entradas do cache (L1 e L2) e do cache de operadoras pelo prefixo da chave"""
+    removed = await cache.purge(prefix) + await operadora_cache.purge(prefix)
+    return {"prefix": prefix, "removed": removed}
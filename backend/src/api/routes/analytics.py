@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from typing import Any, Awaitable, Callable
 
-from infra.database import get_db
+from infra.data_version import data_version, read_session
 from infra.repositories import MetricaRepository
 from domain.services import AnalyticsService
 from domain.schemas import (
@@ -12,78 +13,184 @@ from domain.schemas import (
     OperadoraAcimaMedia,
     EstatisticasResponse
 )
+from core import admission
 from core.cache import cache
+from core.config import settings
+from api.responses import CachedBody, parse_fields
 
 router = APIRouter()
 
-CACHE_KEY_ESTATISTICAS = "estatisticas_agregadas"
+# Chaves no formato "<namespace>:v<versão dos dados>:<parâmetros>"
+CACHE_KEY_ESTATISTICAS = "estatisticas"
+CACHE_KEY_TOP_RANKING = "top_ranking"
+CACHE_KEY_ALTA_VARIABILIDADE = "alta_variabilidade"
+CACHE_KEY_CRESCIMENTO = "crescimento"
+CACHE_KEY_DESPESAS_UF = "despesas_por_uf"
+CACHE_KEY_ACIMA_MEDIA = "acima_media"
+
+
+def _body_factory(
+    namespace: str,
+    version: int,
+    query: Callable[[AsyncSession], Awaitable[Any]],
+    response_type: Any = None,
+    rows_model: type[BaseModel] | None = None,
+    fields: tuple[str, ...] | None = None
+) -> Callable[[], Awaitable[CachedBody]]:
+    """
+    Cria uma factory de cache que abre a própria sessão (permitindo que a
+    revalidação em segundo plano rode depois que a requisição terminou) e
+    já guarda o corpo serializado, para que um hit não passe de novo pela
+    validação e codificação JSON. Com rows_model, as linhas ORM são
+    projetadas direto no schema, sem validação (só com `fields`, se dado).
+
+    A consulta passa pelo controle de admissão do namespace: só os misses
+    disputam vaga no banco, hits do cache nunca são recusados. A sessão
+    precisa ver a versão da chave (ver read_session).
+    """
+    async def factory() -> CachedBody:
+        async with admission.limiter(namespace).slot():
+            async with read_session(version) as session:
+                content = await query(session)
+        if rows_model is not None:
+            return CachedBody.from_rows(content, rows_model, fields)
+        return CachedBody.from_content(content, response_type)
+    return factory
+
+
+async def _cached_body(
+    namespace: str,
+    params: str,
+    query: Callable[[AsyncSession], Awaitable[Any]],
+    response_type: Any = None,
+    rows_model: type[BaseModel] | None = None,
+    fields: tuple[str, ...] | None = None,
+    version: int | None = None
+) -> CachedBody:
+    # Os jobs passam a versão que a sessão deles viu (ver JobManager._run)
+    if version is None:
+        version = await data_version.current()
+    if fields is not None:
+        params = f"{params}:{','.join(fields)}"
+    return await cache.get_or_set(
+        f"{namespace}:v{version}:{params}",
+        _body_factory(namespace, version, query, response_type, rows_model, fields),
+        ttl=settings.analytics_cache_ttl,
+        soft_ttl=settings.analytics_cache_soft_ttl,
+    )
+
+
+# Funções que preenchem o cache; usadas pelas rotas e pelo aquecimento na inicialização
+
+async def estatisticas_body(uf: str | None = None, version: int | None = None) -> CachedBody:
+    return await _cached_body(
+        CACHE_KEY_ESTATISTICAS,
+        uf or "all",
+        lambda session: AnalyticsService(session).get_estatisticas_agregadas(uf=uf),
+        EstatisticasResponse,
+        version=version,
+    )
+
+
+async def top_ranking_body(limit: int = 10, fields: tuple[str, ...] | None = None) -> CachedBody:
+    return await _cached_body(
+        CACHE_KEY_TOP_RANKING,
+        str(limit),
+        lambda session: MetricaRepository(session).get_top_ranking(limit=limit, columns=fields),
+        rows_model=MetricaOperadoraResponse,
+        fields=fields,
+    )
+
+
+async def alta_variabilidade_body(limit: int = 50, fields: tuple[str, ...] | None = None) -> CachedBody:
+    return await _cached_body(
+        CACHE_KEY_ALTA_VARIABILIDADE,
+        str(limit),
+        lambda session: MetricaRepository(session).get_alta_variabilidade(limit=limit, columns=fields),
+        rows_model=MetricaOperadoraResponse,
+        fields=fields,
+    )
+
+
+async def crescimento_body(limit: int = 5, uf: str | None = None, version: int | None = None) -> CachedBody:
+    return await _cached_body(
+        CACHE_KEY_CRESCIMENTO,
+        f"{limit}:{uf or 'all'}",
+        lambda session: AnalyticsService(session).get_top_crescimento(limit=limit, uf=uf),
+        list[TopOperadoraCrescimento],
+        version=version,
+    )
+
+
+async def despesas_por_uf_body(limit: int = 5, version: int | None = None) -> CachedBody:
+    return await _cached_body(
+        CACHE_KEY_DESPESAS_UF,
+        str(limit),
+        lambda session: AnalyticsService(session).get_despesas_por_uf(limit=limit),
+        list[DespesaPorUF],
+        version=version,
+    )
+
+
+async def _acima_media(session: AsyncSession, min_trimestres: int, uf: str | None) -> dict:
+    service = AnalyticsService(session)
+    total, operadoras = await service.get_operadoras_acima_media(min_trimestres=min_trimestres, uf=uf)
+    return {
+        "total_operadoras": total,
+        "operadoras": [op.model_dump() for op in operadoras]
+    }
+
+
+async def acima_media_body(min_trimestres: int = 2, uf: str | None = None, version: int | None = None) -> CachedBody:
+    return await _cached_body(
+        CACHE_KEY_ACIMA_MEDIA,
+        f"{min_trimestres}:{uf or 'all'}",
+        lambda session: _acima_media(session, min_trimestres, uf),
+        version=version,
+    )
 
 
 @router.get("", response_model=EstatisticasResponse)
 async def get_estatisticas(
     uf: str = Query(None, description="Filtrar por UF"),
-    db: AsyncSession = Depends(get_db)
 ):
-    cache_key = f"{CACHE_KEY_ESTATISTICAS}_{uf or 'all'}"
-    cached = cache.get(cache_key)
-    if cached:
-        return cached
-    
-    service = AnalyticsService(db)
-    result = await service.get_estatisticas_agregadas(uf=uf)
-    cache.set(cache_key, result, ttl=300)
-    return result
+    return (await estatisticas_body(uf)).to_response()
 
 
 @router.get("/top-ranking", response_model=list[MetricaOperadoraResponse])
 async def get_top_ranking(
     limit: int = Query(10, ge=1, le=100),
-    db: AsyncSession = Depends(get_db)
+    fields: str = Query(None, description="Campos a devolver, separados por vírgula"),
 ):
-    repo = MetricaRepository(db)
-    metricas = await repo.get_top_ranking(limit=limit)
-    return [MetricaOperadoraResponse.model_validate(m) for m in metricas]
+    return (await top_ranking_body(limit, parse_fields(fields, MetricaOperadoraResponse))).to_response()
 
 
 @router.get("/alta-variabilidade", response_model=list[MetricaOperadoraResponse])
 async def get_alta_variabilidade(
     limit: int = Query(50, ge=1, le=200),
-    db: AsyncSession = Depends(get_db)
+    fields: str = Query(None, description="Campos a devolver, separados por vírgula"),
 ):
-    repo = MetricaRepository(db)
-    metricas = await repo.get_alta_variabilidade(limit=limit)
-    return [MetricaOperadoraResponse.model_validate(m) for m in metricas]
+    return (await alta_variabilidade_body(limit, parse_fields(fields, MetricaOperadoraResponse))).to_response()
 
 
 @router.get("/crescimento", response_model=list[TopOperadoraCrescimento])
 async def get_top_crescimento(
     limit: int = Query(5, ge=1, le=20),
     uf: str = Query(None, description="Filtrar por UF"),
-    db: AsyncSession = Depends(get_db)
 ):
-    service = AnalyticsService(db)
-    return await service.get_top_crescimento(limit=limit, uf=uf)
+    return (await crescimento_body(limit, uf)).to_response()
 
 
 @router.get("/despesas-por-uf", response_model=list[DespesaPorUF])
 async def get_despesas_por_uf(
     limit: int = Query(5, ge=1, le=27),
-    db: AsyncSession = Depends(get_db)
 ):
-    service = AnalyticsService(db)
-    return await service.get_despesas_por_uf(limit=limit)
+    return (await despesas_por_uf_body(limit)).to_response()
 
 
 @router.get("/acima-media")
 async def get_operadoras_acima_media(
     min_trimestres: int = Query(2, ge=1, le=4),
     uf: str = Query(None, description="Filtrar por UF"),
-    db: AsyncSession = Depends(get_db)
 ):
-    service = AnalyticsService(db)
-    total, operadoras = await service.get_operadoras_acima_media(min_trimestres=min_trimestres, uf=uf)
-    
-    return {
-        "total_operadoras": total,
-        "operadoras": [op.model_dump() for op in operadoras]
-    }
+    return (await acima_media_body(min_trimestres, uf)).to_response()
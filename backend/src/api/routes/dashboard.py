@@ -0,0 +1,59 @@
+import asyncio
+
+from fastapi import APIRouter, Query
+
+from infra.data_version import data_version
+from domain.schemas import DashboardResponse
+from core.cache import cache
+from core.config import settings
+from api.responses import CachedBody
+from api.routes import analytics
+
+router = APIRouter()
+
+CACHE_KEY_DASHBOARD = "dashboard"
+
+# Mesmos parâmetros que o dashboard do frontend usava nas chamadas separadas
+CRESCIMENTO_LIMIT = 5
+DESPESAS_UF_LIMIT = 27
+ACIMA_MEDIA_MIN_TRIMESTRES = 2
+
+
+async def _build_dashboard(uf: str | None, version: int) -> CachedBody:
+    """
+    Executa as consultas do dashboard em paralelo, cada uma com a própria
+    sessão (e conexão), e junta os corpos JSON já serializados de cada parte.
+    As partes continuam no cache individualmente, então partes já calculadas
+    (pelas rotas separadas ou pelo aquecimento) não voltam ao banco. Todas
+    as partes usam a versão da chave do dashboard.
+    """
+    estatisticas, crescimento, despesas_por_uf, acima_media = await asyncio.gather(
+        analytics.estatisticas_body(uf, version=version),
+        analytics.crescimento_body(limit=CRESCIMENTO_LIMIT, uf=uf, version=version),
+        analytics.despesas_por_uf_body(limit=DESPESAS_UF_LIMIT, version=version),
+        analytics.acima_media_body(min_trimestres=ACIMA_MEDIA_MIN_TRIMESTRES, uf=uf, version=version),
+    )
+    return CachedBody.from_parts({
+        "estatisticas": estatisticas,
+        "crescimento": crescimento,
+        "despesas_por_uf": despesas_por_uf,
+        "acima_media": acima_media,
+    })
+
+
+async def dashboard_body(uf: str | None = None) -> CachedBody:
+    version = await data_version.current()
+    return await cache.get_or_set(
+        f"{CACHE_KEY_DASHBOARD}:v{version}:{uf or 'all'}",
+        lambda: _build_dashboard(uf, version),
+        ttl=settings.analytics_cache_ttl,
+        soft_ttl=settings.analytics_cache_soft_ttl,
+    )
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    uf: str = Query(None, description="Filtrar por UF"),
+):
+    """Todos os dados do dashboard em uma única resposta"""
+    return (await dashboard_body(uf)).to_response()
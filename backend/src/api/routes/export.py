@@ -0,0 +1,268 @@
+import csv
+import io
+import logging
+from enum import Enum
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import Select, select
+
+from infra.database import ReadSessionLocal, statement_timeout_hint
+from infra.data_version import data_version
+from domain.models import DespesaTrimestral, MetricaOperadora
+from core import admission
+from core.config import settings
+from api import arrow_export
+from api.responses import encode_projected
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class ExportTable(str, Enum):
+    DESPESAS = "despesas"
+    METRICAS = "metricas"
+
+
+EXPORT_LIMITER = "export"
+
+FILE_NAMES = {
+    ExportTable.DESPESAS: "despesas_trimestrais",
+    ExportTable.METRICAS: "metricas_operadoras",
+}
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+DESPESAS_COLUMNS = (
+    DespesaTrimestral.registro_ans,
+    DespesaTrimestral.cnpj,
+    DespesaTrimestral.razao_social,
+    DespesaTrimestral.uf,
+    DespesaTrimestral.modalidade,
+    DespesaTrimestral.ano,
+    DespesaTrimestral.trimestre,
+    DespesaTrimestral.valor_despesas,
+    DespesaTrimestral.cadastro_incompleto,
+    DespesaTrimestral.cnpj_conflict,
+    DespesaTrimestral.cnpj_invalido,
+    DespesaTrimestral.razao_social_ausente,
+)
+
+METRICAS_COLUMNS = (
+    MetricaOperadora.registro_ans,
+    MetricaOperadora.cnpj,
+    MetricaOperadora.razao_social,
+    MetricaOperadora.uf,
+    MetricaOperadora.modalidade,
+    MetricaOperadora.ranking,
+    MetricaOperadora.total_despesas,
+    MetricaOperadora.media_trimestral,
+    MetricaOperadora.desvio_padrao,
+    MetricaOperadora.coeficiente_variacao,
+    MetricaOperadora.alta_variabilidade,
+    MetricaOperadora.quantidade_trimestres,
+    MetricaOperadora.cadastro_incompleto,
+    MetricaOperadora.cnpj_conflict,
+    MetricaOperadora.razao_social_ausente,
+)
+
+
+def _without_read_timeout(query: Select) -> Select:
+    # Com cursor no servidor, o MySQL conta o envio das linhas no tempo da
+    # consulta: o limite das conexões de leitura cortaria a exportação no meio
+    return query.prefix_with(statement_timeout_hint(settings.export_statement_timeout_ms), dialect="mysql")
+
+
+def despesas_query(
+    uf: Optional[str] = None,
+    ano: Optional[int] = None,
+    trimestre: Optional[int] = None,
+    modalidade: Optional[str] = None,
+) -> Select:
+    query = select(*DESPESAS_COLUMNS)
+    if uf:
+        query = query.where(DespesaTrimestral.uf == uf)
+    if ano:
+        query = query.where(DespesaTrimestral.ano == ano)
+    if trimestre:
+        query = query.where(DespesaTrimestral.trimestre == trimestre)
+    if modalidade:
+        query = query.where(DespesaTrimestral.modalidade == modalidade)
+    return _without_read_timeout(query.order_by(DespesaTrimestral.id))
+
+
+def metricas_query(uf: Optional[str] = None, modalidade: Optional[str] = None) -> Select:
+    query = select(*METRICAS_COLUMNS)
+    if uf:
+        query = query.where(MetricaOperadora.uf == uf)
+    if modalidade:
+        query = query.where(MetricaOperadora.modalidade == modalidade)
+    return _without_read_timeout(query.order_by(MetricaOperadora.id))
+
+
+def _encode_csv(rows: list) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns: list[str], rows: list) -> bytes:
+    return b"".join(encode_projected(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+async def stream_rows(
+    query: Select,
+    fmt: ExportFormat,
+    batch_size: int | None = None,
+    on_close: Callable[[], None] | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Executa a consulta com cursor no servidor (stream_results) e produz o
+    arquivo em blocos de batch_size linhas: a memória usada não depende do
+    tamanho da exportação. A sessão é aberta aqui dentro, e não por Depends,
+    para durar enquanto a resposta é enviada. on_close é chamado ao terminar,
+    com ou sem erro (libera a vaga de admissão).
+    """
+    batch_size = batch_size or settings.export_batch_size
+    columns = [column.key for column in query.selected_columns]
+    try:
+        if fmt is ExportFormat.CSV:
+            yield _encode_csv([columns])
+        async with ReadSessionLocal() as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            try:
+                async for partition in result.partitions(batch_size):
+                    if fmt is ExportFormat.CSV:
+                        yield _encode_csv(partition)
+                    else:
+                        yield _encode_ndjson(columns, partition)
+            except Exception as e:
+                # O status 200 já foi enviado; resta interromper a transferência
+                logger.error(f"Export interrupted: {e}")
+                raise
+            finally:
+                await result.close()
+    finally:
+        if on_close is not None:
+            on_close()
+
+
+async def _resume(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+async def _export_response(query: Select, name: str, fmt: ExportFormat) -> StreamingResponse:
+    """
+    A vaga de admissão é ocupada antes do status: com o limite atingido, a
+    resposta é um 503 limpo (ver AdmissionRejected em main.py). Cada exportação
+    prende uma conexão de leitura até o fim, e sem limite umas poucas
+    esgotariam o pool das rotas baratas. O primeiro bloco é lido aqui para que
+    o gerador já esteja iniciado e o seu finally (que libera a vaga) rode mesmo
+    se o cliente desconectar antes do corpo.
+    """
+    limiter = admission.limiter(EXPORT_LIMITER)
+    await limiter.acquire()
+    body = stream_rows(query, fmt, on_close=limiter.release)
+    try:
+        first = await anext(body)
+    except StopAsyncIteration:
+        first = b""
+    except BaseException:
+        await body.aclose()
+        raise
+    return StreamingResponse(
+        _resume(first, body),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+    )
+
+
+@router.get("/despesas")
+async def export_despesas(
+    formato: ExportFormat = Query(ExportFormat.CSV),
+    uf: Optional[str] = Query(None, description="Filtrar por UF"),
+    ano: Optional[int] = Query(None, ge=2020, le=2030),
+    trimestre: Optional[int] = Query(None, ge=1, le=4),
+    modalidade: Optional[str] = None,
+):
+    """Exporta despesas_trimestrais (CSV ou NDJSON) em streaming"""
+    return await _export_response(
+        despesas_query(uf=uf, ano=ano, trimestre=trimestre, modalidade=modalidade),
+        FILE_NAMES[ExportTable.DESPESAS],
+        formato,
+    )
+
+
+@router.get("/metricas")
+async def export_metricas(
+    formato: ExportFormat = Query(ExportFormat.CSV),
+    uf: Optional[str] = Query(None, description="Filtrar por UF"),
+    modalidade: Optional[str] = None,
+):
+    """Exporta metricas_operadoras (CSV ou NDJSON) em streaming"""
+    return await _export_response(metricas_query(uf=uf, modalidade=modalidade), FILE_NAMES[ExportTable.METRICAS], formato)
+
+
+async def _arrow_response(
+    tabela: ExportTable,
+    fmt: str,
+    uf: Optional[str],
+    ano: Optional[int],
+    trimestre: Optional[int],
+    modalidade: Optional[str],
+) -> FileResponse:
+    if not arrow_export.is_available():
+        raise HTTPException(status_code=501, detail="Exportação Arrow/Parquet indisponível (pyarrow não instalado)")
+    if tabela is ExportTable.METRICAS:
+        if ano or trimestre:
+            raise HTTPException(status_code=422, detail="Filtros ano e trimestre valem apenas para despesas")
+        query = metricas_query(uf=uf, modalidade=modalidade)
+    else:
+        query = despesas_query(uf=uf, ano=ano, trimestre=trimestre, modalidade=modalidade)
+
+    version = await data_version.current()
+
+    async def build(target):
+        # Só a geração do arquivo disputa vaga; arquivos já em disco saem direto
+        async with admission.limiter(EXPORT_LIMITER).slot():
+            return await arrow_export.write_export(query, target, fmt, version=version)
+
+    params = f"uf={uf or ''}&ano={ano or ''}&trimestre={trimestre or ''}&modalidade={modalidade or ''}"
+    path = await arrow_export.export_cache.get_or_build(tabela.value, version, params, fmt, build)
+    return FileResponse(path, media_type=arrow_export.MEDIA_TYPES[fmt], filename=f"{FILE_NAMES[tabela]}.{fmt}")
+
+
+@router.get("/{tabela}.parquet")
+async def export_parquet(
+    tabela: ExportTable,
+    uf: Optional[str] = Query(None, description="Filtrar por UF"),
+    ano: Optional[int] = Query(None, ge=2020, le=2030),
+    trimestre: Optional[int] = Query(None, ge=1, le=4),
+    modalidade: Optional[str] = None,
+):
+    """Exporta a tabela em Parquet; o arquivo é gerado uma vez por versão dos dados"""
+    return await _arrow_response(tabela, arrow_export.PARQUET, uf, ano, trimestre, modalidade)
+
+
+@router.get("/{tabela}.arrow")
+async def export_arrow(
+    tabela: ExportTable,
+    uf: Optional[str] = Query(None, description="Filtrar por UF"),
+    ano: Optional[int] = Query(None, ge=2020, le=2030),
+    trimestre: Optional[int] = Query(None, ge=1, le=4),
+    modalidade: Optional[str] = None,
+):
+    """Exporta a tabela como Arrow IPC stream; o arquivo é gerado uma vez por versão dos dados"""
+    return await _arrow_response(tabela, arrow_export.ARROW, uf, ano, trimestre, modalidade)
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+
+from domain.schemas import JobRequest, JobResponse
+from core.config import settings
+from api.jobs import JobQueueFull, JobStatus, job_manager
+
+router = APIRouter()
+
+
+@router.post("", response_model=JobResponse, status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Submete uma consulta analítica para execução em segundo plano. Submissões
+    idênticas (mesmo tipo, parâmetros e versão dos dados) devolvem o mesmo job.
+    """
+    kind = job_manager.kinds.get(request.kind)
+    if kind is None:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Tipo de job desconhecido; opções: {', '.join(sorted(job_manager.kinds))}",
+        )
+    try:
+        params = kind.params_model.model_validate(request.params).model_dump()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    try:
+        job, created = await job_manager.submit(request.kind, params)
+    except JobQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Fila de jobs cheia, tente novamente em instantes",
+            headers={"Retry-After": str(settings.admission_retry_after)},
+        )
+    return JSONResponse(
+        status_code=202 if created else 200,
+        content=job.as_dict(),
+        headers={"Location": f"/api/jobs/{job.id}"},
+    )
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status do job; quando concluído, a resposta traz também o resultado em "result"."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job.status is JobStatus.COMPLETED:
+        return job.result.to_response()
+    return job.as_dict()
@@ -24,9 +24,9 @@ async def get_unmatched_operadoras(
     Busca do banco de dados operadoras com cadastro_incompleto=true ou CNPJ nulo.
     """
     from sqlalchemy import text
-    from infra.database import AsyncSessionLocal
+    from infra.database import ReadSessionLocal
     
-    async with AsyncSessionLocal() as session:
+    async with ReadSessionLocal() as session:
         # Conta total - operadoras placeholder (CNPJ nulo ou cadastro incompleto)
         count_query = text("""
             SELECT COUNT(DISTINCT o.registro_ans) 
@@ -86,9 +86,9 @@ async def get_operadoras_sem_despesas(
     Operadoras cadastradas mas sem nenhum registro de despesa.
     """
     from sqlalchemy import text
-    from infra.database import AsyncSessionLocal
+    from infra.database import ReadSessionLocal
     
-    async with AsyncSessionLocal() as session:
+    async with ReadSessionLocal() as session:
         # Conta total - usando operadora_id que é a FK real
         count_query = text("""
             SELECT COUNT(*) FROM operadoras o
@@ -137,9 +137,9 @@ async def get_operadoras_sem_despesas(
 async def get_unmatched_count() -> int:
     """Conta operadoras sem match (placeholder - CNPJ nulo)"""
     from sqlalchemy import text
-    from infra.database import AsyncSessionLocal
+    from infra.database import ReadSessionLocal
     
-    async with AsyncSessionLocal() as session:
+    async with ReadSessionLocal() as session:
         query = text("""
             SELECT COUNT(*) FROM operadoras 
             WHERE cnpj IS NULL OR cnpj = ''
@@ -151,9 +151,9 @@ async def get_unmatched_count() -> int:
 async def get_sem_despesas_count() -> int:
     """Conta operadoras sem despesas"""
     from sqlalchemy import text
-    from infra.database import AsyncSessionLocal
+    from infra.database import ReadSessionLocal
     
-    async with AsyncSessionLocal() as session:
+    async with ReadSessionLocal() as session:
         query = text("""
             SELECT COUNT(*) FROM operadoras o
             LEFT JOIN despesas_trimestrais d ON o.id = d.operadora_id
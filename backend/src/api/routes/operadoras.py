@@ -2,19 +2,35 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
-from infra.database import get_db
-from infra.repositories import OperadoraRepository, DespesaRepository
+from infra.data_version import get_versioned_read_db, session_version
+from infra.repositories import OperadoraRepository, CachedOperadoraRepository, DespesaRepository
+from domain.models import DespesaTrimestral
 from domain.schemas import (
     OperadoraResponse,
     DespesaTrimestralResponse,
     OperadoraListResponse,
+    OperadoraBatchRequest,
+    OperadoraBatchResponse,
 )
+from core.config import settings
+from api.responses import fast_response, parse_fields, project_rows
 
 router = APIRouter()
 
+# Histórico devolvido junto com a operadora (rota individual e em lote)
+DESPESAS_LIMIT = 20
+
+# Colunas que a listagem sempre lê, mesmo com fields=: ordenação/cursor e log
+LIST_REQUIRED_COLUMNS = ("id", "registro_ans", "razao_social")
+
+
+def _totais(despesas: list[DespesaTrimestral]) -> tuple[float, float]:
+    total = sum(float(d.valor_despesas) for d in despesas)
+    return total, (total / len(despesas) if despesas else 0)
+
 
 @router.get("/modalidades", response_model=List[str])
-async def list_modalidades(db: AsyncSession = Depends(get_db)):
+async def list_modalidades(db: AsyncSession = Depends(get_versioned_read_db)):
     """Lista todas as modalidades de operadoras disponíveis"""
     repo = OperadoraRepository(db)
     return await repo.get_modalidades()
@@ -29,9 +45,15 @@ async def list_operadoras(
     search: Optional[str] = None,
     uf: Optional[str] = None,
     modalidade: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por vírgula (ex.: id,razao_social,uf)"),
+    db: AsyncSession = Depends(get_versioned_read_db)
 ):
     repo = OperadoraRepository(db)
+    selected = parse_fields(fields, OperadoraResponse)
+    # Com fields=, o SELECT lê só as colunas pedidas (mais as necessárias ao cursor)
+    columns = None
+    if selected is not None:
+        columns = LIST_REQUIRED_COLUMNS + tuple(f for f in selected if f not in LIST_REQUIRED_COLUMNS)
     
     # Log para debug de paginação
     import logging
@@ -45,7 +67,8 @@ async def list_operadoras(
             uf=uf,
             modalidade=modalidade,
             offset=offset,
-            limit=limit
+            limit=limit,
+            columns=columns
         )
     else:
         operadoras = await repo.search(
@@ -53,7 +76,8 @@ async def list_operadoras(
             uf=uf,
             modalidade=modalidade,
             cursor=cursor,
-            limit=limit
+            limit=limit,
+            columns=columns
         )
     
     has_next = len(operadoras) > limit
@@ -70,24 +94,25 @@ async def list_operadoras(
     # Cursor composto: razao_social|registro_ans para ordenação única
     next_cursor = f"{operadoras[-1].razao_social}|{operadoras[-1].registro_ans}" if has_next and operadoras else None
     
-    return OperadoraListResponse(
-        data=[OperadoraResponse.model_validate(op) for op in operadoras],
-        total=total,
-        page=page,
-        limit=limit,
-        next_cursor=next_cursor,
-        has_next=has_next,
-        has_prev=page > 1 or cursor is not None or (offset is not None and offset > 0)
-    )
+    # Caminho rápido: projeção direta das linhas + orjson, sem validar duas vezes
+    return fast_response({
+        "data": project_rows(operadoras, OperadoraResponse, selected),
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_next": has_next,
+        "has_prev": page > 1 or cursor is not None or (offset is not None and offset > 0),
+    })
 
 
 @router.get("/registro/{registro_ans}")
 async def get_operadora_by_registro(
     registro_ans: str,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_versioned_read_db)
 ):
     """Busca operadora pelo registro ANS com histórico de despesas"""
-    repo = OperadoraRepository(db)
+    repo = CachedOperadoraRepository(db, version=session_version(db))
     operadora = await repo.get_by_registro_ans(registro_ans)
     
     if not operadora:
@@ -95,15 +120,61 @@ async def get_operadora_by_registro(
     
     # Buscar despesas da operadora
     despesa_repo = DespesaRepository(db)
-    despesas = await despesa_repo.get_by_operadora(registro_ans, limit=20)
+    despesas = await despesa_repo.get_by_operadora(registro_ans, limit=DESPESAS_LIMIT)
     
     # Calcular total e média
-    total_despesas = sum(float(d.valor_despesas) for d in despesas)
-    media_despesas = total_despesas / len(despesas) if despesas else 0
+    total_despesas, media_despesas = _totais(despesas)
     
     return {
         "operadora": OperadoraResponse.model_validate(operadora),
         "despesas": [DespesaTrimestralResponse.model_validate(d) for d in despesas],
         "total_despesas": total_despesas,
         "media_despesas": media_despesas
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/batch", response_model=OperadoraBatchResponse)
+async def get_operadoras_batch(
+    request: OperadoraBatchRequest,
+    db: AsyncSession = Depends(get_versioned_read_db)
+):
+    """
+    Busca várias operadoras (por registro ANS e/ou CNPJ) com o histórico de
+    despesas, indexadas pelo id. São duas consultas IN para o lote inteiro,
+    em vez de duas por operadora; operadoras já no cache nem vão ao banco.
+    """
+    registros = list(dict.fromkeys(request.registros))
+    cnpjs = list(dict.fromkeys(c.replace(".", "").replace("/", "").replace("-", "") for c in request.cnpjs))
+    if not registros and not cnpjs:
+        raise HTTPException(status_code=422, detail="Informe ao menos um registro ou CNPJ")
+    if len(registros) + len(cnpjs) > settings.operadora_batch_max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Máximo de {settings.operadora_batch_max_items} registros/CNPJs por requisição",
+        )
+
+    repo = CachedOperadoraRepository(db, version=session_version(db))
+    operadoras = await repo.get_many(registros=registros, cnpjs=cnpjs)
+    despesas = await DespesaRepository(db).get_latest_by_operadoras(
+        [op.registro_ans for op in operadoras], limit=DESPESAS_LIMIT
+    )
+
+    data = {}
+    for operadora in operadoras:
+        historico = despesas.get(operadora.registro_ans, [])
+        total_despesas, media_despesas = _totais(historico)
+        data[str(operadora.id)] = {
+            "operadora": project_rows([operadora], OperadoraResponse)[0],
+            "despesas": project_rows(historico, DespesaTrimestralResponse),
+            "total_despesas": total_despesas,
+            "media_despesas": media_despesas,
+        }
+    encontrados_registros = {op.registro_ans for op in operadoras}
+    encontrados_cnpjs = {op.cnpj for op in operadoras}
+    return fast_response({
+        "data": data,
+        "nao_encontrados": {
+            "registros": [r for r in registros if r not in encontrados_registros],
+            "cnpjs": [c for c in cnpjs if c not in encontrados_cnpjs],
+        },
+    })
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from infra.database import ReadSessionLocal
+from infra.repositories import DespesaRepository
+from api.routes import analytics, dashboard
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupProgress:
+    status: str = "idle"
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    duration_seconds: float | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": self.duration_seconds,
+        }
+
+
+async def load_ufs() -> list[str]:
+    async with ReadSessionLocal() as session:
+        rows = await DespesaRepository(session).get_total_by_uf()
+    return [row.uf for row in rows if row.uf]
+
+
+def default_jobs(ufs: list[str]) -> list[Callable[[], Awaitable]]:
+    """
+    Consultas pré-calculadas: as mesmas (e com os mesmos parâmetros) que o
+    dashboard do frontend faz, para "todas" as UFs e para cada UF. As
+    respostas compostas de /api/dashboard vêm por último, quando as partes
+    já estão no cache e só resta juntá-las.
+    """
+    jobs: list[Callable[[], Awaitable]] = [lambda: analytics.despesas_por_uf_body(limit=27)]
+    for uf in [None, *ufs]:
+        jobs.append(lambda uf=uf: analytics.estatisticas_body(uf))
+        jobs.append(lambda uf=uf: analytics.crescimento_body(limit=5, uf=uf))
+        jobs.append(lambda uf=uf: analytics.acima_media_body(min_trimestres=2, uf=uf))
+    for uf in [None, *ufs]:
+        jobs.append(lambda uf=uf: dashboard.dashboard_body(uf))
+    return jobs
+
+
+class CacheWarmer:
+    """
+    Preenche o cache das rotas de estatísticas em segundo plano após o deploy,
+    com concorrência limitada para não saturar o banco. Não bloqueia a
+    inicialização: a API já atende enquanto o aquecimento roda.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        ufs_loader: Callable[[], Awaitable[list[str]]] = load_ufs,
+        jobs_builder: Callable[[list[str]], list[Callable[[], Awaitable]]] = default_jobs,
+    ):
+        self._concurrency = max(1, concurrency)
+        self._ufs_loader = ufs_loader
+        self._jobs_builder = jobs_builder
+        self._task: asyncio.Task | None = None
+        self.progress = WarmupProgress()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self) -> WarmupProgress:
+        self.progress = WarmupProgress(status="running", started_at=datetime.utcnow())
+        started = time.perf_counter()
+        try:
+            jobs = self._jobs_builder(await self._ufs_loader())
+            self.progress.total = len(jobs)
+            semaphore = asyncio.Semaphore(self._concurrency)
+
+            async def run_job(job: Callable[[], Awaitable]) -> None:
+                async with semaphore:
+                    try:
+                        await job()
+                    except Exception as e:
+                        self.progress.failed += 1
+                        logger.warning(f"Cache warm-up job failed: {e}")
+                    finally:
+                        self.progress.done += 1
+
+            await asyncio.gather(*(run_job(job) for job in jobs))
+            self.progress.status = "completed" if not self.progress.failed else "completed_with_errors"
+        except asyncio.CancelledError:
+            self.progress.status = "cancelled"
+            raise
+        except Exception as e:
+            self.progress.status = "failed"
+            logger.error(f"Cache warm-up failed: {e}")
+        finally:
+            self.progress.finished_at = datetime.utcnow()
+            self.progress.duration_seconds = round(time.perf_counter() - started, 3)
+            logger.info(
+                f"Cache warm-up {self.progress.status}: "
+                f"{self.progress.done}/{self.progress.total} in {self.progress.duration_seconds}s"
+            )
+        return self.progress
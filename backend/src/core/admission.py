@@ -0,0 +1,129 @@
+"""
+Controle de admissão para operações caras (consultas analíticas, exportações).
+
+Cada limitador tem um número máximo de execuções simultâneas e uma fila de
+espera limitada. Com a fila cheia, ou depois de esperar demais, a operação é
+recusada com AdmissionRejected, que a API converte em 503 + Retry-After:
+melhor recusar rápido do que empilhar consultas no MySQL e atrasar também as
+rotas baratas.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from core.config import settings
+from core.metrics import registry
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+admission_in_flight = registry.gauge(
+    "admission_in_flight", "Operações em execução por limitador", ("limiter",)
+)
+admission_queued = registry.gauge(
+    "admission_queued", "Operações aguardando vaga por limitador", ("limiter",)
+)
+admission_wait = registry.histogram(
+    "admission_queue_wait_seconds", "Tempo de espera na fila de admissão", ("limiter",), WAIT_BUCKETS
+)
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Operações recusadas (fila cheia ou espera esgotada)", ("limiter", "reason")
+)
+
+
+class AdmissionRejected(Exception):
+    """Operação recusada pelo controle de admissão."""
+
+    def __init__(self, limiter: str, reason: str, retry_after: int):
+        super().__init__(f"{limiter}: {reason}")
+        self.limiter = limiter
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Semáforo com fila de espera limitada e tempo máximo de espera."""
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_size: int,
+        timeout: float | None = None,
+        retry_after: int | None = None,
+    ):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.timeout = settings.admission_queue_timeout if timeout is None else timeout
+        self.retry_after = settings.admission_retry_after if retry_after is None else retry_after
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._active = 0
+        self._waiting = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        admission_rejected.inc(limiter=self.name, reason=reason)
+        return AdmissionRejected(self.name, reason, self.retry_after)
+
+    async def _acquire(self) -> None:
+        if self._active < self.concurrency and not self._waiting:
+            await self._semaphore.acquire()
+            admission_wait.observe(0.0, limiter=self.name)
+            return
+        if self._waiting >= self.queue_size:
+            raise self._reject("queue_full")
+        self._waiting += 1
+        admission_queued.inc(limiter=self.name)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("timeout") from None
+        finally:
+            self._waiting -= 1
+            admission_queued.dec(limiter=self.name)
+            admission_wait.observe(time.perf_counter() - started, limiter=self.name)
+
+    async def acquire(self) -> None:
+        """Ocupa uma vaga (ou levanta AdmissionRejected); libere com release()."""
+        await self._acquire()
+        self._active += 1
+        admission_in_flight.inc(limiter=self.name)
+
+    def release(self) -> None:
+        self._active -= 1
+        admission_in_flight.dec(limiter=self.name)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_controllers: dict[str, AdmissionController] = {}
+
+
+def limiter(name: str) -> AdmissionController:
+    """
+    Limitador compartilhado pelo nome. O tamanho vem de ADMISSION_LIMITS
+    (nome -> [simultâneas, fila]) ou dos valores padrão.
+    """
+    controller = _controllers.get(name)
+    if controller is None:
+        concurrency, queue_size = settings.admission_limits.get(
+            name, (settings.admission_concurrency, settings.admission_queue_size)
+        )
+        controller = _controllers[name] = AdmissionController(name, concurrency, queue_size)
+    return controller
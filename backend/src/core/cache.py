@@ -1,55 +1,486 @@
-from datetime import datetime, timedelta
-from typing import TypeVar, Generic, Callable, Awaitable
-from dataclasses import dataclass
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from typing import TypeVar, Generic, Callable, Awaitable, Any
+from dataclasses import dataclass, field
+
+from core.config import settings
+from core.metrics import MetricFamily, registry
+from core.redis_cache import RedisCache
 
 T = TypeVar('T')
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class CacheEntry(Generic[T]):
     value: T
-    expires_at: datetime
+    expires_at: float
+    size: int = 0
+    stale_at: float | None = None
+
+    def is_stale(self, now: float) -> bool:
+        return self.stale_at is not None and now >= self.stale_at
+
+
+def namespace_of(key: str) -> str:
+    """Namespace de uma chave no formato "<namespace>:...", usado nas métricas."""
+    return key.split(":", 1)[0]
+
+
+@dataclass
+class CacheStats:
+    """Contadores de uso do cache para um namespace (ou o total)."""
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    l2_hits: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+    factory_calls: int = 0
+    factory_errors: int = 0
+    factory_seconds_total: float = 0.0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    refresh_seconds_total: float = 0.0
+    last_refresh_error: str | None = field(default=None)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def merge(self, other: "CacheStats") -> None:
+        for name in COUNTER_FIELDS + GAUGE_FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.last_refresh_error = other.last_refresh_error or self.last_refresh_error
+
+    def as_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in COUNTER_FIELDS + GAUGE_FIELDS}
+        data["factory_seconds_total"] = round(self.factory_seconds_total, 6)
+        data["refresh_seconds_total"] = round(self.refresh_seconds_total, 6)
+        data["hit_ratio"] = round(self.hit_ratio, 4)
+        data["last_refresh_error"] = self.last_refresh_error
+        return data
+
+
+COUNTER_FIELDS = (
+    "hits", "stale_hits", "misses", "l2_hits", "evictions", "expirations",
+    "factory_calls", "factory_errors", "factory_seconds_total",
+    "refreshes", "refresh_failures", "refresh_seconds_total",
+)
+GAUGE_FIELDS = ("entries", "bytes")
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estimativa aproximada (em bytes) da memória ocupada por um valor.
+    Percorre containers e models Pydantic até uma profundidade limitada.
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 6 or isinstance(value, (str, bytes, bytearray, int, float, bool)):
+        return size
+    if isinstance(value, dict):
+        return size + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item, _depth + 1) for item in value)
+    if hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), _depth + 1)
+    return size
 
 
 class SimpleCache:
-    def __init__(self, default_ttl: int = 300):
-        self._cache: dict[str, CacheEntry] = {}
+    """
+    Cache em memória com TTL e despejo LRU.
+
+    Limita o número de entradas e o total aproximado de bytes; entradas
+    expiradas são removidas na leitura e em varreduras periódicas.
+    Usa relógio monotônico para não ser afetado por ajustes no relógio do sistema.
+
+    Opcionalmente recebe uma camada L2 (RedisCache) compartilhada entre workers:
+    get_or_set consulta o L2 antes de executar a factory e publica nele os
+    valores calculados. get/set/delete/clear operam apenas no L1.
+    """
+
+    def __init__(
+        self,
+        default_ttl: int = 300,
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        l2: RedisCache | None = None,
+    ):
+        self._cache: OrderedDict[str, CacheEntry] = OrderedDict()
         self._default_ttl = default_ttl
-    
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sweep_interval = sweep_interval
+        self._clock = clock
+        self._bytes = 0
+        self._next_sweep = clock() + sweep_interval
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()
+        self._stats: dict[str, CacheStats] = {}
+        self._l2 = l2
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def l2(self) -> RedisCache | None:
+        return self._l2
+
+    @property
+    def stats(self) -> CacheStats:
+        """Contadores somados de todos os namespaces."""
+        total = CacheStats()
+        for ns_stats in self._stats.values():
+            total.merge(ns_stats)
+        return total
+
+    def namespace_stats(self) -> dict[str, CacheStats]:
+        return dict(sorted(self._stats.items()))
+
+    def metric_families(self) -> list[MetricFamily]:
+        """Contadores por namespace no formato do Prometheus."""
+        families = []
+        for name in COUNTER_FIELDS:
+            metric = name if name.endswith("_total") else f"{name}_total"
+            family = MetricFamily(f"cache_{metric}", "counter", f"Cache {name.replace('_', ' ')} por namespace")
+            for namespace, stats in self.namespace_stats().items():
+                family.add(getattr(stats, name), {"namespace": namespace})
+            families.append(family)
+        for name in GAUGE_FIELDS:
+            family = MetricFamily(f"cache_{name}", "gauge", f"Cache {name} atuais por namespace")
+            for namespace, stats in self.namespace_stats().items():
+                family.add(getattr(stats, name), {"namespace": namespace})
+            families.append(family)
+        return families
+
+    def _ns(self, key: str) -> CacheStats:
+        namespace = namespace_of(key)
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = CacheStats()
+        return stats
+
     def get(self, key: str) -> T | None:
+        entry = self._lookup(key, self._clock())
+        return entry.value if entry is not None else None
+
+    def _lookup(self, key: str, now: float) -> CacheEntry | None:
+        self._maybe_sweep(now)
+        stats = self._ns(key)
         entry = self._cache.get(key)
         if entry is None:
+            stats.misses += 1
             return None
-        if datetime.utcnow() > entry.expires_at:
-            del self._cache[key]
+        if now >= entry.expires_at:
+            self._remove(key)
+            stats.expirations += 1
+            stats.misses += 1
             return None
-        return entry.value
-    
-    def set(self, key: str, value: T, ttl: int | None = None) -> None:
+        self._cache.move_to_end(key)
+        stats.hits += 1
+        if entry.is_stale(now):
+            stats.stale_hits += 1
+        return entry
+
+    def set(
+        self,
+        key: str,
+        value: T,
+        ttl: int | None = None,
+        soft_ttl: int | None = None
+    ) -> None:
+        """
+        Armazena um valor. Com soft_ttl, a entrada fica "velha" após soft_ttl
+        segundos mas continua servível (via get_or_set) até o TTL completo.
+        """
         ttl = ttl or self._default_ttl
+        self._store(key, value, ttl, soft_ttl if soft_ttl and soft_ttl < ttl else None)
+
+    def _store(self, key: str, value: T, ttl: float, stale_in: float | None) -> None:
+        now = self._clock()
+        self._maybe_sweep(now)
+        self._remove(key)
+
+        size = estimate_size(value)
+        if size > self._max_bytes:
+            # Valor maior que o orçamento inteiro: não vale a pena despejar tudo por ele
+            return
+
         self._cache[key] = CacheEntry(
             value=value,
-            expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+            expires_at=now + ttl,
+            size=size,
+            stale_at=now + stale_in if stale_in is not None else None,
         )
-    
+        self._bytes += size
+        stats = self._ns(key)
+        stats.entries += 1
+        stats.bytes += size
+        self._evict()
+
     def delete(self, key: str) -> None:
-        self._cache.pop(key, None)
-    
+        self._remove(key)
+
     def clear(self) -> None:
         self._cache.clear()
-    
+        self._bytes = 0
+        for stats in self._stats.values():
+            stats.entries = 0
+            stats.bytes = 0
+
+    def purge_prefix(self, prefix: str) -> int:
+        """Remove do L1 as chaves que começam com prefix. Retorna quantas foram removidas."""
+        keys = [key for key in self._cache if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    async def purge(self, prefix: str = "") -> int:
+        """Remove as chaves com o prefixo nas duas camadas (L1 e, se houver, L2)."""
+        removed = self.purge_prefix(prefix)
+        if self._l2 is not None:
+            await self._l2.delete_prefix(prefix)
+        return removed
+
+    def sweep(self) -> int:
+        """Remove todas as entradas expiradas. Retorna quantas foram removidas."""
+        now = self._clock()
+        expired = [key for key, entry in self._cache.items() if now >= entry.expires_at]
+        for key in expired:
+            self._remove(key)
+            self._ns(key).expirations += 1
+        self._next_sweep = now + self._sweep_interval
+        return len(expired)
+
+    def _maybe_sweep(self, now: float) -> None:
+        if now >= self._next_sweep:
+            self.sweep()
+
+    def _remove(self, key: str) -> CacheEntry | None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._forget(key, entry)
+        return entry
+
+    def _forget(self, key: str, entry: CacheEntry) -> None:
+        self._bytes -= entry.size
+        stats = self._ns(key)
+        stats.entries -= 1
+        stats.bytes -= entry.size
+
+    def _evict(self) -> None:
+        # OrderedDict mantém a entrada menos usada recentemente no início
+        while self._cache and (
+            len(self._cache) > self._max_entries or self._bytes > self._max_bytes
+        ):
+            key, entry = self._cache.popitem(last=False)
+            self._forget(key, entry)
+            self._ns(key).evictions += 1
+
     async def get_or_set(
-        self, 
-        key: str, 
-        factory: Callable[[], Awaitable[T]], 
-        ttl: int | None = None
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        ttl: int | None = None,
+        soft_ttl: int | None = None
     ) -> T:
-        cached = self.get(key)
-        if cached is not None:
-            return cached
-        value = await factory()
-        self.set(key, value, ttl)
-        return value
+        """
+        Retorna o valor em cache ou calcula via factory.
+
+        Chamadas concorrentes para a mesma chave compartilham um único cálculo
+        (single-flight): a primeira executa a factory e as demais aguardam o
+        mesmo resultado, inclusive exceções.
+
+        Com soft_ttl (stale-while-revalidate), uma entrada vencida pelo soft_ttl
+        é devolvida imediatamente e a factory roda em segundo plano para renová-la.
+        Nesse modo a factory não pode depender de recursos da requisição
+        (ex.: a sessão de banco injetada), pois pode terminar depois dela.
+        """
+        while True:
+            now = self._clock()
+            entry = self._lookup(key, now)
+            if entry is not None:
+                self._revalidate_if_stale(key, entry, factory, ttl, soft_ttl)
+                return entry.value
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                value = await self._compute(key, self._begin(key), factory, ttl, soft_ttl)
+                # O valor pode ter vindo velho do L2: nesse caso já agenda a renovação
+                entry = self._cache.get(key)
+                if entry is not None:
+                    self._revalidate_if_stale(key, entry, factory, ttl, soft_ttl)
+                return value
+
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Se quem calculava foi cancelado, tenta de novo; se fomos nós, propaga
+                if inflight.cancelled():
+                    continue
+                raise
+
+    def _begin(self, key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future
+
+    async def _compute(
+        self,
+        key: str,
+        future: asyncio.Future,
+        factory: Callable[[], Awaitable[T]],
+        ttl: int | None,
+        soft_ttl: int | None,
+        refresh: bool = False
+    ) -> T:
+        try:
+            value = await self._load_l2(key, accept_stale=not refresh)
+            if value is None:
+                value = await self._call_factory(key, factory)
+                self.set(key, value, ttl, soft_ttl)
+                if self._l2 is not None:
+                    await self._l2.set(key, value, ttl or self._default_ttl, soft_ttl)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Evita "Future exception was never retrieved" quando não há outros aguardando
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _call_factory(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        stats = self._ns(key)
+        started = self._clock()
+        try:
+            return await factory()
+        except Exception:
+            stats.factory_errors += 1
+            raise
+        finally:
+            stats.factory_calls += 1
+            stats.factory_seconds_total += self._clock() - started
+
+    async def _load_l2(self, key: str, accept_stale: bool) -> T | None:
+        """
+        Busca a chave no L2 e, se encontrada, copia para o L1 preservando os
+        prazos restantes. Numa revalidação, um valor velho no L2 não serve.
+        """
+        if self._l2 is None:
+            return None
+        entry = await self._l2.get(key)
+        if entry is None:
+            return None
+        wall_now = time.time()
+        stale_in = entry.stale_at - wall_now if entry.stale_at is not None else None
+        if not accept_stale and stale_in is not None and stale_in <= 0:
+            return None
+        self._store(key, entry.value, entry.expires_at - wall_now, stale_in)
+        self._ns(key).l2_hits += 1
+        return entry.value
+
+    def _revalidate_if_stale(
+        self,
+        key: str,
+        entry: CacheEntry,
+        factory: Callable[[], Awaitable[T]],
+        ttl: int | None,
+        soft_ttl: int | None
+    ) -> None:
+        if entry.is_stale(self._clock()) and key not in self._inflight:
+            self._revalidate(key, factory, ttl, soft_ttl)
+
+    def _revalidate(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        ttl: int | None,
+        soft_ttl: int | None
+    ) -> None:
+        # Registra o cálculo antes de criar a task para que outras requisições não disparem outro
+        future = self._begin(key)
+        task = asyncio.create_task(self._run_refresh(key, future, factory, ttl, soft_ttl))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _run_refresh(
+        self,
+        key: str,
+        future: asyncio.Future,
+        factory: Callable[[], Awaitable[T]],
+        ttl: int | None,
+        soft_ttl: int | None
+    ) -> None:
+        stats = self._ns(key)
+        started = self._clock()
+        try:
+            await self._compute(key, future, factory, ttl, soft_ttl, refresh=True)
+            stats.refreshes += 1
+        except Exception as exc:
+            # A entrada velha continua servível até o TTL completo
+            stats.refresh_failures += 1
+            stats.last_refresh_error = f"{key}: {exc!r}"
+            logger.warning(f"Cache refresh failed for {key}: {exc}")
+        finally:
+            stats.refresh_seconds_total += self._clock() - started
+
+
+cache = SimpleCache(
+    default_ttl=settings.cache_ttl,
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    sweep_interval=settings.cache_sweep_interval,
+    l2=RedisCache(settings.redis_url) if settings.redis_url else None,
+)
+
+# Buscas de operadora por registro/CNPJ: chaves arbitrárias vindas do usuário
+# ficam num LRU separado, sem L2, e não competem com os resultados analíticos
+operadora_cache = SimpleCache(
+    default_ttl=settings.operadora_cache_ttl,
+    max_entries=settings.operadora_cache_max_entries,
+    max_bytes=settings.operadora_cache_max_bytes,
+    sweep_interval=settings.cache_sweep_interval,
+)
+
+
+def cache_metric_families() -> list[MetricFamily]:
+    """Métricas dos dois caches juntas: os namespaces não se repetem entre eles."""
+    families = cache.metric_families()
+    for family, other in zip(families, operadora_cache.metric_families()):
+        family.samples.extend(other.samples)
+    return families
 
 
-cache = SimpleCache(default_ttl=300)
+registry.add_collector(cache_metric_families)
@@ -23,11 +23,95 @@ class Settings(BaseSettings):
     mysql_database: str = "healthcare_saas"
     mysql_ssl: bool = False  # True para PlanetScale
     
+    # Pool de conexões: cada conexão nova com TiDB/PlanetScale custa TCP + TLS +
+    # autenticação. pool_recycle deve ficar abaixo do timeout de ociosidade do
+    # servidor; com isso garantido, desligar o pre-ping poupa uma ida e volta
+    # por checkout. LIFO reaproveita as conexões mais recentes e deixa as
+    # excedentes ociosas até serem recicladas. db_pool_size/db_max_overflow
+    # valem para o pool de escrita do primário (health check, versão dos dados,
+    # get_db); as leituras usam os pools db_read_* (um no primário e um por
+    # réplica). A soma dos dois no primário deve caber no limite de conexões.
+    db_pool_size: int = 2
+    db_max_overflow: int = 3
+    db_read_pool_size: int = 8
+    db_read_max_overflow: int = 7
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 300
+    db_pool_pre_ping: bool = True
+    db_pool_use_lifo: bool = True
+    # Conexões abertas na inicialização, antes da primeira requisição
+    db_pool_warmup: int = 4
+    # Réplicas de leitura (URLs assíncronas, ex.: mysql+asyncmy://...): rotas de
+    # leitura e analytics usam réplicas em rodízio; importação e DDL, o primário.
+    # Réplica com falha de conexão sai do rodízio por replica_ejection_seconds.
+    mysql_replica_urls: list[str] = []
+    replica_ejection_seconds: float = 30.0
+    # Conexões de leitura (autocommit, sem COMMIT/ROLLBACK por requisição). No
+    # MySQL também READ ONLY e tempo máximo por SELECT, em ms (0 = sem limite);
+    # o tempo precisa cobrir as consultas mais longas dos jobs em /api/jobs
+    db_read_only_transactions: bool = True
+    db_read_statement_timeout_ms: int = 120000
+    # As exportações ignoram esse tempo (o envio das linhas conta no limite do
+    # MySQL) e usam o seu próprio, por consulta (0 = sem limite)
+    export_statement_timeout_ms: int = 0
+    
     frontend_url: str = "http://localhost:5173"
     api_url: str = "http://localhost:8000"
     
     redis_url: Optional[str] = None
+    admin_token: Optional[str] = None
     cache_ttl: int = 300
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_sweep_interval: float = 60.0
+    # As chaves incluem a versão dos dados, então os TTLs podem ser longos
+    analytics_cache_ttl: int = 6 * 3600
+    analytics_cache_soft_ttl: int = 3600
+    data_version_poll_interval: float = 30.0
+    operadora_cache_ttl: int = 6 * 3600
+    operadora_negative_cache_ttl: int = 60
+    # Cache próprio das buscas de operadora (chaves vindas do usuário), para que
+    # não despejem do cache principal os resultados analíticos pré-calculados
+    operadora_cache_max_entries: int = 4096
+    operadora_cache_max_bytes: int = 8 * 1024 * 1024
+    operadora_batch_max_items: int = 500
+    cache_warmup_enabled: bool = True
+    cache_warmup_concurrency: int = 4
+    # Cache HTTP (navegador / edge) das rotas de /api/
+    http_cache_max_age: int = 60
+    http_cache_stale_while_revalidate: int = 600
+    compression_min_size: int = 1024
+    compression_level: int = 6
+    compression_brotli_quality: int = 4
+    # Corpos guardados no cache são comprimidos uma vez por versão dos dados:
+    # vale usar níveis mais altos
+    compression_cached_level: int = 9
+    compression_cached_brotli_quality: int = 9
+    compression_excluded_paths: list[str] = []
+    # Linhas lidas do cursor (e enviadas) por bloco nas exportações
+    export_batch_size: int = 1000
+    # Arrow/Parquet: linhas por RecordBatch (row group) e diretório dos arquivos
+    # gerados por versão dos dados (vazio = diretório temporário do sistema)
+    export_arrow_batch_size: int = 65536
+    export_cache_dir: str = ""
+    # Arquivos de versões anteriores só são removidos após esse tempo sem
+    # modificação (podem estar sendo enviados ou servidos por outro worker)
+    export_cache_grace_seconds: float = 600
+    # Controle de admissão das consultas caras: execuções simultâneas e fila
+    # por limitador (namespace da rota); acima disso, 503 + Retry-After
+    admission_concurrency: int = 4
+    admission_queue_size: int = 16
+    admission_queue_timeout: float = 10.0
+    admission_retry_after: int = 5
+    admission_limits: dict[str, tuple[int, int]] = {
+        "acima_media": (2, 8),
+        "export": (2, 4),
+    }
+    # Jobs em segundo plano (/api/jobs): workers, fila e retenção dos resultados
+    jobs_workers: int = 2
+    jobs_queue_size: int = 32
+    jobs_retention: int = 3600
+    jobs_admission_retries: int = 3
     
     @property
     def database_url(self) -> str:
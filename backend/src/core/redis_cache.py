@@ -0,0 +1,178 @@
+import logging
+import re
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_HEADER_SIZE = struct.Struct(">I")
+
+
+class L2Value(Protocol):
+    """
+    Tipo que pode ir para o L2: metadados JSON mais blocos de bytes já
+    codificados, reconstruído a partir deles sem executar código.
+    """
+
+    def l2_dump(self) -> tuple[dict[str, Any], list[bytes]]: ...
+
+    @classmethod
+    def l2_load(cls, meta: dict[str, Any], blobs: list[bytes]) -> "L2Value": ...
+
+
+# Tipos aceitos no L2, por nome; qualquer outro nome lido do Redis é descartado
+_l2_types: dict[str, type[L2Value]] = {}
+
+
+def register_l2_type(name: str, cls: type[L2Value]) -> None:
+    _l2_types[name] = cls
+
+
+def _type_name(value: Any) -> str | None:
+    for name, cls in _l2_types.items():
+        if type(value) is cls:
+            return name
+    return None
+
+
+@dataclass
+class L2Entry:
+    value: Any
+    expires_at: float
+    stale_at: float | None = None
+
+
+class RedisCache:
+    """
+    Camada L2 do cache, compartilhada entre workers via Redis.
+
+    Só valores de tipos registrados (register_l2_type) vão para o Redis: um
+    cabeçalho orjson com o tipo, os metadados e os prazos de expiração em
+    tempo de parede (o relógio monotônico não é comparável entre processos),
+    seguido dos bytes já codificados. Nada lido do Redis é desserializado
+    como objeto arbitrário; os demais valores ficam só no L1.
+    Falhas de conexão nunca derrubam a requisição: são tratadas como miss
+    e o Redis fica desabilitado por alguns segundos antes de nova tentativa.
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        prefix: str = "hcsaas:",
+        client: Any = None,
+        retry_after: float = 30.0,
+    ):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self._client = client
+        self._prefix = prefix
+        self._retry_after = retry_after
+        self._disabled_until = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _fail(self, action: str, exc: Exception) -> None:
+        self._disabled_until = time.monotonic() + self._retry_after
+        logger.warning(f"Redis {action} failed, using L1 only for {self._retry_after:.0f}s: {exc}")
+
+    async def get(self, key: str) -> L2Entry | None:
+        if not self.available:
+            return None
+        try:
+            raw = await self._client.get(self._key(key))
+        except Exception as e:
+            self._fail("get", e)
+            return None
+        if raw is None:
+            return None
+        try:
+            entry = self._decode(raw)
+        except Exception as e:
+            logger.warning(f"Discarding undecodable Redis entry {key}: {e}")
+            return None
+        if time.time() >= entry.expires_at:
+            return None
+        return entry
+
+    async def set(self, key: str, value: Any, ttl: int, soft_ttl: int | None = None) -> None:
+        if not self.available:
+            return
+        type_name = _type_name(value)
+        if type_name is None:
+            return
+        now = time.time()
+        entry = L2Entry(
+            value=value,
+            expires_at=now + ttl,
+            stale_at=now + soft_ttl if soft_ttl and soft_ttl < ttl else None,
+        )
+        try:
+            await self._client.set(self._key(key), self._encode(type_name, entry), ex=ttl)
+        except Exception as e:
+            self._fail("set", e)
+
+    @staticmethod
+    def _encode(type_name: str, entry: L2Entry) -> bytes:
+        meta, blobs = entry.value.l2_dump()
+        header = orjson.dumps({
+            "type": type_name,
+            "expires_at": entry.expires_at,
+            "stale_at": entry.stale_at,
+            "meta": meta,
+            "sizes": [len(blob) for blob in blobs],
+        })
+        return b"".join((_HEADER_SIZE.pack(len(header)), header, *blobs))
+
+    @staticmethod
+    def _decode(raw: bytes) -> L2Entry:
+        (header_size,) = _HEADER_SIZE.unpack_from(raw)
+        offset = _HEADER_SIZE.size + header_size
+        header = orjson.loads(raw[_HEADER_SIZE.size:offset])
+        cls = _l2_types.get(header["type"])
+        if cls is None:
+            raise ValueError(f"unknown L2 type {header['type']!r}")
+        blobs = []
+        for size in header["sizes"]:
+            blobs.append(raw[offset:offset + size])
+            offset += size
+        if offset != len(raw):
+            raise ValueError("truncated or oversized L2 entry")
+        return L2Entry(
+            value=cls.l2_load(header["meta"], blobs),
+            expires_at=header["expires_at"],
+            stale_at=header["stale_at"],
+        )
+
+    async def delete(self, key: str) -> None:
+        if not self.available:
+            return
+        try:
+            await self._client.delete(self._key(key))
+        except Exception as e:
+            self._fail("delete", e)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        """Remove as chaves que começam com prefix, usando SCAN para não bloquear o Redis."""
+        if not self.available:
+            return
+        try:
+            pattern = re.sub(r"([*?\[\]\\])", r"\\\1", f"{self._prefix}{prefix}")
+            async for redis_key in self._client.scan_iter(match=f"{pattern}*"):
+                await self._client.delete(redis_key)
+        except Exception as e:
+            self._fail("delete_prefix", e)
+
+    async def clear(self) -> None:
+        """Remove apenas as chaves deste prefixo (não executa FLUSHDB)."""
+        await self.delete_prefix("")
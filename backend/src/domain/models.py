@@ -127,4 +127,13 @@ class ImportLog(Base):
     started_at = Column(DateTime, server_default=func.now())
     finished_at = Column(DateTime)
     status = Column(SQLEnum(ImportStatus), default=ImportStatus.RUNNING)
-    error_summary = Column(Text)
\ No newline at end of file
+    error_summary = Column(Text)
+
+
+class DataVersion(Base):
+    """Linha única com a versão dos dados, incrementada a cada importação."""
+    __tablename__ = "data_version"
+    
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from decimal import Decimal
 
@@ -122,6 +122,28 @@ class OperadoraListResponse(BaseModel):
     has_prev: bool
 
 
+class OperadoraDetalheResponse(BaseModel):
+    operadora: OperadoraResponse
+    despesas: List[DespesaTrimestralResponse]
+    total_despesas: float
+    media_despesas: float
+
+
+class OperadoraBatchRequest(BaseModel):
+    registros: List[str] = Field(default_factory=list)
+    cnpjs: List[str] = Field(default_factory=list)
+
+
+class OperadoraBatchNaoEncontrados(BaseModel):
+    registros: List[str]
+    cnpjs: List[str]
+
+
+class OperadoraBatchResponse(BaseModel):
+    data: Dict[int, OperadoraDetalheResponse]
+    nao_encontrados: OperadoraBatchNaoEncontrados
+
+
 class EstatisticasResponse(BaseModel):
     total_operadoras: int
     total_despesas: float
@@ -133,6 +155,54 @@ class EstatisticasResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class OperadorasAcimaMediaResponse(BaseModel):
+    total_operadoras: int
+    operadoras: List[OperadoraAcimaMedia]
+
+
+class DashboardResponse(BaseModel):
+    estatisticas: EstatisticasResponse
+    crescimento: List[TopOperadoraCrescimento]
+    despesas_por_uf: List[DespesaPorUF]
+    acima_media: OperadorasAcimaMediaResponse
+
+
+class EstatisticasJobParams(BaseModel):
+    uf: Optional[str] = None
+
+
+class CrescimentoJobParams(BaseModel):
+    # Acima do limite da rota síncrona (20), que cabe no timeout do proxy
+    limit: int = Field(5, ge=1, le=1000)
+    uf: Optional[str] = None
+
+
+class DespesasPorUFJobParams(BaseModel):
+    limit: int = Field(27, ge=1, le=27)
+
+
+class AcimaMediaJobParams(BaseModel):
+    min_trimestres: int = Field(2, ge=1, le=4)
+    uf: Optional[str] = None
+
+
+class JobRequest(BaseModel):
+    kind: str
+    params: dict = Field(default_factory=dict)
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    params: dict
+    status: str
+    data_version: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
 class OperadoraFilter(BaseModel):
     search: Optional[str] = None
     uf: Optional[str] = None
@@ -27,48 +27,78 @@ class AnalyticsService:
             return "", params
 
     async def get_estatisticas_agregadas(self, uf: Optional[str] = None) -> EstatisticasResponse:
+        """
+        Totais, top UFs e top operadoras em uma única consulta e uma única
+        leitura de despesas_trimestrais: a CTE agrega por (UF, operadora) e as
+        três partes são derivadas desse resultado (poucos milhares de linhas),
+        em vez de três varreduras completas da tabela.
+        """
         uf_filter, uf_params = self._get_uf_filter(uf, 'uf')
-        uf_filter_operadoras, uf_params_operadoras = self._get_uf_filter(uf, 'uf')
+        uf_filter_operadoras = uf_filter.replace('AND', 'WHERE', 1) if uf_filter else ''
         query = text(f"""
+            WITH agregado AS (
+                SELECT 
+                    razao_social,
+                    cnpj,
+                    uf,
+                    SUM(valor_despesas) AS total,
+                    SUM(CASE WHEN valor_despesas > 0 THEN valor_despesas ELSE 0 END) AS total_positivo,
+                    COUNT(CASE WHEN valor_despesas > 0 THEN 1 END) AS qtd_positivo
+                FROM despesas_trimestrais
+                WHERE 1=1 {uf_filter}
+                GROUP BY razao_social, cnpj, uf
+            )
             SELECT 
-                (SELECT COUNT(DISTINCT registro_ans) FROM operadoras {uf_filter_operadoras.replace('AND', 'WHERE', 1) if uf_filter_operadoras else ''}) AS total_operadoras,
-                (SELECT COALESCE(SUM(valor_despesas), 0) FROM despesas_trimestrais WHERE 1=1 {uf_filter}) AS total_despesas,
-                (SELECT COALESCE(AVG(valor_despesas), 0) FROM despesas_trimestrais WHERE valor_despesas > 0 {uf_filter}) AS media_geral
+                'totais' AS tipo, NULL AS uf, NULL AS razao_social, NULL AS cnpj,
+                COALESCE(SUM(total), 0) AS total,
+                SUM(total_positivo) AS total_positivo,
+                SUM(qtd_positivo) AS qtd_positivo,
+                (SELECT COUNT(DISTINCT registro_ans) FROM operadoras {uf_filter_operadoras}) AS total_operadoras
+            FROM agregado
+            UNION ALL
+            SELECT 'uf', uf, NULL, NULL, total, NULL, NULL, NULL FROM (
+                SELECT CASE WHEN uf IS NULL OR uf = '' THEN 'Sem UF*' ELSE uf END AS uf, SUM(total) AS total
+                FROM agregado
+                GROUP BY CASE WHEN uf IS NULL OR uf = '' THEN 'Sem UF*' ELSE uf END
+                ORDER BY total DESC
+                LIMIT 5
+            ) top_ufs
+            UNION ALL
+            SELECT 'operadora', NULL, razao_social, cnpj, total, NULL, NULL, NULL FROM (
+                SELECT razao_social, cnpj, SUM(total_positivo) AS total
+                FROM agregado
+                GROUP BY razao_social, cnpj
+                HAVING SUM(qtd_positivo) > 0
+                ORDER BY total DESC
+                LIMIT 5
+            ) top_operadoras
         """)
         result = await self.session.execute(query, uf_params)
-        row = result.fetchone()
-        
-        top_ufs_query = text(f"""
-            SELECT 
-                CASE WHEN uf IS NULL OR uf = '' THEN 'Sem UF*' ELSE uf END AS uf, 
-                SUM(valor_despesas) AS total
-            FROM despesas_trimestrais
-            WHERE 1=1 {uf_filter}
-            GROUP BY CASE WHEN uf IS NULL OR uf = '' THEN 'Sem UF*' ELSE uf END
-            ORDER BY total DESC
-            LIMIT 5
-        """)
-        top_ufs_result = await self.session.execute(top_ufs_query, uf_params)
-        top_ufs = [{"uf": r.uf, "total": float(r.total)} for r in top_ufs_result.fetchall()]
+        rows = result.fetchall()
         
-        top_operadoras_query = text(f"""
-            SELECT razao_social, cnpj, SUM(valor_despesas) AS total
-            FROM despesas_trimestrais
-            WHERE valor_despesas > 0 {uf_filter}
-            GROUP BY razao_social, cnpj
-            ORDER BY total DESC
-            LIMIT 5
-        """)
-        top_operadoras_result = await self.session.execute(top_operadoras_query, uf_params)
-        top_operadoras = [
-            {"razao_social": r.razao_social, "cnpj": r.cnpj, "total": float(r.total)} 
-            for r in top_operadoras_result.fetchall()
-        ]
+        totais = next((r for r in rows if r.tipo == "totais"), None)
+        # Média dos valores positivos (o antigo AVG ... WHERE valor_despesas > 0)
+        media_geral = (
+            float(totais.total_positivo) / int(totais.qtd_positivo)
+            if totais and totais.qtd_positivo else 0.0
+        )
+        # UNION ALL não garante a ordem das partes
+        top_ufs = sorted(
+            ({"uf": r.uf, "total": float(r.total)} for r in rows if r.tipo == "uf"),
+            key=lambda item: item["total"], reverse=True
+        )
+        top_operadoras = sorted(
+            (
+                {"razao_social": r.razao_social, "cnpj": r.cnpj, "total": float(r.total)}
+                for r in rows if r.tipo == "operadora"
+            ),
+            key=lambda item: item["total"], reverse=True
+        )
         
         return EstatisticasResponse(
-            total_operadoras=row.total_operadoras or 0,
-            total_despesas=float(row.total_despesas or 0),
-            media_geral=float(row.media_geral or 0),
+            total_operadoras=(totais.total_operadoras if totais else 0) or 0,
+            total_despesas=float((totais.total if totais else 0) or 0),
+            media_geral=media_geral,
             top_ufs=top_ufs,
             top_operadoras=top_operadoras,
             updated_at=datetime.utcnow()
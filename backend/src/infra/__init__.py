@@ -1,10 +1,12 @@
-from infra.database import Base, get_db, AsyncSessionLocal, SessionLocal
+from infra.database import Base, get_db, get_read_db, AsyncSessionLocal, ReadSessionLocal, SessionLocal
 from infra.repositories import OperadoraRepository, DespesaRepository, MetricaRepository
 
 __all__ = [
     "Base",
     "get_db",
+    "get_read_db",
     "AsyncSessionLocal",
+    "ReadSessionLocal",
     "SessionLocal",
     "OperadoraRepository",
     "DespesaRepository",
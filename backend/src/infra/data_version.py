@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from domain.models import DataVersion
+from infra.database import AsyncSessionLocal, ReadSessionLocal
+from infra.replicas import RoutingSession, db_replica_lag_fallbacks
+
+logger = logging.getLogger(__name__)
+
+
+async def stored_version(session: AsyncSession) -> int:
+    """Versão dos dados gravada no banco da sessão (0 se nunca houve importação)."""
+    result = await session.execute(select(DataVersion.version).where(DataVersion.id == 1))
+    return result.scalar_one_or_none() or 0
+
+
+class DataVersionTracker:
+    """
+    Acompanha a versão dos dados gravada pelo importador na tabela data_version.
+
+    A versão entra nas chaves de cache e nos validadores HTTP: quando uma
+    importação termina, as chaves mudam e os resultados antigos deixam de ser
+    servidos. O banco é consultado no máximo uma vez a cada poll_interval;
+    em caso de erro, mantém a última versão conhecida.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        poll_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._session_factory = session_factory
+        self._poll_interval = poll_interval
+        self._clock = clock
+        self._version = 0
+        self._next_check = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def cached(self) -> int:
+        """Última versão conhecida, sem consultar o banco."""
+        return self._version
+
+    async def current(self) -> int:
+        if self._clock() < self._next_check:
+            return self._version
+        async with self._lock:
+            # Outra corrotina pode ter atualizado enquanto aguardávamos o lock
+            if self._clock() >= self._next_check:
+                await self.refresh()
+        return self._version
+
+    async def refresh(self) -> int:
+        try:
+            async with self._session_factory() as session:
+                version = await stored_version(session)
+        except Exception as e:
+            logger.warning(f"Could not read data version, keeping v{self._version}: {e}")
+        else:
+            if version != self._version:
+                logger.info(f"Data version changed: v{self._version} -> v{version}")
+                self._version = version
+        self._next_check = self._clock() + self._poll_interval
+        return self._version
+
+
+@asynccontextmanager
+async def read_session(min_version: int = 0) -> AsyncIterator[AsyncSession]:
+    """
+    Sessão de leitura para resultados guardados com a versão min_version na
+    chave (cache, arquivos de exportação). Se a réplica escolhida ainda não
+    recebeu essa versão, a leitura vai para o primário: do contrário, dados de
+    antes da importação ficariam guardados sob a chave nova até o TTL.
+    A versão fica em session.info (ver session_version).
+    """
+    async with ReadSessionLocal() as session:
+        routed = session.sync_session
+        if (
+            min_version <= 0
+            or not isinstance(routed, RoutingSession)
+            or not routed.on_replica
+            or await stored_version(session) >= min_version
+        ):
+            session.info["data_version"] = min_version
+            yield session
+            return
+    logger.info(f"Read replica behind data version v{min_version}, reading from primary")
+    db_replica_lag_fallbacks.inc()
+    async with ReadSessionLocal(primary_reads=True) as session:
+        session.info["data_version"] = min_version
+        yield session
+
+
+async def read_version(min_version: int = 0) -> int:
+    """Versão dos dados que uma sessão de leitura vê (ao menos min_version)."""
+    async with read_session(min_version) as session:
+        return await stored_version(session)
+
+
+def session_version(session: AsyncSession) -> int:
+    """Versão mínima garantida por read_session para a sessão (0 se nenhuma)."""
+    return session.info.get("data_version", 0)
+
+
+# Lida no primário: é ela que invalida os caches, e uma réplica atrasada
+# manteria a versão antiga depois da importação
+data_version = DataVersionTracker(AsyncSessionLocal, settings.data_version_poll_interval)
+
+
+async def get_versioned_read_db() -> AsyncIterator[AsyncSession]:
+    """
+    get_read_db para rotas cujas respostas são guardadas com a versão dos
+    dados (cache de operadoras, ETag do HttpCacheMiddleware): a sessão vê ao
+    menos a versão atual, lida no primário.
+    """
+    async with read_session(await data_version.current()) as session:
+        yield session
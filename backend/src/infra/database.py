@@ -1,11 +1,21 @@
+import asyncio
+import logging
 import ssl
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from contextlib import AsyncExitStack
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import QueuePool, NullPool
 from typing import AsyncGenerator
 
 from core.config import settings
+from infra.instrumentation import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    instrument_engine,
+)
+from infra.replicas import ReplicaRouter, read_sessionmaker
+
+logger = logging.getLogger(__name__)
 
 
 # Configurar SSL para TiDB/PlanetScale
@@ -18,21 +28,103 @@ if settings.mysql_ssl:
 
 sync_engine = create_engine(
     settings.database_url,
-    poolclass=QueuePool,
+    poolclass=InstrumentedQueuePool,
     pool_size=5,
     max_overflow=10,
     pool_pre_ping=True,
-    pool_recycle=300,
+    pool_recycle=settings.db_pool_recycle,
     echo=False,
     connect_args=connect_args if settings.mysql_ssl else {},
 )
 
-async_engine = create_async_engine(
-    settings.async_database_url,
-    poolclass=NullPool,
-    echo=False,
-    future=True,
-    connect_args=connect_args if settings.mysql_ssl else {},
+
+def read_only_statements(dialect_name: str) -> list[str]:
+    """Comandos executados uma vez em cada conexão nova das engines de leitura."""
+    if dialect_name != "mysql":
+        return []
+    statements = []
+    if settings.db_read_only_transactions:
+        statements.append("SET SESSION TRANSACTION READ ONLY")
+    if settings.db_read_statement_timeout_ms > 0:
+        # Vale só para SELECT, que é tudo o que estas conexões executam
+        statements.append(f"SET SESSION max_execution_time = {settings.db_read_statement_timeout_ms}")
+    return statements
+
+
+# Maior valor aceito pelo MySQL: no hint, MAX_EXECUTION_TIME(0) não desliga o
+# limite, apenas volta ao max_execution_time da sessão
+MAX_EXECUTION_TIME_LIMIT = 4294967295
+
+
+def statement_timeout_hint(timeout_ms: int) -> str:
+    """
+    Hint de otimizador que substitui, só para um SELECT, o max_execution_time
+    das conexões de leitura. timeout_ms <= 0 significa sem limite.
+    """
+    return f"/*+ MAX_EXECUTION_TIME({timeout_ms if timeout_ms > 0 else MAX_EXECUTION_TIME_LIMIT}) */"
+
+
+def create_api_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """
+    Engine assíncrona da API. Com read_only, as conexões ficam em autocommit:
+    a sessão não envia COMMIT no fim e o pool não envia ROLLBACK ao recebê-la
+    de volta: duas idas e voltas a menos por requisição que com get_db.
+    """
+    # Pool de verdade para a API: sem ele, cada sessão abre (e fecha) uma
+    # conexão, pagando TCP + TLS + autenticação a cada requisição
+    if read_only:
+        options = {"isolation_level": "AUTOCOMMIT", "skip_autocommit_rollback": True}
+        pool_size, max_overflow = settings.db_read_pool_size, settings.db_read_max_overflow
+    else:
+        options = {}
+        pool_size, max_overflow = settings.db_pool_size, settings.db_max_overflow
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_use_lifo=settings.db_pool_use_lifo,
+        echo=False,
+        future=True,
+        connect_args=connect_args if settings.mysql_ssl else {},
+        **options,
+    )
+    statements = read_only_statements(engine.dialect.name) if read_only else []
+    if statements:
+        @event.listens_for(engine.sync_engine, "connect")
+        def configure_read_only(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except Exception as e:
+                        # TiDB/Vitess podem recusar: a conexão continua válida
+                        logger.warning(f"Read connection setup skipped ({statement}): {e}")
+            finally:
+                cursor.close()
+    return engine
+
+
+async_engine = create_api_engine(settings.async_database_url)
+# Leituras no primário (quando não há réplica disponível) usam um pool próprio
+read_engine = create_api_engine(settings.async_database_url, read_only=True)
+replica_engines = {
+    f"replica{i}": create_api_engine(url, read_only=True)
+    for i, url in enumerate(settings.mysql_replica_urls, start=1)
+}
+
+instrument_engine(sync_engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+instrument_engine(read_engine.sync_engine, "read")
+for name, engine in replica_engines.items():
+    instrument_engine(engine.sync_engine, name)
+
+replica_router = ReplicaRouter(
+    async_engine, replica_engines, settings.replica_ejection_seconds, fallback=read_engine
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -43,6 +135,10 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Sessões só de leitura (rotas GET, analytics, exportações): réplicas em
+# rodízio, ou a engine de leitura do primário quando não há réplica disponível
+ReadSessionLocal = read_sessionmaker(replica_router)
+
 SessionLocal = sessionmaker(
     bind=sync_engine,
     autocommit=False,
@@ -65,10 +161,49 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Sessão para rotas que só leem: réplica ou conexão de leitura do primário,
+    em autocommit. Nunca faz commit; cada consulta vê os dados mais recentes,
+    sem um snapshot comum entre elas. Sem garantia de versão: rotas cujas
+    respostas são guardadas por versão usam get_versioned_read_db.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
 def create_tables():
     Base.metadata.create_all(bind=sync_engine)
 
 
 async def async_create_tables():
     async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def warm_up_pool(engine: AsyncEngine | None = None, connections: int | None = None) -> int:
+    """
+    Abre `connections` conexões em paralelo (por padrão db_pool_warmup, até o
+    tamanho do pool da engine) e as devolve ao pool, para que as primeiras
+    requisições não paguem o handshake. Retorna quantas abriram; falhas são
+    apenas registradas (o pool abre conexões sob demanda).
+    """
+    engine = engine or async_engine
+    if connections is None:
+        connections = min(settings.db_pool_warmup, engine.pool.size())
+    if connections <= 0:
+        return 0
+
+    async def open_connection(stack: AsyncExitStack) -> None:
+        conn = await stack.enter_async_context(engine.connect())
+        await conn.execute(text("SELECT 1"))
+
+    async with AsyncExitStack() as stack:
+        # Todas abertas ao mesmo tempo: devolvidas juntas, ficam ociosas no pool
+        results = await asyncio.gather(
+            *(open_connection(stack) for _ in range(connections)), return_exceptions=True
+        )
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        logger.warning(f"Pool warm-up: {len(errors)} of {connections} connections failed: {errors[0]}")
+    return connections - len(errors)
\ No newline at end of file
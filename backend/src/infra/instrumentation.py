@@ -0,0 +1,136 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from core.metrics import MetricFamily, current_timing, registry
+
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds",
+    "Duração das consultas SQL por engine e operação",
+    ("engine", "operation"),
+    QUERY_BUCKETS,
+)
+db_query_errors = registry.counter(
+    "db_query_errors_total", "Consultas SQL que falharam", ("engine", "operation")
+)
+db_connections_opened = registry.counter(
+    "db_pool_connections_opened_total", "Conexões abertas com o banco", ("engine",)
+)
+db_checked_out = registry.gauge(
+    "db_pool_checked_out", "Conexões em uso (retiradas do pool)", ("engine",)
+)
+db_checkout_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Tempo para obter uma conexão do pool (espera, conexão nova e pre-ping)",
+    ("engine",),
+    QUERY_BUCKETS,
+)
+db_checkout_timeouts = registry.counter(
+    "db_pool_checkout_timeouts_total", "Esperas por conexão que esgotaram o pool_timeout", ("engine",)
+)
+
+_engines: dict[str, Engine] = {}
+
+_START_KEY = "query_start_time"
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0] if statement.strip() else ""
+    return word.upper() or "UNKNOWN"
+
+
+def _engine_name(pool: Pool) -> str:
+    # Procurado a cada uso: dispose() troca o pool da engine por um novo
+    for name, engine in _engines.items():
+        if engine.pool is pool:
+            return name
+    return "unknown"
+
+
+class _CheckoutTimingMixin:
+    """Mede quanto cada checkout leva até entregar a conexão."""
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            db_checkout_timeouts.inc(engine=_engine_name(self))
+            raise
+        finally:
+            db_checkout_wait.observe(time.perf_counter() - started, engine=_engine_name(self))
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Registra eventos do SQLAlchemy para medir cada consulta (histograma por
+    operação e tempo acumulado da requisição, usado no Server-Timing) e o uso
+    do pool de conexões. Para engines assíncronas, passe engine.sync_engine.
+    """
+    if name in _engines:
+        return
+    _engines[name] = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info[_START_KEY].pop()
+        db_query_duration.observe(elapsed, engine=name, operation=_operation(statement))
+        timing = current_timing.get()
+        if timing is not None:
+            timing.db_seconds += elapsed
+            timing.db_queries += 1
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get(_START_KEY):
+            conn.info[_START_KEY].pop()
+        statement = exception_context.statement or ""
+        db_query_errors.inc(engine=name, operation=_operation(statement))
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        db_connections_opened.inc(engine=name)
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        db_checked_out.inc(engine=name)
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        db_checked_out.dec(engine=name)
+
+
+def pool_metric_families() -> list[MetricFamily]:
+    """Tamanho e ocupação dos pools com fila (QueuePool e derivados)."""
+    size = MetricFamily("db_pool_size", "gauge", "Tamanho configurado do pool")
+    idle = MetricFamily("db_pool_checked_in", "gauge", "Conexões ociosas no pool")
+    overflow = MetricFamily("db_pool_overflow", "gauge", "Conexões abertas além do tamanho do pool")
+    for name, engine in _engines.items():
+        pool = engine.pool
+        if not hasattr(pool, "checkedin"):
+            continue  # NullPool / StaticPool não mantêm conexões ociosas
+        labels = {"engine": name}
+        size.add(pool.size(), labels)
+        idle.add(pool.checkedin(), labels)
+        overflow.add(pool.overflow(), labels)
+    return [size, idle, overflow]
+
+
+registry.add_collector(pool_metric_families)
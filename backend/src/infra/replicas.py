@@ -0,0 +1,135 @@
+"""
+Roteamento das sessões de leitura para réplicas do MySQL.
+
+As sessões criadas por read_sessionmaker escolhem uma réplica em rodízio na
+primeira consulta e ficam nela até fechar (uma sessão = uma conexão). Uma
+réplica que falha ao conectar, ou cuja conexão cai, sai do rodízio por
+`ejection_seconds`; depois disso volta a receber consultas e, se falhar de
+novo, é ejetada outra vez. Sem réplicas disponíveis, as leituras vão para o
+primário (`fallback`, normalmente uma engine de leitura própria). Escritas
+(flush e INSERT/UPDATE/DELETE) sempre vão para o primário.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+db_replica_available = registry.gauge(
+    "db_replica_available", "Réplica no rodízio de leitura (1) ou ejetada (0)", ("replica",)
+)
+db_replica_ejections = registry.counter(
+    "db_replica_ejections_total", "Réplicas retiradas do rodízio após falha de conexão", ("replica",)
+)
+db_replica_lag_fallbacks = registry.counter(
+    "db_replica_lag_fallbacks_total", "Leituras desviadas para o primário por réplica atrasada"
+)
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    ejected_until: float = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class ReplicaRouter:
+    """Rodízio entre as réplicas saudáveis, com o primário como reserva."""
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: dict[str, AsyncEngine] | None = None,
+        ejection_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        fallback: AsyncEngine | None = None,
+    ):
+        self.primary = primary
+        self.fallback = fallback or primary
+        self.replicas = [Replica(name, engine) for name, engine in (replicas or {}).items()]
+        self.ejection_seconds = ejection_seconds
+        self._clock = clock
+        self._next = 0
+        for replica in self.replicas:
+            db_replica_available.set(1, replica=replica.name)
+            event.listen(replica.engine.sync_engine, "handle_error", partial(self._on_error, replica))
+
+    def choose(self) -> AsyncEngine:
+        """Próxima réplica disponível no rodízio, ou a reserva (primário) se não houver."""
+        now = self._clock()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next]
+            self._next = (self._next + 1) % len(self.replicas)
+            if replica.available(now):
+                db_replica_available.set(1, replica=replica.name)
+                return replica.engine
+        return self.fallback
+
+    def eject(self, replica: Replica) -> None:
+        replica.ejected_until = self._clock() + self.ejection_seconds
+        db_replica_available.set(0, replica=replica.name)
+        db_replica_ejections.inc(replica=replica.name)
+        logger.warning(f"Read replica {replica.name} ejected for {self.ejection_seconds:.0f}s")
+
+    def status(self) -> dict[str, str]:
+        now = self._clock()
+        return {
+            replica.name: "healthy" if replica.available(now) else "ejected"
+            for replica in self.replicas
+        }
+
+    def _on_error(self, replica: Replica, exception_context) -> None:
+        # Só falhas de conexão: erro de SQL não diz nada sobre a saúde da réplica.
+        # Falha no pre-ping não conta: o pool ainda tenta uma conexão nova.
+        if exception_context.is_pre_ping:
+            return
+        if exception_context.is_disconnect or exception_context.connection is None:
+            self.eject(replica)
+
+
+class RoutingSession(Session):
+    """
+    Session que lê de uma réplica escolhida pelo roteador e escreve no
+    primário. Com primary_reads, as leituras vão direto para a reserva.
+    """
+
+    def __init__(self, router: ReplicaRouter, primary_reads: bool = False, **kw):
+        super().__init__(**kw)
+        self.router = router
+        self._read_engine: AsyncEngine | None = router.fallback if primary_reads else None
+
+    @property
+    def on_replica(self) -> bool:
+        """Se as leituras desta sessão vão para uma réplica (escolhendo-a, se preciso)."""
+        if self._read_engine is None:
+            self._read_engine = self.router.choose()
+        return self._read_engine is not self.router.fallback
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            return self.router.primary.sync_engine
+        if self._read_engine is None:
+            self._read_engine = self.router.choose()
+        return self._read_engine.sync_engine
+
+
+def read_sessionmaker(router: ReplicaRouter) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        router=router,
+        expire_on_commit=False,
+        autoflush=False,
+    )
@@ -1,9 +1,44 @@
-from sqlalchemy import select, func, text
+import re
+from collections import defaultdict
+from sqlalchemy import select, func, text, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from sqlalchemy.orm import aliased
+from typing import Iterable, Optional, Sequence
 from decimal import Decimal
 
 from domain.models import Operadora, DespesaTrimestral, MetricaOperadora
+from core.cache import operadora_cache
+from core.config import settings
+
+
+def _projection(model, columns: Optional[Sequence[str]]):
+    """
+    SELECT da entidade inteira ou, com `columns`, só dessas colunas (projeção
+    Core): menos dados lidos do banco e nenhum objeto ORM a hidratar.
+    """
+    if columns is None:
+        return select(model)
+    return select(*(getattr(model, name) for name in columns))
+
+
+def _rows(result, columns: Optional[Sequence[str]]) -> list:
+    return list(result.scalars().all()) if columns is None else list(result.all())
+
+
+_REGISTRO_ANS = re.compile(r"\d{1,10}")
+_CNPJ = re.compile(r"\d{14}")
+
+
+def clean_cnpj(cnpj: str) -> str:
+    return cnpj.replace(".", "").replace("/", "").replace("-", "")
+
+
+def valid_registro_ans(registro_ans: str) -> bool:
+    return _REGISTRO_ANS.fullmatch(registro_ans) is not None
+
+
+def valid_cnpj(clean: str) -> bool:
+    return _CNPJ.fullmatch(clean) is not None
 
 
 class OperadoraRepository:
@@ -29,6 +64,24 @@ class OperadoraRepository:
         )
         return result.scalar_one_or_none()
     
+    async def get_many(
+        self,
+        registros: Iterable[str] = (),
+        cnpjs: Iterable[str] = ()
+    ) -> list[Operadora]:
+        """Busca várias operadoras por registro ANS e/ou CNPJ em uma única consulta IN."""
+        registros = list(registros)
+        clean_cnpjs = [c.replace(".", "").replace("/", "").replace("-", "") for c in cnpjs]
+        conditions = []
+        if registros:
+            conditions.append(Operadora.registro_ans.in_(registros))
+        if clean_cnpjs:
+            conditions.append(Operadora.cnpj.in_(clean_cnpjs))
+        if not conditions:
+            return []
+        result = await self.session.execute(select(Operadora).where(or_(*conditions)))
+        return list(result.scalars().all())
+    
     async def get_all(self, skip: int = 0, limit: int = 100) -> list[Operadora]:
         result = await self.session.execute(
             select(Operadora).offset(skip).limit(limit)
@@ -45,9 +98,10 @@ class OperadoraRepository:
         uf: Optional[str] = None,
         modalidade: Optional[str] = None,
         cursor: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        columns: Optional[Sequence[str]] = None
     ) -> list[Operadora]:
-        query = select(Operadora)
+        query = _projection(Operadora, columns)
         
         if search:
             # Busca por razão social ou CNPJ
@@ -73,7 +127,7 @@ class OperadoraRepository:
         # Ordenação com ID como tiebreaker para resultados determinísticos (importante para TiDB)
         query = query.order_by(Operadora.razao_social, Operadora.registro_ans, Operadora.id).limit(limit + 1)
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        return _rows(result, columns)
     
     async def search_with_offset(
         self, 
@@ -81,10 +135,11 @@ class OperadoraRepository:
         uf: Optional[str] = None,
         modalidade: Optional[str] = None,
         offset: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        columns: Optional[Sequence[str]] = None
     ) -> list[Operadora]:
         """Busca com paginação por offset (para saltos de página)"""
-        query = select(Operadora)
+        query = _projection(Operadora, columns)
         
         if search:
             clean_search = search.replace(".", "").replace("/", "").replace("-", "")
@@ -101,7 +156,7 @@ class OperadoraRepository:
         query = query.order_by(Operadora.razao_social, Operadora.registro_ans, Operadora.id)
         query = query.offset(offset).limit(limit + 1)
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        return _rows(result, columns)
     
     async def count_filtered(
         self,
@@ -138,6 +193,112 @@ class OperadoraRepository:
         return [row[0] for row in result.all()]
 
 
+class CachedOperadoraRepository(OperadoraRepository):
+    """
+    OperadoraRepository com cache read-through nas buscas por registro ANS e CNPJ.
+
+    Guarda tanto operadoras encontradas quanto buscas sem resultado (com TTL
+    curto), para que registros inexistentes requisitados repetidamente não
+    custem uma ida ao banco. As chaves incluem a versão dos dados, então uma
+    importação invalida tudo. Os acertos devolvem instâncias transientes de
+    Operadora, desligadas da sessão.
+
+    Registros e CNPJs malformados são respondidos como não encontrados sem
+    consultar o banco nem ocupar o cache (operadora_cache, separado do cache
+    das rotas analíticas).
+    """
+
+    # Marca de busca sem resultado (None significaria "não está no cache")
+    NOT_FOUND = False
+
+    def __init__(self, session: AsyncSession, version: int = 0):
+        super().__init__(session)
+        self.version = version
+
+    def _registro_key(self, registro_ans: str) -> str:
+        return f"operadora_registro:v{self.version}:{registro_ans}"
+
+    def _cnpj_key(self, clean_cnpj: str) -> str:
+        return f"operadora_cnpj:v{self.version}:{clean_cnpj}"
+
+    def _store(self, key: str, operadora: Optional[Operadora]) -> None:
+        if operadora is None:
+            operadora_cache.set(key, self.NOT_FOUND, ttl=settings.operadora_negative_cache_ttl)
+            return
+        snapshot = {c.key: getattr(operadora, c.key) for c in Operadora.__table__.columns}
+        operadora_cache.set(key, snapshot, ttl=settings.operadora_cache_ttl)
+
+    async def _cached_lookup(self, key: str, load) -> Optional[Operadora]:
+        cached = operadora_cache.get(key)
+        if cached is None:
+            operadora = await load()
+            self._store(key, operadora)
+            return operadora
+        if cached is self.NOT_FOUND:
+            return None
+        return Operadora(**cached)
+
+    async def get_by_registro_ans(self, registro_ans: str) -> Optional[Operadora]:
+        if not valid_registro_ans(registro_ans):
+            return None
+        return await self._cached_lookup(
+            self._registro_key(registro_ans),
+            lambda: super(CachedOperadoraRepository, self).get_by_registro_ans(registro_ans),
+        )
+
+    async def get_by_cnpj(self, cnpj: str) -> Optional[Operadora]:
+        clean = clean_cnpj(cnpj)
+        if not valid_cnpj(clean):
+            return None
+        return await self._cached_lookup(
+            self._cnpj_key(clean),
+            lambda: super(CachedOperadoraRepository, self).get_by_cnpj(clean),
+        )
+
+    async def get_many(
+        self,
+        registros: Iterable[str] = (),
+        cnpjs: Iterable[str] = ()
+    ) -> list[Operadora]:
+        """
+        Busca em lote usando as mesmas entradas de cache das buscas individuais:
+        só o que não está no cache vai ao banco, numa única consulta, e o
+        resultado (inclusive o que não foi encontrado) é guardado item a item.
+        """
+        found: dict[int, Operadora] = {}
+        missing_registros: list[str] = []
+        missing_cnpjs: list[str] = []
+
+        def collect(key: str, missing: list[str], value: str) -> None:
+            cached = operadora_cache.get(key)
+            if cached is None:
+                missing.append(value)
+            elif cached is not self.NOT_FOUND:
+                found.setdefault(cached["id"], Operadora(**cached))
+
+        for registro in dict.fromkeys(r for r in registros if valid_registro_ans(r)):
+            collect(self._registro_key(registro), missing_registros, registro)
+        for cnpj in dict.fromkeys(c for c in map(clean_cnpj, cnpjs) if valid_cnpj(c)):
+            collect(self._cnpj_key(cnpj), missing_cnpjs, cnpj)
+
+        if missing_registros or missing_cnpjs:
+            loaded = await super().get_many(missing_registros, missing_cnpjs)
+            by_registro = {op.registro_ans: op for op in loaded}
+            by_cnpj: dict[str, list[Operadora]] = defaultdict(list)
+            for operadora in loaded:
+                by_cnpj[operadora.cnpj].append(operadora)
+                found.setdefault(operadora.id, operadora)
+            for registro in missing_registros:
+                self._store(self._registro_key(registro), by_registro.get(registro))
+            for cnpj in missing_cnpjs:
+                # CNPJ não é único: com mais de uma operadora, a busca
+                # individual não tem resposta única e não é guardada
+                matches = by_cnpj.get(cnpj, [])
+                if len(matches) <= 1:
+                    self._store(self._cnpj_key(cnpj), matches[0] if matches else None)
+        return list(found.values())
+
+
 class DespesaRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -157,6 +318,40 @@ class DespesaRepository:
         )
         return list(result.scalars().all())
     
+    async def get_latest_by_operadoras(
+        self,
+        registros: Iterable[str],
+        limit: int = 20
+    ) -> dict[str, list[DespesaTrimestral]]:
+        """
+        Últimas `limit` despesas de cada registro ANS em uma única consulta:
+        ROW_NUMBER() por registro no lugar de uma consulta por operadora.
+        """
+        registros = list(registros)
+        if not registros:
+            return {}
+        ranked = (
+            select(
+                DespesaTrimestral,
+                func.row_number().over(
+                    partition_by=DespesaTrimestral.registro_ans,
+                    order_by=(DespesaTrimestral.ano.desc(), DespesaTrimestral.trimestre.desc())
+                ).label("posicao")
+            )
+            .where(DespesaTrimestral.registro_ans.in_(registros))
+            .subquery()
+        )
+        despesa = aliased(DespesaTrimestral, ranked)
+        result = await self.session.execute(
+            select(despesa)
+            .where(ranked.c.posicao <= limit)
+            .order_by(despesa.registro_ans, ranked.c.posicao)
+        )
+        grouped: dict[str, list[DespesaTrimestral]] = defaultdict(list)
+        for row in result.scalars().all():
+            grouped[row.registro_ans].append(row)
+        return dict(grouped)
+    
     async def get_by_uf(
         self,
         uf: str,
@@ -191,14 +386,18 @@ class MetricaRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def get_top_ranking(self, limit: int = 10) -> list[MetricaOperadora]:
+    async def get_top_ranking(
+        self,
+        limit: int = 10,
+        columns: Optional[Sequence[str]] = None
+    ) -> list[MetricaOperadora]:
         result = await self.session.execute(
-            select(MetricaOperadora)
+            _projection(MetricaOperadora, columns)
             .where(MetricaOperadora.ranking.isnot(None))
             .order_by(MetricaOperadora.ranking)
             .limit(limit)
         )
-        return list(result.scalars().all())
+        return _rows(result, columns)
     
     async def get_by_uf(self, uf: str, limit: int = 100) -> list[MetricaOperadora]:
         result = await self.session.execute(
@@ -209,14 +408,18 @@ class MetricaRepository:
         )
         return list(result.scalars().all())
     
-    async def get_alta_variabilidade(self, limit: int = 50) -> list[MetricaOperadora]:
+    async def get_alta_variabilidade(
+        self,
+        limit: int = 50,
+        columns: Optional[Sequence[str]] = None
+    ) -> list[MetricaOperadora]:
         result = await self.session.execute(
-            select(MetricaOperadora)
+            _projection(MetricaOperadora, columns)
             .where(MetricaOperadora.alta_variabilidade == True)
             .order_by(MetricaOperadora.total_despesas.desc())
             .limit(limit)
         )
-        return list(result.scalars().all())
+        return _rows(result, columns)
     
     async def count(self) -> int:
         result = await self.session.execute(select(func.count(MetricaOperadora.id)))
@@ -13,6 +13,9 @@ from datetime import datetime
 # Adiciona o diretório src ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+# Antes de carregar as settings: libera as rotas /admin sem ADMIN_TOKEN
+os.environ.setdefault("ENVIRONMENT", "testing")
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
@@ -0,0 +1,123 @@
+"""
+Testes para o controle de admissão das consultas caras.
+"""
+import asyncio
+
+import pytest
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+
+from core.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    admission_queued,
+    admission_rejected,
+    admission_wait,
+)
+
+
+class TestAdmissionController:
+    """Testes para o semáforo com fila limitada."""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_and_queues_the_rest(self):
+        """No máximo `concurrency` execuções simultâneas; as demais esperam na fila."""
+        # Arrange
+        controller = AdmissionController("test_limits", concurrency=2, queue_size=5, timeout=1)
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            async with controller.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        # Act
+        await asyncio.gather(*(job() for _ in range(6)))
+
+        # Assert
+        assert peak == 2
+        assert controller.active == 0
+        assert controller.waiting == 0
+        assert admission_wait.count(limiter="test_limits") == 6
+        assert admission_queued.value(limiter="test_limits") == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_immediately_when_queue_is_full(self):
+        """Com a fila cheia, a operação é recusada sem esperar."""
+        # Arrange
+        controller = AdmissionController("test_full", concurrency=1, queue_size=1, timeout=5, retry_after=7)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        # Act
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.slot():
+                pass
+        release.set()
+        await asyncio.gather(*holders)
+
+        # Assert
+        assert exc_info.value.reason == "queue_full"
+        assert exc_info.value.retry_after == 7
+        assert admission_rejected.value(limiter="test_full", reason="queue_full") == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_after_queue_timeout(self):
+        """Quem espera mais que o timeout na fila é recusado e sai da fila."""
+        # Arrange
+        controller = AdmissionController("test_timeout", concurrency=1, queue_size=3, timeout=0.02)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+
+        # Act
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.slot():
+                pass
+        release.set()
+        await holder
+
+        # Assert
+        assert exc_info.value.reason == "timeout"
+        assert controller.waiting == 0
+        async with controller.slot():
+            assert controller.active == 1
+
+
+class TestAdmissionRoutes:
+    """Testes para a resposta 503 das rotas analíticas."""
+
+    @pytest.mark.asyncio
+    async def test_rejected_query_returns_503_with_retry_after(self):
+        """Miss do cache recusado pela admissão deve virar 503 + Retry-After, sem cache HTTP."""
+        # Arrange
+        from api.main import app
+        from core.cache import cache
+
+        controller = AdmissionController("acima_media", concurrency=1, queue_size=0, retry_after=3)
+        cache.purge_prefix("acima_media:")
+        with patch("api.routes.analytics.admission.limiter", return_value=controller):
+            async with controller.slot():
+                async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                    # Act
+                    response = await client.get("/api/estatisticas/acima-media?uf=ZZ")
+
+        # Assert
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        assert "no-store" in response.headers["cache-control"]
@@ -0,0 +1,535 @@
+"""
+Testes unitários para o cache em memória.
+"""
+import asyncio
+import pickle
+
+import pytest
+
+from datetime import datetime
+
+from core.cache import SimpleCache
+from api.responses import CachedBody
+from core.redis_cache import RedisCache
+from domain.schemas import EstatisticasResponse
+
+
+class FakeClock:
+    """Relógio controlável para simular a passagem do tempo."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestSimpleCache:
+    """Testes para SimpleCache."""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    def test_get_returns_value_before_ttl(self, clock):
+        """Deve retornar o valor enquanto o TTL não expirou."""
+        # Arrange
+        cache = SimpleCache(default_ttl=60, clock=clock)
+        cache.set("k", "v")
+
+        # Act
+        clock.advance(59)
+
+        # Assert
+        assert cache.get("k") == "v"
+
+    def test_get_expires_after_ttl(self, clock):
+        """Deve descartar a entrada após o TTL."""
+        # Arrange
+        cache = SimpleCache(default_ttl=60, clock=clock)
+        cache.set("k", "v")
+
+        # Act
+        clock.advance(60)
+
+        # Assert
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used_when_full(self, clock):
+        """Deve despejar a entrada menos usada ao exceder max_entries."""
+        # Arrange
+        cache = SimpleCache(max_entries=2, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" passa a ser a menos usada
+
+        # Act
+        cache.set("c", 3)
+
+        # Assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_respects_byte_budget(self, clock):
+        """Deve despejar entradas antigas ao exceder max_bytes."""
+        # Arrange
+        cache = SimpleCache(max_bytes=3000, clock=clock)
+
+        # Act
+        cache.set("a", "x" * 1000)
+        cache.set("b", "y" * 1000)
+        cache.set("c", "z" * 1000)
+
+        # Assert
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.size_bytes <= 3000
+
+    def test_skips_values_larger_than_budget(self, clock):
+        """Não deve armazenar valores maiores que o orçamento inteiro."""
+        # Arrange
+        cache = SimpleCache(max_bytes=100, clock=clock)
+
+        # Act
+        cache.set("big", "x" * 1000)
+
+        # Assert
+        assert cache.get("big") is None
+        assert cache.size_bytes == 0
+
+    def test_periodic_sweep_removes_expired_entries(self, clock):
+        """A varredura periódica deve remover entradas expiradas não lidas."""
+        # Arrange
+        cache = SimpleCache(default_ttl=10, sweep_interval=30, clock=clock)
+        for i in range(5):
+            cache.set(f"uf_{i}", i)
+
+        # Act
+        clock.advance(31)
+        cache.get("outra")
+
+        # Assert
+        assert len(cache) == 0
+        assert cache.size_bytes == 0
+
+    def test_set_replaces_entry_and_size(self, clock):
+        """Sobrescrever uma chave não deve acumular bytes."""
+        # Arrange
+        cache = SimpleCache(clock=clock)
+        cache.set("k", "x" * 100)
+        size_before = cache.size_bytes
+
+        # Act
+        cache.set("k", "x" * 100)
+
+        # Assert
+        assert len(cache) == 1
+        assert cache.size_bytes == size_before
+
+    @pytest.mark.asyncio
+    async def test_get_or_set_uses_factory_once(self, clock):
+        """get_or_set deve chamar a factory apenas no miss."""
+        # Arrange
+        cache = SimpleCache(clock=clock)
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            return {"total": 10}
+
+        # Act
+        first = await cache.get_or_set("k", factory)
+        second = await cache.get_or_set("k", factory)
+
+        # Assert
+        assert first == second == {"total": 10}
+        assert len(calls) == 1
+
+
+class TestSingleFlight:
+    """Testes para a deduplicação de cálculos concorrentes em get_or_set."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_computation(self):
+        """Vários misses simultâneos devem executar a factory uma única vez."""
+        # Arrange
+        cache = SimpleCache()
+        calls = []
+        release = asyncio.Event()
+
+        async def factory():
+            calls.append(1)
+            await release.wait()
+            return "resultado"
+
+        # Act
+        tasks = [asyncio.create_task(cache.get_or_set("k", factory)) for _ in range(10)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        # Assert
+        assert results == ["resultado"] * 10
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_every_waiter(self):
+        """Uma falha na factory deve chegar a todos que aguardam a chave."""
+        # Arrange
+        cache = SimpleCache()
+        release = asyncio.Event()
+
+        async def factory():
+            await release.wait()
+            raise RuntimeError("falha no banco")
+
+        # Act
+        tasks = [asyncio.create_task(cache.get_or_set("k", factory)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Assert
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_waiter_retries_when_leader_is_cancelled(self):
+        """Se quem calcula for cancelado, quem aguarda deve recalcular."""
+        # Arrange
+        cache = SimpleCache()
+        started = asyncio.Event()
+
+        async def slow_factory():
+            started.set()
+            await asyncio.sleep(10)
+            return "lento"
+
+        async def fast_factory():
+            return "rapido"
+
+        leader = asyncio.create_task(cache.get_or_set("k", slow_factory))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_set("k", fast_factory))
+        await asyncio.sleep(0)
+
+        # Act
+        leader.cancel()
+        result = await waiter
+
+        # Assert
+        assert result == "rapido"
+        assert leader.cancelled()
+
+
+class TestStaleWhileRevalidate:
+    """Testes para o modo soft TTL / hard TTL do get_or_set."""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.mark.asyncio
+    async def test_stale_value_is_served_while_refreshing(self, clock):
+        """Após o soft TTL deve devolver o valor velho e renovar em segundo plano."""
+        # Arrange
+        cache = SimpleCache(clock=clock)
+        values = iter(["v1", "v2"])
+
+        async def factory():
+            return next(values)
+
+        await cache.get_or_set("k", factory, ttl=100, soft_ttl=10)
+        clock.advance(11)
+
+        # Act
+        stale = await cache.get_or_set("k", factory, ttl=100, soft_ttl=10)
+        await asyncio.gather(*cache._background)
+        fresh = await cache.get_or_set("k", factory, ttl=100, soft_ttl=10)
+
+        # Assert
+        assert stale == "v1"
+        assert fresh == "v2"
+        assert cache.stats.refreshes == 1
+        assert cache.stats.refresh_failures == 0
+
+    @pytest.mark.asyncio
+    async def test_only_one_refresh_per_key(self, clock):
+        """Leituras concorrentes de um valor velho devem disparar uma só renovação."""
+        # Arrange
+        cache = SimpleCache(clock=clock)
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            return len(calls)
+
+        await cache.get_or_set("k", factory, ttl=100, soft_ttl=10)
+        clock.advance(11)
+
+        # Act
+        results = await asyncio.gather(
+            *[cache.get_or_set("k", factory, ttl=100, soft_ttl=10) for _ in range(5)]
+        )
+        await asyncio.gather(*cache._background)
+
+        # Assert
+        assert results == [1] * 5
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_refresh_failure_keeps_stale_value(self, clock):
+        """Falha na renovação deve ser contada e manter o valor velho."""
+        # Arrange
+        cache = SimpleCache(clock=clock)
+
+        async def ok():
+            return "v1"
+
+        async def broken():
+            raise RuntimeError("timeout")
+
+        await cache.get_or_set("k", ok, ttl=100, soft_ttl=10)
+        clock.advance(11)
+
+        # Act
+        result = await cache.get_or_set("k", broken, ttl=100, soft_ttl=10)
+        await asyncio.gather(*cache._background)
+
+        # Assert
+        assert result == "v1"
+        assert cache.get("k") == "v1"
+        assert cache.stats.refresh_failures == 1
+        assert "timeout" in cache.stats.last_refresh_error
+
+    @pytest.mark.asyncio
+    async def test_hard_ttl_forces_synchronous_recompute(self, clock):
+        """Após o TTL completo a requisição deve aguardar um novo cálculo."""
+        # Arrange
+        cache = SimpleCache(clock=clock)
+        values = iter(["v1", "v2"])
+
+        async def factory():
+            return next(values)
+
+        await cache.get_or_set("k", factory, ttl=100, soft_ttl=10)
+        clock.advance(100)
+
+        # Act
+        result = await cache.get_or_set("k", factory, ttl=100, soft_ttl=10)
+
+        # Assert
+        assert result == "v2"
+        assert cache.stats.refreshes == 0
+
+
+class BrokenRedis:
+    """Cliente Redis que sempre falha, simulando o servidor fora do ar."""
+
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+
+class TestRedisL2:
+    """Testes para a camada L2 compartilhada em Redis."""
+
+    @pytest.fixture
+    def redis_client(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        return fakeredis.FakeAsyncRedis()
+
+    @pytest.mark.asyncio
+    async def test_second_worker_reads_from_l2(self, redis_client):
+        """Um segundo worker deve reaproveitar o corpo calculado pelo primeiro."""
+        # Arrange
+        worker_a = SimpleCache(l2=RedisCache(client=redis_client))
+        worker_b = SimpleCache(l2=RedisCache(client=redis_client))
+        response = EstatisticasResponse(
+            total_operadoras=10,
+            total_despesas=1.5,
+            media_geral=0.5,
+            top_ufs=[{"uf": "SP", "total": 1.0}],
+            top_operadoras=[],
+            updated_at=datetime(2025, 1, 1),
+        )
+        body = CachedBody.from_content(response, EstatisticasResponse)
+        body.headers["X-Data-Version"] = "3"
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            return body
+
+        # Act
+        await worker_a.get_or_set("estatisticas", factory, ttl=60)
+        result = await worker_b.get_or_set("estatisticas", factory, ttl=60)
+
+        # Assert
+        assert result == body
+        assert isinstance(result, CachedBody)
+        assert len(calls) == 1
+        assert worker_b.get("estatisticas") == body
+
+    @pytest.mark.asyncio
+    async def test_refresh_ignores_stale_l2_value(self, redis_client):
+        """A revalidação não deve aceitar um valor que também está velho no L2."""
+        # Arrange
+        clock = FakeClock()
+        cache = SimpleCache(clock=clock, l2=RedisCache(client=redis_client))
+        old, new = CachedBody(body=b'"velho"'), CachedBody(body=b'"novo"')
+        await RedisCache(client=redis_client).set("k", old, ttl=60, soft_ttl=-1)
+        values = iter([new])
+
+        async def factory():
+            return next(values)
+
+        # Act
+        first = await cache.get_or_set("k", factory, ttl=60, soft_ttl=10)
+        await asyncio.gather(*cache._background)
+        second = await cache.get_or_set("k", factory, ttl=60, soft_ttl=10)
+
+        # Assert
+        assert first == old
+        assert second == new
+
+    @pytest.mark.asyncio
+    async def test_pickled_entry_is_never_unpickled(self, redis_client):
+        """Um pickle gravado no Redis por terceiros é descartado sem executar código."""
+        # Arrange
+        executed = []
+
+        class Payload:
+            def __reduce__(self):
+                return executed.append, ("executado",)
+
+        await redis_client.set("hcsaas:k", pickle.dumps(Payload()))
+        cache = SimpleCache(l2=RedisCache(client=redis_client))
+
+        async def factory():
+            return CachedBody(body=b"{}")
+
+        # Act
+        result = await cache.get_or_set("k", factory, ttl=60)
+
+        # Assert
+        assert executed == []
+        assert result == CachedBody(body=b"{}")
+
+    @pytest.mark.asyncio
+    async def test_unregistered_values_stay_in_l1(self, redis_client):
+        """Valores que não são de um tipo registrado não vão para o Redis."""
+        # Arrange
+        l2 = RedisCache(client=redis_client)
+        cache = SimpleCache(l2=l2)
+
+        async def factory():
+            return {"total": 1}
+
+        # Act
+        result = await cache.get_or_set("k", factory, ttl=60)
+
+        # Assert
+        assert result == {"total": 1}
+        assert await redis_client.get("hcsaas:k") is None
+        assert await l2.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_l1_when_redis_fails(self):
+        """Com o Redis fora do ar, o cache deve seguir funcionando só com o L1."""
+        # Arrange
+        l2 = RedisCache(client=BrokenRedis())
+        cache = SimpleCache(l2=l2)
+
+        async def factory():
+            return "valor"
+
+        # Act
+        result = await cache.get_or_set("k", factory)
+
+        # Assert
+        assert result == "valor"
+        assert cache.get("k") == "valor"
+        assert not l2.available
+
+
+class TestCacheStats:
+    """Testes para os contadores por namespace."""
+
+    def test_counts_hits_misses_and_expirations_per_namespace(self):
+        """Deve separar os contadores pelo namespace da chave."""
+        # Arrange
+        clock = FakeClock()
+        cache = SimpleCache(default_ttl=10, clock=clock)
+        cache.set("estatisticas:v1:all", 1)
+        cache.set("crescimento:v1:5:all", 2)
+
+        # Act
+        cache.get("estatisticas:v1:all")
+        cache.get("estatisticas:v1:SP")
+        clock.advance(10)
+        cache.get("crescimento:v1:5:all")
+
+        # Assert
+        stats = cache.namespace_stats()
+        assert stats["estatisticas"].hits == 1
+        assert stats["estatisticas"].misses == 1
+        assert stats["crescimento"].expirations == 1
+        assert stats["crescimento"].entries == 0
+        assert cache.stats.hits == 1
+
+    def test_counts_evictions_and_bytes(self):
+        """Deve contar despejos e manter entries/bytes coerentes."""
+        # Arrange
+        cache = SimpleCache(max_entries=1)
+
+        # Act
+        cache.set("ns:a", "x" * 100)
+        cache.set("ns:b", "y" * 100)
+
+        # Assert
+        stats = cache.namespace_stats()["ns"]
+        assert stats.evictions == 1
+        assert stats.entries == 1
+        assert stats.bytes == cache.size_bytes
+
+    @pytest.mark.asyncio
+    async def test_purge_by_prefix(self):
+        """purge deve remover apenas as chaves com o prefixo informado."""
+        # Arrange
+        cache = SimpleCache()
+        cache.set("estatisticas:v1:all", 1)
+        cache.set("estatisticas:v1:SP", 2)
+        cache.set("crescimento:v1:5:all", 3)
+
+        # Act
+        removed = await cache.purge("estatisticas:")
+
+        # Assert
+        assert removed == 2
+        assert len(cache) == 1
+        assert cache.namespace_stats()["estatisticas"].entries == 0
+
+    def test_metric_families_render_prometheus_text(self):
+        """As métricas devem sair no formato texto do Prometheus."""
+        # Arrange
+        from core import metrics
+
+        cache = SimpleCache()
+        cache.set("estatisticas:v1:all", 1)
+        cache.get("estatisticas:v1:all")
+
+        # Act
+        text = metrics.render(cache.metric_families())
+
+        # Assert
+        assert "# TYPE cache_hits_total counter" in text
+        assert 'cache_hits_total{namespace="estatisticas"} 1' in text
+        assert 'cache_entries{namespace="estatisticas"} 1' in text
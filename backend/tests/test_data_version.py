@@ -0,0 +1,95 @@
+"""
+Testes para o rastreamento da versão dos dados.
+"""
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from infra.database import Base
+from infra.data_version import DataVersionTracker
+from domain.models import DataVersion
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestDataVersionTracker:
+    """Testes para DataVersionTracker."""
+
+    @pytest.fixture
+    async def session_factory(self):
+        """Banco SQLite em memória com a tabela data_version na versão 1."""
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            session.add(DataVersion(id=1, version=1))
+            await session.commit()
+        yield factory
+        await engine.dispose()
+
+    async def _set_version(self, factory, version: int) -> None:
+        async with factory() as session:
+            await session.execute(update(DataVersion).where(DataVersion.id == 1).values(version=version))
+            await session.commit()
+
+    @pytest.mark.asyncio
+    async def test_reads_version_from_table(self, session_factory):
+        """Deve ler a versão gravada pelo importador."""
+        # Arrange
+        tracker = DataVersionTracker(session_factory)
+
+        # Act
+        version = await tracker.current()
+
+        # Assert
+        assert version == 1
+
+    @pytest.mark.asyncio
+    async def test_polls_at_most_once_per_interval(self, session_factory):
+        """Deve reaproveitar a versão até o fim do intervalo de consulta."""
+        # Arrange
+        clock = FakeClock()
+        tracker = DataVersionTracker(session_factory, poll_interval=30, clock=clock)
+        await tracker.current()
+        await self._set_version(session_factory, 2)
+
+        # Act
+        before = await tracker.current()
+        clock.now += 30
+        after = await tracker.current()
+
+        # Assert
+        assert before == 1
+        assert after == 2
+
+    @pytest.mark.asyncio
+    async def test_keeps_last_version_when_database_fails(self, session_factory):
+        """Falha no banco não deve zerar a versão conhecida."""
+        # Arrange
+        clock = FakeClock()
+        tracker = DataVersionTracker(session_factory, poll_interval=30, clock=clock)
+        await tracker.current()
+
+        def broken_factory():
+            raise ConnectionError("db down")
+
+        tracker._session_factory = broken_factory
+        clock.now += 30
+
+        # Act
+        version = await tracker.current()
+
+        # Assert
+        assert version == 1
@@ -0,0 +1,205 @@
+"""
+Testes para os jobs analíticos em segundo plano.
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+from pydantic import BaseModel
+
+from api.jobs import JobKind, JobManager, JobQueueFull, JobStatus
+from api.responses import CachedBody
+
+
+class LimitParams(BaseModel):
+    limit: int = 5
+
+
+def fake_kind(
+    calls: list, gate: asyncio.Event | None = None, fail: bool = False, versions: list | None = None
+) -> JobKind:
+    async def run(limit: int, version: int | None = None) -> CachedBody:
+        calls.append(limit)
+        if versions is not None:
+            versions.append(version)
+        if gate is not None:
+            await gate.wait()
+        if fail:
+            raise RuntimeError("boom")
+        return CachedBody(body=json.dumps({"limit": limit}).encode())
+    return JobKind(LimitParams, run)
+
+
+async def wait_finished(manager: JobManager, job_id: str):
+    for _ in range(100):
+        job = manager.get(job_id)
+        if job.status in (JobStatus.COMPLETED, JobStatus.FAILED):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job não terminou")
+
+
+class TestJobManager:
+    """Testes para JobManager."""
+
+    @pytest.mark.asyncio
+    async def test_runs_job_and_builds_composite_result(self):
+        """O job deve rodar em segundo plano e guardar status + resultado."""
+        # Arrange
+        calls = []
+        manager = JobManager(kinds={"top": fake_kind(calls)}, workers=1, queue_size=4)
+
+        # Act
+        job, created = await manager.submit("top", {"limit": 50})
+        finished = await wait_finished(manager, job.id)
+        await manager.stop()
+
+        # Assert
+        assert created is True
+        assert finished.status is JobStatus.COMPLETED
+        body = json.loads(finished.result.body)
+        assert body["job"]["status"] == "completed"
+        assert body["result"] == {"limit": 50}
+
+    @pytest.mark.asyncio
+    async def test_identical_submissions_are_deduplicated(self):
+        """Mesmo tipo e parâmetros devem devolver o mesmo job, executado uma vez."""
+        # Arrange
+        calls = []
+        gate = asyncio.Event()
+        manager = JobManager(kinds={"top": fake_kind(calls, gate)}, workers=2, queue_size=4)
+
+        # Act
+        first, first_created = await manager.submit("top", {"limit": 50})
+        second, second_created = await manager.submit("top", {"limit": 50})
+        other, _ = await manager.submit("top", {"limit": 10})
+        gate.set()
+        await wait_finished(manager, first.id)
+        await wait_finished(manager, other.id)
+        again, again_created = await manager.submit("top", {"limit": 50})
+        await manager.stop()
+
+        # Assert
+        assert first is second is again
+        assert (first_created, second_created, again_created) == (True, False, False)
+        assert other.id != first.id
+        assert sorted(calls) == [10, 50]
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_submission(self):
+        """Com os workers ocupados e a fila cheia, a submissão deve ser recusada."""
+        # Arrange
+        gate = asyncio.Event()
+        manager = JobManager(kinds={"top": fake_kind([], gate)}, workers=1, queue_size=1)
+        await manager.submit("top", {"limit": 1})
+        await asyncio.sleep(0.01)  # o worker retira o primeiro job da fila
+        await manager.submit("top", {"limit": 2})
+
+        # Act / Assert
+        with pytest.raises(JobQueueFull):
+            await manager.submit("top", {"limit": 3})
+        gate.set()
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_job_can_be_resubmitted(self):
+        """Um job que falhou não deve bloquear nova tentativa com os mesmos parâmetros."""
+        # Arrange
+        calls = []
+        manager = JobManager(kinds={"top": fake_kind(calls, fail=True)}, workers=1, queue_size=4)
+        job, _ = await manager.submit("top", {"limit": 5})
+        failed = await wait_finished(manager, job.id)
+
+        # Act
+        retry, created = await manager.submit("top", {"limit": 5})
+        await wait_finished(manager, retry.id)
+        await manager.stop()
+
+        # Assert
+        assert failed.status is JobStatus.FAILED
+        assert failed.error == "boom"
+        assert created is True
+        assert calls == [5, 5]
+
+    @pytest.mark.asyncio
+    async def test_records_version_actually_read(self):
+        """Se uma importação terminar com o job na fila, ele calcula e informa a versão nova."""
+        # Arrange
+        versions = []
+        manager = JobManager(kinds={"top": fake_kind([], versions=versions)}, workers=1, queue_size=4)
+        minimums = []
+
+        async def current_version():
+            return 3
+
+        async def read_version(min_version):
+            minimums.append(min_version)
+            return 4  # importação terminou antes de o worker pegar o job
+
+        # Act
+        with patch("api.jobs.data_version.current", current_version), \
+             patch("api.jobs.read_version", read_version):
+            job, _ = await manager.submit("top", {"limit": 5})
+            finished = await wait_finished(manager, job.id)
+        await manager.stop()
+
+        # Assert
+        assert minimums == [3]
+        assert versions == [4]
+        assert finished.data_version == 4
+        assert json.loads(finished.result.body)["job"]["data_version"] == 4
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_expire_after_retention(self):
+        """Jobs terminados devem sair da memória após o período de retenção."""
+        # Arrange
+        now = [0.0]
+        manager = JobManager(
+            kinds={"top": fake_kind([])}, workers=1, queue_size=4, retention=60, clock=lambda: now[0]
+        )
+        job, _ = await manager.submit("top", {"limit": 5})
+        await wait_finished(manager, job.id)
+
+        # Act
+        now[0] = 61.0
+        expired = manager.get(job.id)
+        await manager.stop()
+
+        # Assert
+        assert expired is None
+
+
+class TestJobRoutes:
+    """Testes para /api/jobs."""
+
+    @pytest.mark.asyncio
+    async def test_submit_and_poll_until_completed(self):
+        """POST /api/jobs deve enfileirar e GET /api/jobs/{id} trazer o resultado."""
+        # Arrange
+        from api.main import app
+        manager = JobManager(kinds={"top": fake_kind([])}, workers=1, queue_size=4)
+
+        with patch("api.routes.jobs.job_manager", manager):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                submitted = await client.post("/api/jobs", json={"kind": "top", "params": {"limit": 500}})
+                duplicate = await client.post("/api/jobs", json={"kind": "top", "params": {"limit": 500}})
+                await wait_finished(manager, submitted.json()["id"])
+                polled = await client.get(submitted.headers["location"])
+                unknown_kind = await client.post("/api/jobs", json={"kind": "nope"})
+                invalid = await client.post("/api/jobs", json={"kind": "top", "params": {"limit": "x"}})
+                missing = await client.get("/api/jobs/does-not-exist")
+        await manager.stop()
+
+        # Assert
+        assert submitted.status_code == 202
+        assert duplicate.status_code == 200
+        assert duplicate.json()["id"] == submitted.json()["id"]
+        assert polled.status_code == 200
+        assert polled.json()["result"] == {"limit": 500}
+        assert "no-store" in polled.headers["cache-control"]
+        assert unknown_kind.status_code == 422
+        assert invalid.status_code == 422
+        assert missing.status_code == 404
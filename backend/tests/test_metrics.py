@@ -0,0 +1,207 @@
+"""
+Testes para as métricas no formato do Prometheus.
+"""
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.metrics import Counter, Gauge, Histogram, Registry, RequestTiming, current_timing, render
+from api.middleware import MetricsMiddleware, TimingMiddleware, http_request_duration, http_requests
+from infra.database import warm_up_pool
+from infra.instrumentation import (
+    InstrumentedAsyncAdaptedQueuePool,
+    db_checkout_timeouts,
+    db_checkout_wait,
+    db_query_duration,
+    instrument_engine,
+    pool_metric_families,
+)
+
+
+class TestMetricTypes:
+    """Testes para Counter, Gauge, Histogram e Registry."""
+
+    def test_counter_and_gauge_render(self):
+        """Contadores e gauges devem sair com labels no formato texto."""
+        # Arrange
+        requests = Counter("req_total", "Requisições", ("route",))
+        in_flight = Gauge("in_flight", "Em andamento")
+
+        # Act
+        requests.inc(route="/a")
+        requests.inc(2, route="/a")
+        in_flight.inc()
+        in_flight.inc()
+        in_flight.dec()
+        text_output = render([requests.collect(), in_flight.collect()])
+
+        # Assert
+        assert '# TYPE req_total counter' in text_output
+        assert 'req_total{route="/a"} 3' in text_output
+        assert "in_flight 1" in text_output
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Buckets do histograma devem ser cumulativos, com _sum e _count."""
+        # Arrange
+        latency = Histogram("lat_seconds", "Latência", ("route",), buckets=(0.1, 1.0))
+
+        # Act
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value, route="/a")
+        text_output = render([latency.collect()])
+
+        # Assert
+        assert 'lat_seconds_bucket{route="/a",le="0.1"} 2' in text_output
+        assert 'lat_seconds_bucket{route="/a",le="1"} 3' in text_output
+        assert 'lat_seconds_bucket{route="/a",le="+Inf"} 4' in text_output
+        assert 'lat_seconds_count{route="/a"} 4' in text_output
+        assert 'lat_seconds_sum{route="/a"} 3.65' in text_output
+
+    def test_registry_returns_existing_metric_and_runs_collectors(self):
+        """Registrar o mesmo nome duas vezes devolve a mesma métrica."""
+        # Arrange
+        registry = Registry()
+        first = registry.counter("x_total", "X")
+        registry.add_collector(lambda: [Gauge("extra", "Extra").collect()])
+
+        # Act
+        second = registry.counter("x_total", "X")
+        names = [family.name for family in registry.collect()]
+
+        # Assert
+        assert first is second
+        assert names == ["x_total", "extra"]
+
+
+class TestRequestMetrics:
+    """Testes para MetricsMiddleware e Server-Timing."""
+
+    @pytest.mark.asyncio
+    async def test_labels_by_route_template_and_status(self):
+        """As métricas devem usar o template da rota, não o caminho concreto."""
+        # Arrange
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/api/teste-metricas/{registro}")
+        async def item(registro: str):
+            return {"registro": registro}
+
+        labels = {"method": "GET", "route": "/api/teste-metricas/{registro}", "status": "200"}
+        before = http_requests.value(**labels)
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/api/teste-metricas/1")
+            await client.get("/api/teste-metricas/2")
+            await client.get("/nao-existe")
+
+        # Assert
+        assert http_requests.value(**labels) == before + 2
+        assert http_request_duration.count(**labels) >= 2
+        assert http_requests.value(method="GET", route="unmatched", status="404") >= 1
+
+    @pytest.mark.asyncio
+    async def test_server_timing_reports_db_time(self, tmp_path):
+        """Server-Timing deve trazer o tempo total e o tempo/quantidade de consultas."""
+        # Arrange
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'timing.db'}")
+        instrument_engine(engine.sync_engine, "teste_timing")
+        app = FastAPI()
+        app.add_middleware(TimingMiddleware)
+
+        @app.get("/api/consulta")
+        async def consulta():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+            return {"ok": True}
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/consulta")
+        await engine.dispose()
+
+        # Assert
+        server_timing = response.headers["server-timing"]
+        assert server_timing.startswith("app;dur=")
+        assert 'db;dur=' in server_timing
+        assert 'desc="2 queries"' in server_timing
+        assert db_query_duration.count(engine="teste_timing", operation="SELECT") == 2
+
+
+class TestQueryInstrumentation:
+    """Testes para os eventos do SQLAlchemy."""
+
+    @pytest.mark.asyncio
+    async def test_accumulates_into_current_timing(self, tmp_path):
+        """Consultas devem somar no RequestTiming da requisição atual."""
+        # Arrange
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inst.db'}")
+        instrument_engine(engine.sync_engine, "teste_inst")
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+
+        # Act
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (id INTEGER)"))
+                await conn.execute(text("INSERT INTO t VALUES (1)"))
+        finally:
+            current_timing.reset(token)
+            await engine.dispose()
+
+        # Assert
+        assert timing.db_queries == 2
+        assert timing.db_seconds > 0
+        assert db_query_duration.count(engine="teste_inst", operation="INSERT") == 1
+
+
+class TestConnectionPool:
+    """Testes para o pool da engine assíncrona."""
+
+    def _engine(self, path, name, **pool_args):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}", poolclass=InstrumentedAsyncAdaptedQueuePool, **pool_args
+        )
+        instrument_engine(engine.sync_engine, name)
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_warm_up_leaves_idle_connections_in_pool(self, tmp_path):
+        """O aquecimento deve deixar as conexões abertas e ociosas no pool."""
+        # Arrange
+        engine = self._engine(tmp_path / "pool.db", "teste_pool", pool_size=3, max_overflow=0)
+
+        # Act
+        opened = await warm_up_pool(engine, connections=3)
+        families = {family.name: family for family in pool_metric_families()}
+        await engine.dispose()
+
+        # Assert
+        assert opened == 3
+        idle = [value for _, labels, value in families["db_pool_checked_in"].samples if labels["engine"] == "teste_pool"]
+        assert idle == [3]
+        assert db_checkout_wait.count(engine="teste_pool") == 3
+
+    @pytest.mark.asyncio
+    async def test_exhausted_pool_counts_checkout_timeout(self, tmp_path):
+        """Esgotar o pool_timeout deve ser contado e medido como espera."""
+        # Arrange
+        from sqlalchemy.exc import TimeoutError as PoolTimeout
+        engine = self._engine(
+            tmp_path / "timeout.db", "teste_pool_timeout", pool_size=1, max_overflow=0, pool_timeout=0.05
+        )
+
+        # Act
+        async with engine.connect():
+            with pytest.raises(PoolTimeout):
+                async with engine.connect():
+                    pass
+        await engine.dispose()
+
+        # Assert
+        assert db_checkout_timeouts.value(engine="teste_pool_timeout") == 1
+        assert db_checkout_wait.count(engine="teste_pool_timeout") == 2
@@ -0,0 +1,352 @@
+"""
+Testes para o middleware de cache HTTP (ETag / If-None-Match / Cache-Control).
+"""
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import AsyncClient, ASGITransport
+
+from api.middleware import (
+    CachePolicy,
+    CompressionMiddleware,
+    HttpCacheMiddleware,
+    TimingMiddleware,
+    NO_STORE,
+    etag_matches,
+    make_etag,
+    policy_for,
+)
+
+
+def build_app(version: dict, calls: list) -> FastAPI:
+    app = FastAPI()
+
+    async def version_provider() -> int:
+        return version["value"]
+
+    app.add_middleware(
+        HttpCacheMiddleware,
+        policies={
+            "/api/estatisticas": CachePolicy(max_age=60, stale_while_revalidate=600),
+            "/api/logs": NO_STORE,
+        },
+        version_provider=version_provider,
+    )
+
+    @app.get("/api/estatisticas")
+    async def estatisticas(uf: str | None = None):
+        calls.append(uf)
+        return {"uf": uf}
+
+    @app.get("/api/logs")
+    async def logs():
+        return []
+
+    @app.get("/api/erro")
+    async def erro():
+        from fastapi import HTTPException
+        raise HTTPException(status_code=404)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return app
+
+
+class TestHttpCacheMiddleware:
+    """Testes para HttpCacheMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_sets_etag_and_policy(self):
+        """Resposta deve trazer ETag e o Cache-Control da política da rota."""
+        # Arrange
+        app = build_app({"value": 3}, [])
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/estatisticas?uf=SP")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["etag"] == make_etag(3, "/api/estatisticas", [("uf", "SP")])
+        assert response.headers["cache-control"] == "public, max-age=60, stale-while-revalidate=600"
+        assert response.headers["x-data-version"] == "3"
+
+    @pytest.mark.asyncio
+    async def test_if_none_match_returns_304_without_running_route(self):
+        """ETag válida deve gerar 304 sem executar a rota."""
+        # Arrange
+        calls = []
+        app = build_app({"value": 3}, calls)
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/api/estatisticas?uf=SP")
+            second = await client.get(
+                "/api/estatisticas?uf=SP", headers={"If-None-Match": first.headers["etag"]}
+            )
+
+        # Assert
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == first.headers["etag"]
+        assert calls == ["SP"]
+
+    @pytest.mark.asyncio
+    async def test_new_data_version_invalidates_etag(self):
+        """Após uma importação, a ETag antiga não deve mais casar."""
+        # Arrange
+        version = {"value": 3}
+        app = build_app(version, [])
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/api/estatisticas")
+            version["value"] = 4
+            second = await client.get(
+                "/api/estatisticas", headers={"If-None-Match": first.headers["etag"]}
+            )
+
+        # Assert
+        assert second.status_code == 200
+        assert second.headers["etag"] != first.headers["etag"]
+
+    @pytest.mark.asyncio
+    async def test_no_store_policy_and_errors(self):
+        """Rotas no-store e respostas de erro não devem ter ETag."""
+        # Arrange
+        app = build_app({"value": 1}, [])
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            logs = await client.get("/api/logs")
+            erro = await client.get("/api/erro")
+            health = await client.get("/health")
+
+        # Assert
+        for response in (logs, erro):
+            assert "etag" not in response.headers
+            assert response.headers["cache-control"] == "no-cache, no-store, must-revalidate"
+        assert "cache-control" not in health.headers
+        assert "x-data-version" not in health.headers
+
+
+def build_compression_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        HttpCacheMiddleware,
+        policies={"/api/dados": CachePolicy(max_age=60)},
+        version_provider=lambda: _async_value(1),
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/api/dados")
+    async def dados():
+        return [{"registro_ans": str(i), "uf": "SP"} for i in range(100)]
+
+    @app.get("/api/pequeno")
+    async def pequeno():
+        return {"ok": True}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def lines():
+            for i in range(50):
+                yield f"{i},SP,registro\n"
+        return StreamingResponse(lines(), media_type="text/csv")
+
+    @app.get("/api/binario")
+    async def binario():
+        return PlainTextResponse("x" * 1000, headers={"Content-Encoding": "identity"})
+
+    return app
+
+
+async def _async_value(value):
+    return value
+
+
+class TestCompressionMiddleware:
+    """Testes para CompressionMiddleware e TimingMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_compresses_large_json_and_weakens_etag(self):
+        """JSON grande deve ir comprimido, com Vary e ETag fraca."""
+        # Arrange
+        app = build_compression_app()
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/dados", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"].startswith('W/"')
+        assert len(response.json()) == 100
+        assert "x-process-time" in response.headers
+
+    @pytest.mark.asyncio
+    async def test_skips_small_bodies_and_clients_without_gzip(self):
+        """Corpo pequeno ou cliente sem gzip devem receber a resposta original."""
+        # Arrange
+        app = build_compression_app()
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            small = await client.get("/api/pequeno", headers={"Accept-Encoding": "gzip"})
+            identity = await client.get("/api/dados", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["vary"] == "Accept-Encoding"
+        assert not identity.headers["etag"].startswith("W/")
+
+    @pytest.mark.asyncio
+    async def test_streams_compressed_chunks(self):
+        """Respostas em streaming devem ser comprimidas sem perder conteúdo."""
+        # Arrange
+        app = build_compression_app()
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            async with client.stream("GET", "/api/stream", headers={"Accept-Encoding": "gzip"}) as response:
+                raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        lines = gzip.decompress(raw).decode().splitlines()
+        assert len(lines) == 50
+        assert lines[0] == "0,SP,registro"
+
+    @pytest.mark.asyncio
+    async def test_not_modified_repeats_validators_of_compressed_response(self):
+        """O 304 deve trazer a mesma ETag (fraca) e o mesmo Vary do 200 comprimido."""
+        # Arrange
+        app = build_compression_app()
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/api/dados", headers={"Accept-Encoding": "gzip"})
+            second = await client.get(
+                "/api/dados", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]}
+            )
+            identity = await client.get(
+                "/api/dados", headers={"Accept-Encoding": "identity", "If-None-Match": first.headers["etag"]}
+            )
+
+        # Assert
+        assert second.status_code == 304
+        assert second.headers["etag"] == first.headers["etag"]
+        assert second.headers["vary"] == first.headers["vary"] == "Accept-Encoding"
+        assert identity.status_code == 304
+        assert not identity.headers["etag"].startswith("W/")
+        assert identity.headers["vary"] == "Accept-Encoding"
+
+    @pytest.mark.asyncio
+    async def test_keeps_existing_content_encoding(self):
+        """Respostas que já definem Content-Encoding não devem ser recomprimidas."""
+        # Arrange
+        app = build_compression_app()
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/binario", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.headers["content-encoding"] == "identity"
+        assert response.text == "x" * 1000
+
+
+class TestNegotiation:
+    """Testes para a negociação de Content-Encoding."""
+
+    def test_prefers_server_order(self):
+        """Com br e gzip aceitos, vale a preferência do servidor."""
+        from api.compression import negotiate
+        assert negotiate("gzip, deflate, br", ("br", "gzip")) == "br"
+        assert negotiate("gzip, deflate", ("br", "gzip")) == "gzip"
+
+    def test_respects_q_values(self):
+        """q=0 exclui a codificação; sem cabeçalho não há compressão."""
+        from api.compression import negotiate
+        assert negotiate("br;q=0, gzip;q=0.5", ("br", "gzip")) == "gzip"
+        assert negotiate("*;q=0", ("br", "gzip")) is None
+        assert negotiate("identity", ("br", "gzip")) is None
+        assert negotiate(None, ("br", "gzip")) is None
+
+    @pytest.mark.asyncio
+    async def test_excluded_paths_are_not_compressed(self):
+        """Rotas em excluded_paths devem ser enviadas sem compressão."""
+        # Arrange
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=10, excluded_paths=["/api/dados"])
+
+        @app.get("/api/dados")
+        async def dados():
+            return [{"i": i} for i in range(100)]
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/dados", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert "content-encoding" not in response.headers
+
+    @pytest.mark.asyncio
+    async def test_precompressed_responses_get_weak_etag(self):
+        """Respostas já comprimidas não são recomprimidas, mas a ETag vira fraca."""
+        # Arrange
+        from api.compression import compress
+        body = b'{"dados":"' + b"x" * 2000 + b'"}'
+        app = FastAPI()
+        app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+        @app.get("/api/dados")
+        async def dados():
+            from starlette.responses import Response
+            return Response(
+                compress(body, "gzip"),
+                media_type="application/json",
+                headers={"Content-Encoding": "gzip", "ETag": '"abc"'},
+            )
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/api/dados", headers={"Accept-Encoding": "gzip"})
+
+        # Assert
+        assert response.content == body
+        assert response.headers["etag"] == 'W/"abc"'
+
+
+class TestHelpers:
+    """Testes para as funções auxiliares do cache HTTP."""
+
+    def test_etag_ignores_query_order(self):
+        """A ordem dos parâmetros não deve mudar a ETag."""
+        assert make_etag(1, "/api/x", [("a", "1"), ("b", "2")]) == make_etag(
+            1, "/api/x", [("b", "2"), ("a", "1")]
+        )
+
+    def test_etag_matches_list_and_weak(self):
+        """If-None-Match aceita lista, prefixo W/ e '*'."""
+        etag = '"abc"'
+        assert etag_matches('"zzz", W/"abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"zzz"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_policy_uses_longest_prefix(self):
+        """A política deve vir do prefixo mais longo que casar."""
+        policies = {"/api/a": NO_STORE, "/api/a/b": CachePolicy(max_age=5)}
+        assert policy_for("/api/a/b/c", policies).max_age == 5
+        assert policy_for("/api/a/x", policies) is NO_STORE
+        assert policy_for("/api/ab", policies).max_age == 0
+        assert policy_for("/health", policies) is None
@@ -0,0 +1,287 @@
+"""
+Testes para as sessões de leitura e o roteamento entre réplicas, com arquivos
+SQLite no lugar do primário e das réplicas.
+"""
+import pytest
+from unittest.mock import patch
+from sqlalchemy import event, select
+from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from infra.database import Base, create_api_engine, get_db, get_read_db, read_only_statements, warm_up_pool
+from infra.data_version import get_versioned_read_db, read_session, read_version, session_version
+from infra.repositories import CachedOperadoraRepository
+from core.cache import operadora_cache
+from domain.models import DataVersion, Operadora
+from infra.replicas import ReplicaRouter, db_replica_ejections, db_replica_lag_fallbacks, read_sessionmaker
+
+
+async def sqlite_engine(path, razao_social: str | None = None, version: int = 0):
+    """
+    Engine para um arquivo SQLite; com razao_social, cria o schema, uma
+    operadora e a versão dos dados.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    if razao_social is not None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                Operadora.__table__.insert().values(id=1, registro_ans="301337", razao_social=razao_social)
+            )
+            await conn.execute(DataVersion.__table__.insert().values(id=1, version=version))
+    return engine
+
+
+async def read_razao_social(session_factory) -> str:
+    async with session_factory() as session:
+        result = await session.execute(select(Operadora.razao_social).where(Operadora.id == 1))
+        return result.scalar_one()
+
+
+class TestReplicaRouter:
+    """Testes para ReplicaRouter e as sessões de leitura."""
+
+    @pytest.mark.asyncio
+    async def test_reads_rotate_between_replicas_and_writes_go_to_primary(self, tmp_path):
+        """Cada sessão lê da próxima réplica; o flush grava no primário."""
+        # Arrange
+        primary = await sqlite_engine(tmp_path / "primary.db", "PRIMARIO")
+        replicas = {
+            "r1": await sqlite_engine(tmp_path / "r1.db", "REPLICA 1"),
+            "r2": await sqlite_engine(tmp_path / "r2.db", "REPLICA 2"),
+        }
+        factory = read_sessionmaker(ReplicaRouter(primary, replicas))
+
+        # Act
+        reads = [await read_razao_social(factory) for _ in range(3)]
+        async with factory() as session:
+            session.add(Operadora(id=2, registro_ans="326305", razao_social="NOVA"))
+            await session.commit()
+        async with primary.connect() as conn:
+            on_primary = (await conn.execute(select(Operadora.id).order_by(Operadora.id))).scalars().all()
+        async with replicas["r1"].connect() as conn:
+            on_replica = (await conn.execute(select(Operadora.id))).scalars().all()
+        for engine in (primary, *replicas.values()):
+            await engine.dispose()
+
+        # Assert
+        assert reads == ["REPLICA 1", "REPLICA 2", "REPLICA 1"]
+        assert on_primary == [1, 2]
+        assert on_replica == [1]
+
+    @pytest.mark.asyncio
+    async def test_failed_replica_is_ejected_and_readmitted(self, tmp_path):
+        """Réplica que não conecta sai do rodízio e volta após ejection_seconds."""
+        # Arrange
+        now = [0.0]
+        primary = await sqlite_engine(tmp_path / "primary.db", "PRIMARIO")
+        broken = await sqlite_engine(tmp_path / "nao-existe" / "r1.db")
+        healthy = await sqlite_engine(tmp_path / "r2.db", "REPLICA 2")
+        router = ReplicaRouter(
+            primary, {"quebrada": broken, "r2": healthy}, ejection_seconds=30, clock=lambda: now[0]
+        )
+        factory = read_sessionmaker(router)
+
+        # Act
+        with pytest.raises(OperationalError):
+            await read_razao_social(factory)
+        status_after_failure = router.status()
+        reads_while_ejected = [await read_razao_social(factory) for _ in range(2)]
+        now[0] = 31.0
+        readmitted = router.status()
+        for engine in (primary, broken, healthy):
+            await engine.dispose()
+
+        # Assert
+        assert status_after_failure == {"quebrada": "ejected", "r2": "healthy"}
+        assert reads_while_ejected == ["REPLICA 2", "REPLICA 2"]
+        assert readmitted == {"quebrada": "healthy", "r2": "healthy"}
+        assert db_replica_ejections.value(replica="quebrada") == 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_primary_without_available_replicas(self, tmp_path):
+        """Sem réplicas configuradas ou disponíveis, as leituras vão para o primário."""
+        # Arrange
+        primary = await sqlite_engine(tmp_path / "primary.db", "PRIMARIO")
+        replica = await sqlite_engine(tmp_path / "r1.db", "REPLICA 1")
+        router = ReplicaRouter(primary, {"r1": replica}, ejection_seconds=30, clock=lambda: 0.0)
+        router.eject(router.replicas[0])
+
+        # Act
+        without_replicas = await read_razao_social(read_sessionmaker(ReplicaRouter(primary)))
+        all_ejected = await read_razao_social(read_sessionmaker(router))
+        for engine in (primary, replica):
+            await engine.dispose()
+
+        # Assert
+        assert without_replicas == "PRIMARIO"
+        assert all_ejected == "PRIMARIO"
+
+    @pytest.mark.asyncio
+    async def test_lagging_replica_is_skipped_for_versioned_reads(self, tmp_path):
+        """Réplica sem a versão da chave do cache não deve responder; o primário responde."""
+        # Arrange
+        primary = await sqlite_engine(tmp_path / "primary.db", "PRIMARIO", version=2)
+        replica = await sqlite_engine(tmp_path / "r1.db", "REPLICA ATRASADA", version=1)
+        factory = read_sessionmaker(ReplicaRouter(primary, {"r1": replica}))
+        fallbacks_before = db_replica_lag_fallbacks.value()
+
+        async def read_at(version: int) -> str:
+            async with read_session(version) as session:
+                result = await session.execute(select(Operadora.razao_social).where(Operadora.id == 1))
+                return result.scalar_one()
+
+        # Act
+        with patch("infra.data_version.ReadSessionLocal", factory):
+            current = await read_at(2)
+            already_replicated = await read_at(1)
+        for engine in (primary, replica):
+            await engine.dispose()
+
+        # Assert
+        assert current == "PRIMARIO"
+        assert already_replicated == "REPLICA ATRASADA"
+        assert db_replica_lag_fallbacks.value() == fallbacks_before + 1
+
+    @pytest.mark.asyncio
+    async def test_read_version_reports_version_seen_by_session(self, tmp_path):
+        """read_version devolve a versão que a leitura vê, que pode passar do mínimo pedido."""
+        # Arrange
+        primary = await sqlite_engine(tmp_path / "primary.db", "PRIMARIO", version=3)
+        replica = await sqlite_engine(tmp_path / "r1.db", "REPLICA", version=2)
+        factory = read_sessionmaker(ReplicaRouter(primary, {"r1": replica}))
+
+        # Act
+        with patch("infra.data_version.ReadSessionLocal", factory):
+            on_replica = await read_version(1)
+            on_primary = await read_version(3)
+        for engine in (primary, replica):
+            await engine.dispose()
+
+        # Assert
+        assert on_replica == 2
+        assert on_primary == 3
+
+    @pytest.mark.asyncio
+    async def test_operadora_lookups_skip_lagging_replica(self, tmp_path):
+        """Buscas de operadora não guardam, sob a versão nova, dados de uma réplica atrasada."""
+        # Arrange
+        primary = await sqlite_engine(tmp_path / "primary.db", "PRIMARIO", version=2)
+        replica = await sqlite_engine(tmp_path / "r1.db", "REPLICA ATRASADA", version=1)
+        factory = read_sessionmaker(ReplicaRouter(primary, {"r1": replica}))
+        operadora_cache.clear()
+
+        async def current_version():
+            return 2
+
+        # Act
+        with patch("infra.data_version.ReadSessionLocal", factory), \
+             patch("infra.data_version.data_version.current", current_version):
+            dependency = get_versioned_read_db()
+            session = await anext(dependency)
+            repo = CachedOperadoraRepository(session, version=session_version(session))
+            operadora = await repo.get_by_registro_ans("301337")
+            with pytest.raises(StopAsyncIteration):
+                await anext(dependency)
+        cached = operadora_cache.get("operadora_registro:v2:301337")
+        operadora_cache.clear()
+        for engine in (primary, replica):
+            await engine.dispose()
+
+        # Assert
+        assert operadora.razao_social == "PRIMARIO"
+        assert cached["razao_social"] == "PRIMARIO"
+
+
+async def round_trips(engine, dependency) -> dict[str, int]:
+    """Consultas, COMMITs e ROLLBACKs enviados ao banco numa requisição com uma consulta."""
+    counts = {"statements": 0, "commit": 0, "rollback": 0}
+
+    def count_statement(*args):
+        counts["statements"] += 1
+
+    def counting(name):
+        original = getattr(AsyncAdapt_aiosqlite_connection, name)
+
+        def call(self):
+            counts[name] += 1
+            return original(self)
+        return call
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    with patch.object(AsyncAdapt_aiosqlite_connection, "commit", counting("commit")), \
+         patch.object(AsyncAdapt_aiosqlite_connection, "rollback", counting("rollback")):
+        dependency_gen = dependency()
+        session = await anext(dependency_gen)
+        await session.execute(select(Operadora.id))
+        with pytest.raises(StopAsyncIteration):
+            await anext(dependency_gen)
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    return counts
+
+
+class TestReadSessions:
+    """Testes para get_read_db e as engines de leitura."""
+
+    @pytest.mark.asyncio
+    async def test_read_session_skips_commit_and_rollback_round_trips(self, tmp_path):
+        """get_db envia COMMIT e, ao devolver a conexão, ROLLBACK; get_read_db, nenhum dos dois."""
+        # Arrange
+        path = tmp_path / "primary.db"
+        primary = await sqlite_engine(path, "PRIMARIO")
+        read_engine = create_api_engine(f"sqlite+aiosqlite:///{path}", read_only=True)
+        read_factory = read_sessionmaker(ReplicaRouter(primary, fallback=read_engine))
+        write_factory = async_sessionmaker(bind=primary, expire_on_commit=False)
+
+        # Act
+        with patch("infra.database.AsyncSessionLocal", write_factory), \
+             patch("infra.database.ReadSessionLocal", read_factory):
+            with_commit = await round_trips(primary, get_db)
+            read_only = await round_trips(read_engine, get_read_db)
+        await primary.dispose()
+        await read_engine.dispose()
+
+        # Assert
+        assert with_commit == {"statements": 1, "commit": 1, "rollback": 1}
+        assert read_only == {"statements": 1, "commit": 0, "rollback": 0}
+
+    @pytest.mark.asyncio
+    async def test_read_and_write_pools_have_their_own_sizes(self, tmp_path):
+        """O pool de leitura usa db_read_*; o de escrita, db_pool_*; o aquecimento respeita cada um."""
+        # Arrange
+        url = f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}"
+        with patch("infra.database.settings.db_pool_size", 2), \
+             patch("infra.database.settings.db_max_overflow", 1), \
+             patch("infra.database.settings.db_read_pool_size", 6), \
+             patch("infra.database.settings.db_read_max_overflow", 4):
+            write_engine = create_api_engine(url)
+            read_engine = create_api_engine(url, read_only=True)
+
+        # Act
+        with patch("infra.database.settings.db_pool_warmup", 4):
+            warmed_write = await warm_up_pool(write_engine)
+            warmed_read = await warm_up_pool(read_engine)
+        await write_engine.dispose()
+        await read_engine.dispose()
+
+        # Assert
+        assert (write_engine.pool.size(), write_engine.pool._max_overflow) == (2, 1)
+        assert (read_engine.pool.size(), read_engine.pool._max_overflow) == (6, 4)
+        assert (warmed_write, warmed_read) == (2, 4)
+
+    def test_read_only_statements_only_for_mysql(self):
+        """READ ONLY e o tempo máximo por SELECT só se aplicam ao MySQL, conforme settings."""
+        # Arrange / Act
+        with patch("infra.database.settings.db_read_only_transactions", True), \
+             patch("infra.database.settings.db_read_statement_timeout_ms", 5000):
+            mysql = read_only_statements("mysql")
+            sqlite = read_only_statements("sqlite")
+        with patch("infra.database.settings.db_read_only_transactions", False), \
+             patch("infra.database.settings.db_read_statement_timeout_ms", 0):
+            disabled = read_only_statements("mysql")
+
+        # Assert
+        assert mysql == ["SET SESSION TRANSACTION READ ONLY", "SET SESSION max_execution_time = 5000"]
+        assert sqlite == []
+        assert disabled == []
@@ -5,7 +5,7 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from decimal import Decimal
 
-from infra.repositories import OperadoraRepository, DespesaRepository
+from infra.repositories import OperadoraRepository, CachedOperadoraRepository, DespesaRepository
 from domain.models import Operadora, DespesaTrimestral
 
 
@@ -230,6 +230,243 @@ class TestOperadoraRepository:
         assert "Medicina de Grupo" in result
 
 
+class TestCachedOperadoraRepository:
+    """Testes para o cache de buscas por registro ANS/CNPJ."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        from core.cache import operadora_cache
+        operadora_cache.clear()
+        yield
+        operadora_cache.clear()
+
+    def _result(self, operadora):
+        mock_result = MagicMock()
+        mock_result.scalar_one_or_none.return_value = operadora
+        return mock_result
+
+    @pytest.mark.asyncio
+    async def test_hit_does_not_query_database(self, mock_session, sample_operadora):
+        """Segunda busca pelo mesmo registro deve vir do cache."""
+        # Arrange
+        mock_session.execute.return_value = self._result(sample_operadora)
+        repo = CachedOperadoraRepository(mock_session, version=1)
+
+        # Act
+        first = await repo.get_by_registro_ans("301337")
+        second = await repo.get_by_registro_ans("301337")
+
+        # Assert
+        assert first.razao_social == second.razao_social
+        assert second.registro_ans == "301337"
+        assert second.uf == "SP"
+        mock_session.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_negative_result_is_cached(self, mock_session):
+        """Registro inexistente deve ser lembrado, sem nova consulta."""
+        # Arrange
+        mock_session.execute.return_value = self._result(None)
+        repo = CachedOperadoraRepository(mock_session, version=1)
+
+        # Act
+        first = await repo.get_by_registro_ans("999999")
+        second = await repo.get_by_registro_ans("999999")
+
+        # Assert
+        assert first is None
+        assert second is None
+        mock_session.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_negative_result_uses_short_ttl(self, mock_session):
+        """Buscas sem resultado devem usar o TTL negativo."""
+        # Arrange
+        from core.cache import operadora_cache
+        from core.config import settings
+        mock_session.execute.return_value = self._result(None)
+        repo = CachedOperadoraRepository(mock_session, version=1)
+
+        # Act
+        with patch.object(operadora_cache, "set", wraps=operadora_cache.set) as spy:
+            await repo.get_by_cnpj("00.000.000/0000-00")
+
+        # Assert
+        spy.assert_called_once_with(
+            "operadora_cnpj:v1:00000000000000",
+            CachedOperadoraRepository.NOT_FOUND,
+            ttl=settings.operadora_negative_cache_ttl,
+        )
+
+    @pytest.mark.asyncio
+    async def test_malformed_keys_skip_database_and_cache(self, mock_session):
+        """Registros e CNPJs malformados devem ser não encontrados, sem consulta nem entrada no cache."""
+        # Arrange
+        from core.cache import operadora_cache
+        repo = CachedOperadoraRepository(mock_session, version=1)
+
+        # Act
+        by_registro = await repo.get_by_registro_ans("../admin")
+        by_cnpj = await repo.get_by_cnpj("123")
+        batch = await repo.get_many(registros=["x" * 11, "abc"], cnpjs=["12.345"])
+
+        # Assert
+        assert by_registro is None and by_cnpj is None and batch == []
+        mock_session.execute.assert_not_called()
+        assert len(operadora_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_lookups_do_not_evict_analytics_cache(self, mock_session):
+        """Buscas de operadora usam um cache próprio, sem despejar os corpos analíticos."""
+        # Arrange
+        from core.cache import cache
+        mock_session.execute.return_value = self._result(None)
+        repo = CachedOperadoraRepository(mock_session, version=1)
+        cache.set("estatisticas:v1:all", {"total": 1})
+
+        # Act
+        with patch.object(cache, "set") as main_set:
+            for registro in range(100000, 100050):
+                await repo.get_by_registro_ans(str(registro))
+
+        # Assert
+        main_set.assert_not_called()
+        assert cache.get("estatisticas:v1:all") == {"total": 1}
+        cache.delete("estatisticas:v1:all")
+
+    @pytest.mark.asyncio
+    async def test_new_data_version_queries_again(self, mock_session):
+        """Nova versão dos dados não deve reaproveitar o resultado anterior."""
+        # Arrange
+        mock_session.execute.return_value = self._result(None)
+
+        # Act
+        await CachedOperadoraRepository(mock_session, version=1).get_by_registro_ans("999999")
+        await CachedOperadoraRepository(mock_session, version=2).get_by_registro_ans("999999")
+
+        # Assert
+        assert mock_session.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cnpj_formatting_shares_entry(self, mock_session, sample_operadora):
+        """CNPJ com e sem formatação devem usar a mesma entrada."""
+        # Arrange
+        mock_session.execute.return_value = self._result(sample_operadora)
+        repo = CachedOperadoraRepository(mock_session, version=1)
+
+        # Act
+        await repo.get_by_cnpj("44.988.925/0001-90")
+        result = await repo.get_by_cnpj("44988925000190")
+
+        # Assert
+        assert result.cnpj == "44988925000190"
+        mock_session.execute.assert_called_once()
+
+
+    @pytest.mark.asyncio
+    async def test_get_many_queries_only_cache_misses(self, mock_session, sample_operadoras):
+        """Lote deve reaproveitar as entradas individuais e buscar o resto numa só consulta."""
+        # Arrange
+        unimed, bradesco, _ = sample_operadoras
+        mock_session.execute.return_value = self._result(unimed)
+        repo = CachedOperadoraRepository(mock_session, version=1)
+        await repo.get_by_registro_ans("301337")
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = [bradesco]
+        mock_session.execute.return_value = mock_result
+
+        # Act
+        result = await repo.get_many(registros=["301337", "326305", "999999"])
+
+        # Assert
+        assert sorted(op.id for op in result) == [1, 2]
+        assert mock_session.execute.call_count == 2
+        statement = str(mock_session.execute.call_args.args[0])
+        assert "IN" in statement
+
+    @pytest.mark.asyncio
+    async def test_get_many_fills_per_item_cache(self, mock_session, sample_operadoras):
+        """Itens buscados em lote (inclusive os ausentes) devem servir às buscas individuais."""
+        # Arrange
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = [sample_operadoras[0]]
+        mock_session.execute.return_value = mock_result
+        repo = CachedOperadoraRepository(mock_session, version=1)
+
+        # Act
+        await repo.get_many(registros=["301337", "999999"], cnpjs=["44.988.925/0001-90"])
+        by_registro = await repo.get_by_registro_ans("301337")
+        by_cnpj = await repo.get_by_cnpj("44988925000190")
+        missing = await repo.get_by_registro_ans("999999")
+
+        # Assert
+        assert by_registro.razao_social == "UNIMED CAMPINAS"
+        assert by_cnpj.registro_ans == "301337"
+        assert missing is None
+        mock_session.execute.assert_called_once()
+
+
+class TestBatchQueriesSqlite:
+    """Consultas em lote executadas em SQLite."""
+
+    @pytest.fixture
+    async def populated(self, async_session, sample_operadoras):
+        async_session.add_all(sample_operadoras)
+        # Três trimestres de 301337 e um de 326305; 005711 sem despesas
+        periodos = [("301337", 2024, 4), ("301337", 2025, 1), ("301337", 2025, 2), ("326305", 2025, 1)]
+        for i, (registro, ano, trimestre) in enumerate(periodos, 1):
+            async_session.add(DespesaTrimestral(
+                id=i, registro_ans=registro, razao_social=registro, ano=ano,
+                trimestre=trimestre, valor_despesas=Decimal(i * 100),
+            ))
+        await async_session.commit()
+        return async_session
+
+    @pytest.mark.asyncio
+    async def test_get_many_by_registro_and_cnpj(self, populated):
+        """Deve encontrar operadoras por registro e por CNPJ formatado."""
+        # Act
+        result = await OperadoraRepository(populated).get_many(
+            registros=["301337", "999999"], cnpjs=["86.878.469/0001-20"]
+        )
+
+        # Assert
+        assert sorted(op.registro_ans for op in result) == ["005711", "301337"]
+
+    @pytest.mark.asyncio
+    async def test_search_with_columns_selects_only_those_columns(self, populated):
+        """Com columns, a busca deve ser uma projeção só com as colunas pedidas."""
+        # Arrange
+        from sqlalchemy import event
+        statements = []
+        engine = populated.bind.sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+
+        # Act
+        rows = await OperadoraRepository(populated).search(uf="SP", columns=("registro_ans", "uf"))
+        event.remove(engine, "before_cursor_execute", listener)
+
+        # Assert
+        assert [tuple(row) for row in rows] == [("326305", "SP"), ("301337", "SP")]
+        select_list = statements[-1].split("FROM")[0]
+        assert "razao_social" not in select_list
+        assert "created_at" not in select_list
+
+    @pytest.mark.asyncio
+    async def test_get_latest_by_operadoras_limits_each_registro(self, populated):
+        """Deve devolver as últimas despesas de cada registro, da mais recente para a mais antiga."""
+        # Act
+        result = await DespesaRepository(populated).get_latest_by_operadoras(
+            ["301337", "326305", "005711"], limit=2
+        )
+
+        # Assert
+        assert set(result) == {"301337", "326305"}
+        assert [(d.ano, d.trimestre) for d in result["301337"]] == [(2025, 2), (2025, 1)]
+        assert [d.id for d in result["326305"]] == [4]
+
+
 class TestDespesaRepository:
     """Testes para DespesaRepository."""
 
@@ -0,0 +1,249 @@
+"""
+Testes para a serialização de respostas pré-codificadas.
+"""
+import json
+from decimal import Decimal
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from api.responses import CachedBody, FastJSONResponse, encode, encode_projected, parse_fields, project_rows
+from domain.models import MetricaOperadora, Operadora
+from domain.schemas import DespesaPorUF, MetricaOperadoraResponse, OperadoraResponse
+
+
+def make_metrica(i: int = 1) -> MetricaOperadora:
+    return MetricaOperadora(
+        id=i,
+        operadora_id=i,
+        registro_ans=str(300000 + i),
+        razao_social="BRADESCO SAUDE",
+        uf="SP",
+        total_despesas=Decimal("100.50"),
+        media_trimestral=Decimal("33.50"),
+        desvio_padrao=Decimal("1.00"),
+        coeficiente_variacao=Decimal("0.030000"),
+        quantidade_trimestres=3,
+        ranking=i,
+        alta_variabilidade=False,
+        cadastro_incompleto=False,
+        cnpj_conflict=False,
+        razao_social_ausente=False,
+        created_at=datetime(2025, 1, 1, 12, 30, 0, 123456),
+    )
+
+
+class TestEncode:
+    """Testes para api.responses.encode."""
+
+    def test_matches_fastapi_format_for_response_models(self):
+        """Com response_type, deve gerar o mesmo JSON que o response_model do FastAPI."""
+        # Arrange
+        items = [
+            DespesaPorUF(
+                uf="SP",
+                total_despesas=Decimal("18000000000.00"),
+                total_operadoras=450,
+                media_despesas_por_operadora=Decimal("40000000.00"),
+                percentual_total=Decimal("55.38"),
+            )
+        ]
+        expected = [item.model_dump(mode="json") for item in items]
+
+        # Act
+        body = encode(items, list[DespesaPorUF])
+
+        # Assert
+        assert json.loads(body) == expected
+        assert json.loads(body)[0]["total_despesas"] == "18000000000.00"
+
+    def test_accepts_orm_objects(self):
+        """Deve converter objetos ORM quando recebe o tipo de resposta."""
+        # Arrange
+        metrica = MetricaOperadora(
+            id=1,
+            razao_social="BRADESCO SAUDE",
+            uf="SP",
+            total_despesas=Decimal("100.50"),
+            media_trimestral=Decimal("33.50"),
+            desvio_padrao=Decimal("1.00"),
+            coeficiente_variacao=Decimal("0.030000"),
+            quantidade_trimestres=3,
+            alta_variabilidade=False,
+            cadastro_incompleto=False,
+            cnpj_conflict=False,
+            razao_social_ausente=False,
+            created_at=datetime(2025, 1, 1),
+        )
+
+        # Act
+        data = json.loads(encode([metrica], list[MetricaOperadoraResponse]))
+
+        # Assert
+        assert data[0]["razao_social"] == "BRADESCO SAUDE"
+        assert data[0]["total_despesas"] == "100.50"
+        assert data[0]["created_at"] == "2025-01-01T00:00:00"
+
+    def test_plain_content_matches_jsonable_encoder(self):
+        """Sem response_type, Decimal deve virar número como no jsonable_encoder."""
+        # Arrange
+        content = {"total": Decimal("10"), "media": Decimal("2.5"), "nome": "ação"}
+
+        # Act
+        body = encode(content)
+
+        # Assert
+        assert json.loads(body) == jsonable_encoder(content)
+
+    def test_cached_body_builds_json_response(self):
+        """CachedBody deve gerar uma Response JSON com o corpo pronto."""
+        # Arrange
+        cached = CachedBody.from_content({"ok": True})
+
+        # Act
+        response = cached.to_response()
+
+        # Assert
+        assert response.body == b'{"ok":true}'
+        assert response.media_type == "application/json"
+
+
+class TestProjection:
+    """Testes para o caminho rápido de serialização de listas."""
+
+    def test_projection_matches_response_model(self):
+        """Projeção + orjson deve gerar o mesmo JSON que a validação pelo schema."""
+        # Arrange
+        rows = [make_metrica(i) for i in range(1, 4)]
+
+        # Act
+        fast = encode_projected(project_rows(rows, MetricaOperadoraResponse))
+        validated = encode(rows, list[MetricaOperadoraResponse])
+
+        # Assert
+        assert json.loads(fast) == json.loads(validated)
+        assert list(json.loads(fast)[0]) == list(MetricaOperadoraResponse.model_fields)
+
+    def test_projection_uses_only_schema_fields(self):
+        """Apenas os campos do schema devem ser projetados."""
+        # Arrange
+        operadora = Operadora(id=1, registro_ans="301337", razao_social="UNIMED", uf="SP")
+
+        # Act
+        data = project_rows([operadora], OperadoraResponse)
+
+        # Assert
+        assert set(data[0]) == set(OperadoraResponse.model_fields)
+
+    def test_parse_fields_normalizes_order(self):
+        """fields= deve seguir a ordem do schema, para gerar a mesma chave de cache."""
+        # Act
+        first = parse_fields("uf, id,razao_social", OperadoraResponse)
+        second = parse_fields("razao_social,uf,id", OperadoraResponse)
+
+        # Assert
+        assert first == second == ("razao_social", "uf", "id")
+        assert parse_fields(None, OperadoraResponse) is None
+        assert parse_fields(" , ", OperadoraResponse) is None
+
+    def test_parse_fields_rejects_unknown_field(self):
+        """Campo fora do schema deve resultar em 422."""
+        # Act / Assert
+        with pytest.raises(HTTPException) as exc_info:
+            parse_fields("id,senha", OperadoraResponse)
+        assert exc_info.value.status_code == 422
+        assert "senha" in exc_info.value.detail
+
+    def test_projection_with_fields(self):
+        """Com fields, apenas os campos pedidos devem ir para a resposta."""
+        # Act
+        cached = CachedBody.from_rows([make_metrica()], MetricaOperadoraResponse, ("razao_social", "total_despesas"))
+
+        # Assert
+        assert json.loads(cached.body) == [{"razao_social": "BRADESCO SAUDE", "total_despesas": "100.50"}]
+
+    def test_cached_body_from_rows(self):
+        """CachedBody.from_rows deve guardar o corpo projetado."""
+        # Act
+        cached = CachedBody.from_rows([make_metrica()], MetricaOperadoraResponse)
+
+        # Assert
+        assert json.loads(cached.body)[0]["total_despesas"] == "100.50"
+
+    def test_fast_json_response_matches_jsonable_encoder(self):
+        """A classe de resposta padrão deve manter o formato do JSONResponse."""
+        # Arrange
+        content = jsonable_encoder({"total": Decimal("2.5"), "quando": datetime(2025, 1, 1)})
+
+        # Act
+        response = FastJSONResponse(content)
+
+        # Assert
+        assert json.loads(response.body) == content
+
+
+class TestCompressedVariants:
+    """Testes para as variantes comprimidas guardadas no CachedBody."""
+
+    def _app(self, cached: CachedBody):
+        from fastapi import FastAPI
+        app = FastAPI()
+
+        @app.get("/api/dados")
+        async def dados():
+            return cached.to_response()
+
+        return app
+
+    def test_small_bodies_are_not_compressed(self):
+        """Corpos abaixo do limite mínimo não devem ganhar variantes."""
+        # Act
+        cached = CachedBody.from_content({"ok": True})
+
+        # Assert
+        assert cached.variants == {}
+
+    @pytest.mark.asyncio
+    async def test_serves_negotiated_variant(self):
+        """Deve enviar a variante que o cliente aceita, com Content-Encoding e Vary."""
+        # Arrange
+        import gzip
+        from httpx import AsyncClient, ASGITransport
+        content = [{"registro_ans": str(i), "razao_social": "OPERADORA EXEMPLO"} for i in range(200)]
+        cached = CachedBody.from_content(content)
+        app = self._app(cached)
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            gz = await client.get("/api/dados", headers={"Accept-Encoding": "gzip"})
+            plain = await client.get("/api/dados", headers={"Accept-Encoding": "identity"})
+
+        # Assert
+        assert "gzip" in cached.variants
+        assert gz.headers["content-encoding"] == "gzip"
+        assert gz.headers["vary"] == "Accept-Encoding"
+        assert int(gz.headers["content-length"]) == len(cached.variants["gzip"])
+        assert gz.json() == content
+        assert gzip.decompress(cached.variants["gzip"]) == cached.body
+        assert "content-encoding" not in plain.headers
+        assert plain.content == cached.body
+
+    @pytest.mark.asyncio
+    async def test_serves_brotli_when_available(self):
+        """Com brotli instalado, deve preferi-lo ao gzip."""
+        # Arrange
+        brotli = pytest.importorskip("brotli")
+        from httpx import AsyncClient, ASGITransport
+        cached = CachedBody.from_content([{"uf": "SP", "i": i} for i in range(300)])
+        app = self._app(cached)
+
+        # Act
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            async with client.stream("GET", "/api/dados", headers={"Accept-Encoding": "gzip, br"}) as response:
+                raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        # Assert
+        assert response.headers["content-encoding"] == "br"
+        assert brotli.decompress(raw) == cached.body
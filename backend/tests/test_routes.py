@@ -43,7 +43,7 @@ class TestOperadorasRoutes:
         
         from api.main import app
         async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
-            with patch('api.routes.operadoras.get_db') as mock_db:
+            with patch('api.routes.operadoras.get_versioned_read_db') as mock_db:
                 mock_db.return_value = AsyncMock()
                 
                 # Act
@@ -82,6 +82,46 @@ class TestOperadorasRoutes:
         # Assert
         assert response.status_code in [200, 500]
 
+    async def test_list_operadoras_fast_path_matches_schema(self, mock_operadora_repo, sample_operadoras):
+        """GET /api/operadoras deve serializar as linhas no formato de OperadoraListResponse."""
+        # Arrange
+        from domain.schemas import OperadoraListResponse
+        mock_operadora_repo.search.return_value = sample_operadoras
+        mock_operadora_repo.count_filtered.return_value = len(sample_operadoras)
+
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get(f"/api/operadoras?limit={len(sample_operadoras) - 1}")
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert OperadoraListResponse.model_validate(data).model_dump(mode="json") == data
+        assert data["has_next"] is True
+        assert len(data["data"]) == len(sample_operadoras) - 1
+
+    async def test_list_operadoras_sparse_fieldset(self, mock_operadora_repo, sample_operadoras):
+        """GET /api/operadoras?fields= deve ler só as colunas pedidas e devolver só esses campos."""
+        # Arrange
+        mock_operadora_repo.search.return_value = sample_operadoras
+        mock_operadora_repo.count_filtered.return_value = len(sample_operadoras)
+
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/api/operadoras?fields=uf,razao_social&limit=2")
+            invalid = await client.get("/api/operadoras?fields=senha")
+
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert [list(row) for row in data["data"]] == [["razao_social", "uf"]] * 2
+        assert data["next_cursor"] == "BRADESCO SAUDE S.A.|326305"
+        columns = mock_operadora_repo.search.call_args.kwargs["columns"]
+        assert columns == ("id", "registro_ans", "razao_social", "uf")
+        assert invalid.status_code == 422
+
     async def test_get_operadora_by_registro_not_found(self):
         """GET /api/operadoras/registro/999999 deve retornar 404."""
         from api.main import app
@@ -93,6 +133,61 @@ class TestOperadorasRoutes:
         assert response.status_code in [404, 500]
 
 
+    async def test_batch_uses_two_queries_and_keys_by_id(self, sample_operadoras, sample_despesas):
+        """POST /api/operadoras/batch deve buscar o lote inteiro e indexar pelo id."""
+        # Arrange
+        from api.main import app
+        from infra.data_version import get_versioned_read_db
+        from core.cache import cache
+
+        cache.clear()
+        app.dependency_overrides[get_versioned_read_db] = lambda: AsyncMock(info={})
+        despesas_por_registro = {"301337": sample_despesas[:2]}
+        with patch("api.routes.operadoras.CachedOperadoraRepository") as repo_cls, \
+             patch("api.routes.operadoras.DespesaRepository") as despesa_cls:
+            repo_cls.return_value.get_many = AsyncMock(return_value=sample_operadoras[:2])
+            despesa_cls.return_value.get_latest_by_operadoras = AsyncMock(return_value=despesas_por_registro)
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                response = await client.post(
+                    "/api/operadoras/batch",
+                    json={"registros": ["301337", "326305", "301337", "999999"], "cnpjs": ["00.000.000/0000-00"]},
+                )
+        app.dependency_overrides.clear()
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert set(body["data"]) == {"1", "2"}
+        assert body["data"]["1"]["operadora"]["registro_ans"] == "301337"
+        assert len(body["data"]["1"]["despesas"]) == 2
+        assert body["data"]["1"]["total_despesas"] == pytest.approx(31500001.25)
+        assert body["data"]["2"]["despesas"] == []
+        assert body["nao_encontrados"] == {"registros": ["999999"], "cnpjs": ["00000000000000"]}
+        repo_cls.return_value.get_many.assert_awaited_once_with(
+            registros=["301337", "326305", "999999"], cnpjs=["00000000000000"]
+        )
+        despesa_cls.return_value.get_latest_by_operadoras.assert_awaited_once()
+
+    async def test_batch_rejects_empty_and_oversized_requests(self):
+        """POST /api/operadoras/batch deve recusar lote vazio ou acima do limite."""
+        # Arrange
+        from api.main import app
+        from core.config import settings
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            empty = await client.post("/api/operadoras/batch", json={})
+            oversized = await client.post(
+                "/api/operadoras/batch",
+                json={"registros": [str(i) for i in range(settings.operadora_batch_max_items + 1)]},
+            )
+
+        # Assert
+        assert empty.status_code == 422
+        assert oversized.status_code == 422
+
+
 class TestAnalyticsRoutes:
     """Testes para rotas de estatísticas."""
 
@@ -136,6 +231,23 @@ class TestAnalyticsRoutes:
         # Assert
         assert response.status_code in [200, 500]
 
+    async def test_get_estatisticas_cache_hit_returns_cached_body(self):
+        """Um hit deve devolver o corpo pré-serializado sem acessar o banco."""
+        from api.main import app
+        from api.responses import CachedBody
+        from core.cache import cache
+        from infra.data_version import data_version
+        key = f"estatisticas:v{data_version.cached}:RR"
+        cache.set(key, CachedBody(body=b'{"total_operadoras":7}'))
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/api/estatisticas?uf=RR")
+        cache.delete(key)
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"total_operadoras": 7}
+
     async def test_get_despesas_por_uf(self):
         """GET /api/estatisticas/despesas-por-uf deve retornar despesas agrupadas."""
         from api.main import app
@@ -147,6 +259,216 @@ class TestAnalyticsRoutes:
         assert response.status_code in [200, 500]
 
 
+class TestExportRoutes:
+    """Testes para as exportações em streaming."""
+
+    @pytest.fixture
+    async def session_factory(self, sample_despesas):
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from infra.database import Base
+        from domain.models import MetricaOperadora
+
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as session:
+            for despesa in sample_despesas:
+                despesa.operadora_id = None
+            session.add_all(sample_despesas)
+            session.add(MetricaOperadora(
+                id=1, registro_ans="301337", razao_social="UNIMED CAMPINAS", uf="SP",
+                total_despesas=Decimal("31500001.25"), media_trimestral=Decimal("15750000.63"),
+                desvio_padrao=Decimal("0.00"), coeficiente_variacao=Decimal("0"), quantidade_trimestres=2,
+            ))
+            await session.commit()
+        with patch("api.routes.export.ReadSessionLocal", factory), \
+             patch("infra.data_version.ReadSessionLocal", factory):
+            yield factory
+        await engine.dispose()
+
+    async def test_export_despesas_csv_with_filters(self, session_factory):
+        """GET /api/export/despesas deve gerar CSV com cabeçalho e aplicar os filtros."""
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/api/export/despesas?uf=SP&ano=2025&trimestre=1")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="despesas_trimestrais.csv"' in response.headers["content-disposition"]
+        lines = response.text.splitlines()
+        assert lines[0].startswith("registro_ans,cnpj,razao_social,uf,modalidade,ano,trimestre,valor_despesas")
+        assert [line.split(",")[0] for line in lines[1:]] == ["301337", "326305"]
+        assert "15000000.50" in lines[1]
+
+    async def test_export_metricas_ndjson(self, session_factory):
+        """GET /api/export/metricas?formato=ndjson deve gerar um objeto JSON por linha."""
+        import json
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/api/export/metricas?formato=ndjson&uf=SP")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 1
+        assert rows[0]["registro_ans"] == "301337"
+        assert rows[0]["total_despesas"] == "31500001.25"
+
+    async def test_stream_rows_yields_one_chunk_per_batch(self, session_factory):
+        """O arquivo deve sair em blocos do tamanho do lote lido do cursor."""
+        from api.routes.export import ExportFormat, despesas_query, stream_rows
+
+        # Act
+        chunks = [chunk async for chunk in stream_rows(despesas_query(), ExportFormat.NDJSON, batch_size=2)]
+
+        # Assert
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 1]
+
+    async def test_streaming_export_holds_admission_slot(self, session_factory):
+        """Exportação em streaming deve ocupar vaga até o fim e, sem vaga, responder 503 antes do corpo."""
+        from api.main import app
+        from core.admission import AdmissionController
+        controller = AdmissionController("export_stream", concurrency=1, queue_size=0, retry_after=4)
+
+        with patch("api.routes.export.admission.limiter", return_value=controller):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                completed = await client.get("/api/export/despesas")
+                released = controller.active
+                async with controller.slot():
+                    rejected = await client.get("/api/export/metricas?formato=ndjson")
+
+        # Assert
+        assert completed.status_code == 200
+        assert len(completed.text.splitlines()) == 4
+        assert released == 0
+        assert rejected.status_code == 503
+        assert rejected.headers["retry-after"] == "4"
+
+    async def test_export_queries_override_read_statement_timeout(self):
+        """No MySQL, as consultas de exportação não devem herdar o limite das conexões de leitura."""
+        from sqlalchemy.dialects import mysql, sqlite
+        from api.routes.export import despesas_query, metricas_query
+
+        # Act
+        unlimited = [str(query.compile(dialect=mysql.dialect())) for query in (despesas_query(), metricas_query())]
+        with patch("api.routes.export.settings.export_statement_timeout_ms", 3_600_000):
+            limited = str(despesas_query(uf="SP").compile(dialect=mysql.dialect()))
+        on_sqlite = str(despesas_query().compile(dialect=sqlite.dialect()))
+
+        # Assert
+        assert all(sql.startswith("SELECT /*+ MAX_EXECUTION_TIME(4294967295) */ ") for sql in unlimited)
+        assert limited.startswith("SELECT /*+ MAX_EXECUTION_TIME(3600000) */ ")
+        assert "MAX_EXECUTION_TIME" not in on_sqlite
+
+
+    @pytest.fixture
+    def export_cache(self, tmp_path):
+        from api.arrow_export import ExportFileCache
+        cache_instance = ExportFileCache(tmp_path)
+        with patch("api.arrow_export.export_cache", cache_instance):
+            yield cache_instance
+
+    async def test_export_parquet_is_cached_per_data_version(self, session_factory, export_cache, tmp_path):
+        """GET /api/export/despesas.parquet deve gerar o arquivo uma vez e reaproveitá-lo."""
+        import io
+        import pyarrow.parquet as pq
+        from api import arrow_export
+        from api.main import app
+
+        with patch("api.arrow_export.write_export", wraps=arrow_export.write_export) as spy:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                first = await client.get("/api/export/despesas.parquet?ano=2025&trimestre=1")
+                second = await client.get("/api/export/despesas.parquet?ano=2025&trimestre=1")
+
+        # Assert
+        assert first.status_code == 200
+        assert first.headers["content-type"] == "application/vnd.apache.parquet"
+        assert second.content == first.content
+        spy.assert_called_once()
+        table = pq.read_table(io.BytesIO(first.content))
+        assert table.column("registro_ans").to_pylist() == ["301337", "326305"]
+        assert table.schema.field("valor_despesas").type.scale == 2
+        assert len(list(tmp_path.glob("despesas_v*.parquet"))) == 1
+
+    async def test_export_arrow_stream_round_trip(self, session_factory, export_cache):
+        """GET /api/export/metricas.arrow deve gerar um Arrow IPC stream legível pelo pyarrow."""
+        import pyarrow as pa
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/api/export/metricas.arrow")
+
+        # Assert
+        assert response.status_code == 200
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert table.num_rows == 1
+        assert str(table.column("total_despesas")[0]) == "31500001.25"
+
+    async def test_export_file_cache_purges_previous_versions(self, tmp_path):
+        """Gerar o arquivo de uma versão nova deve remover os das anteriores."""
+        from api.arrow_export import ExportFileCache
+
+        async def build(path):
+            path.write_bytes(b"x")
+
+        cache_instance = ExportFileCache(tmp_path, grace_seconds=0)
+
+        # Act
+        old = await cache_instance.get_or_build("despesas", 1, "", "parquet", build)
+        new = await cache_instance.get_or_build("despesas", 2, "", "parquet", build)
+
+        # Assert
+        assert not old.exists()
+        assert new.exists()
+
+    async def test_export_file_cache_keeps_newer_and_recent_files(self, tmp_path):
+        """Não remove versões mais novas nem arquivos antigos ainda dentro da carência."""
+        import os
+        import time
+        from api.arrow_export import ExportFileCache
+
+        async def build(path):
+            path.write_bytes(b"x")
+
+        cache_instance = ExportFileCache(tmp_path, grace_seconds=600)
+        expired = await cache_instance.get_or_build("despesas", 1, "", "parquet", build)
+        recent = await cache_instance.get_or_build("despesas", 2, "", "parquet", build)
+        newer = await cache_instance.get_or_build("despesas", 4, "", "parquet", build)
+        hour_ago = time.time() - 3600
+        os.utime(expired, (hour_ago, hour_ago))
+
+        # Act
+        await cache_instance.get_or_build("despesas", 3, "", "parquet", build)
+
+        # Assert
+        assert not expired.exists()
+        assert recent.exists()
+        assert newer.exists()
+
+    async def test_export_arrow_unavailable_without_pyarrow(self):
+        """Sem pyarrow instalado, as rotas Arrow/Parquet devem responder 501."""
+        from api.main import app
+        with patch("api.arrow_export.pa", None):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                response = await client.get("/api/export/despesas.parquet")
+
+        # Assert
+        assert response.status_code == 501
+
+
 class TestLogsRoutes:
     """Testes para rotas de logs."""
 
@@ -210,3 +532,179 @@ class TestHealthRoutes:
         assert "status" in data
         assert "database" in data
         assert "timestamp" in data
+        assert "warmup" in data
+
+
+class TestDashboardRoutes:
+    """Testes para a rota composta do dashboard."""
+
+    async def test_dashboard_runs_parts_concurrently_and_caches_composite(self):
+        """GET /api/dashboard deve buscar as partes em paralelo e guardar o resultado composto."""
+        # Arrange
+        import asyncio
+        import time
+        from api.responses import CachedBody
+        from core.cache import cache
+
+        calls = []
+
+        def part(name, body):
+            async def fake(*args, **kwargs):
+                calls.append(name)
+                await asyncio.sleep(0.05)
+                return CachedBody(body=body)
+            return fake
+
+        cache.purge_prefix("dashboard:")
+        with patch("api.routes.dashboard.analytics.estatisticas_body", part("estatisticas", b'{"total_operadoras":7}')), \
+             patch("api.routes.dashboard.analytics.crescimento_body", part("crescimento", b"[]")), \
+             patch("api.routes.dashboard.analytics.despesas_por_uf_body", part("despesas", b'[{"uf":"SP"}]')), \
+             patch("api.routes.dashboard.analytics.acima_media_body", part("acima_media", b'{"total_operadoras":0,"operadoras":[]}')):
+            from api.main import app
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                started = time.perf_counter()
+                response = await client.get("/api/dashboard?uf=AC")
+                elapsed = time.perf_counter() - started
+                again = await client.get("/api/dashboard?uf=AC")
+        cache.purge_prefix("dashboard:")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "estatisticas": {"total_operadoras": 7},
+            "crescimento": [],
+            "despesas_por_uf": [{"uf": "SP"}],
+            "acima_media": {"total_operadoras": 0, "operadoras": []},
+        }
+        assert elapsed < 0.15
+        assert again.json() == response.json()
+        assert sorted(calls) == ["acima_media", "crescimento", "despesas", "estatisticas"]
+
+    async def test_dashboard_parts_use_the_composite_version(self):
+        """Todas as partes devem ser calculadas na versão da chave do dashboard."""
+        # Arrange
+        from api.responses import CachedBody
+        from api.routes.dashboard import dashboard_body
+        from core.cache import cache
+
+        versions = []
+        current = iter([7, 8, 8, 8, 8])
+
+        async def current_version():
+            return next(current)
+
+        async def part(*args, version=None, **kwargs):
+            versions.append(version)
+            return CachedBody(body=b"{}")
+
+        cache.purge_prefix("dashboard:")
+        with patch("api.routes.dashboard.data_version.current", current_version), \
+             patch("api.routes.dashboard.analytics.estatisticas_body", part), \
+             patch("api.routes.dashboard.analytics.crescimento_body", part), \
+             patch("api.routes.dashboard.analytics.despesas_por_uf_body", part), \
+             patch("api.routes.dashboard.analytics.acima_media_body", part):
+            # Act
+            await dashboard_body("RJ")
+            cached = cache.get("dashboard:v7:RJ")
+        cache.purge_prefix("dashboard:")
+
+        # Assert
+        assert versions == [7, 7, 7, 7]
+        assert cached is not None
+
+
+class TestMetricsRoute:
+    """Testes para o endpoint /metrics."""
+
+    async def test_metrics_exposes_prometheus_text(self):
+        """GET /metrics deve expor métricas HTTP, do banco e do cache."""
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            await client.get("/")
+            response = await client.get("/metrics")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert '# TYPE http_request_duration_seconds histogram' in response.text
+        assert 'http_requests_total{method="GET",route="/",status="200"}' in response.text
+        assert "# TYPE db_query_duration_seconds histogram" in response.text
+        assert "# TYPE cache_hits_total counter" in response.text
+
+
+class TestAdminRoutes:
+    """Testes para rotas administrativas do cache."""
+
+    async def test_get_cache_stats(self):
+        """GET /admin/cache deve retornar estatísticas por namespace."""
+        from api.main import app
+        from core.cache import cache
+        cache.set("teste_admin:v0:x", {"a": 1})
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/admin/cache")
+        
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert "teste_admin" in data["namespaces"]
+        assert data["namespaces"]["teste_admin"]["entries"] == 1
+
+    async def test_get_cache_metrics(self):
+        """GET /admin/cache/metrics deve retornar texto no formato Prometheus."""
+        from api.main import app
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.get("/admin/cache/metrics")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE cache_hits_total counter" in response.text
+
+    async def test_purge_cache_by_prefix(self):
+        """DELETE /admin/cache?prefix= deve remover as chaves com o prefixo."""
+        from api.main import app
+        from core.cache import cache
+        cache.set("teste_purge:v0:a", 1)
+        cache.set("teste_purge:v0:b", 2)
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            # Act
+            response = await client.delete("/admin/cache?prefix=teste_purge:")
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["removed"] == 2
+        assert cache.get("teste_purge:v0:a") is None
+
+    async def test_requires_token_when_configured(self):
+        """Com ADMIN_TOKEN definido, deve rejeitar requisições sem o token."""
+        from api.main import app
+        with patch('api.routes.admin.settings') as mock_settings:
+            mock_settings.admin_token = "segredo"
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                denied = await client.get("/admin/cache")
+                allowed = await client.get("/admin/cache", headers={"X-Admin-Token": "segredo"})
+        
+        # Assert
+        assert denied.status_code == 401
+        assert allowed.status_code == 200
+
+    async def test_denies_without_token_outside_testing(self):
+        """Sem ADMIN_TOKEN, as rotas devem ficar fechadas em qualquer ambiente exceto testes."""
+        from api.main import app
+        from core.config import Environment
+        with patch('api.routes.admin.settings') as mock_settings:
+            mock_settings.admin_token = None
+            mock_settings.environment = Environment.DEVELOPMENT
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                # Act
+                stats = await client.get("/admin/cache")
+                purge = await client.delete("/admin/cache")
+        
+        # Assert
+        assert stats.status_code == 403
+        assert purge.status_code == 403
@@ -10,6 +10,99 @@ from domain.services import AnalyticsService
 from domain.schemas import EstatisticasResponse, TopOperadoraCrescimento
 
 
+def estatisticas_result(totais, ufs, operadoras) -> MagicMock:
+    """Resultado da consulta única de get_estatisticas_agregadas."""
+    total_operadoras, total, media_geral = totais
+    rows = [MagicMock(
+        tipo="totais",
+        total_operadoras=total_operadoras,
+        total=total,
+        total_positivo=media_geral * 10 if media_geral is not None else None,
+        qtd_positivo=10 if media_geral is not None else 0,
+    )]
+    rows += [MagicMock(tipo="uf", uf=uf, total=valor) for uf, valor in ufs]
+    rows += [
+        MagicMock(tipo="operadora", razao_social=razao_social, cnpj=cnpj, total=valor)
+        for razao_social, cnpj, valor in operadoras
+    ]
+    result = MagicMock()
+    result.fetchall.return_value = rows
+    return result
+
+
+class TestEstatisticasSqlite:
+    """Executa a consulta única de estatísticas em SQLite e confere os números."""
+
+    @pytest.fixture
+    async def session(self):
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from infra.database import Base
+        from domain.models import Operadora, DespesaTrimestral
+
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        despesas = [
+            # (registro, razao_social, cnpj, uf, valor)
+            ("1", "OP A", "111", "SP", 100), ("1", "OP A", "111", "SP", 300),
+            ("2", "OP B", "222", "RJ", 250), ("2", "OP B", "222", "RJ", -50),
+            ("3", "OP C", "333", None, 80), ("3", "OP C", "333", "", 0),
+            ("4", "OP D", "444", "SP", 0),
+        ]
+        async with factory() as session:
+            # BIGINT não é autoincremento no SQLite: ids explícitos
+            for i, (registro, uf) in enumerate((("1", "SP"), ("2", "RJ"), ("3", None), ("4", "SP")), 1):
+                session.add(Operadora(id=i, registro_ans=registro, razao_social=f"OP {registro}", uf=uf))
+            for i, (registro, razao_social, cnpj, uf, valor) in enumerate(despesas, 1):
+                session.add(DespesaTrimestral(
+                    id=i, registro_ans=registro, razao_social=razao_social, cnpj=cnpj, uf=uf,
+                    ano=2024, trimestre=i % 4 + 1, valor_despesas=Decimal(valor),
+                ))
+            await session.commit()
+        async with factory() as session:
+            yield session
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_single_scan_matches_expected_totals(self, session):
+        """Totais, média dos valores positivos, top UFs e top operadoras."""
+        # Act
+        result = await AnalyticsService(session).get_estatisticas_agregadas()
+
+        # Assert
+        assert result.total_operadoras == 4
+        assert result.total_despesas == 680
+        assert result.media_geral == pytest.approx((100 + 300 + 250 + 80) / 4)
+        assert result.top_ufs == [
+            {"uf": "SP", "total": 400.0},
+            {"uf": "RJ", "total": 200.0},
+            {"uf": "Sem UF*", "total": 80.0},
+        ]
+        assert [op["razao_social"] for op in result.top_operadoras] == ["OP A", "OP B", "OP C"]
+        assert result.top_operadoras[1]["total"] == 250.0
+
+    @pytest.mark.asyncio
+    async def test_single_scan_with_uf_filter(self, session):
+        """O filtro de UF vale para as três partes, inclusive 'Sem UF*'."""
+        # Act
+        sp = await AnalyticsService(session).get_estatisticas_agregadas(uf="SP")
+        sem_uf = await AnalyticsService(session).get_estatisticas_agregadas(uf="Sem UF*")
+
+        # Assert
+        assert sp.total_operadoras == 2
+        assert sp.total_despesas == 400
+        assert sp.top_ufs == [{"uf": "SP", "total": 400.0}]
+        assert [op["razao_social"] for op in sp.top_operadoras] == ["OP A"]
+        assert sem_uf.total_despesas == 80
+        assert sem_uf.top_ufs == [{"uf": "Sem UF*", "total": 80.0}]
+
+
 class TestAnalyticsService:
     """Testes para AnalyticsService."""
 
@@ -22,34 +115,13 @@ class TestAnalyticsService:
     async def test_get_estatisticas_agregadas(self, mock_session):
         """Deve retornar estatísticas agregadas corretamente."""
         # Arrange
-        # Mock para a query principal
-        main_result = MagicMock()
-        main_result.fetchone.return_value = MagicMock(
-            total_operadoras=1250,
-            total_despesas=Decimal("45000000000.00"),
-            media_geral=Decimal("36000000.00")
+        # Uma única consulta: linha de totais + linhas de top UFs e top operadoras
+        mock_session.execute.return_value = estatisticas_result(
+            totais=(1250, Decimal("45000000000.00"), Decimal("36000000.00")),
+            ufs=[("RJ", Decimal("8500000000.00")), ("SP", Decimal("18000000000.00"))],
+            operadoras=[("BRADESCO", "12345", Decimal("5200000000.00"))],
         )
         
-        # Mock para top UFs
-        top_ufs_result = MagicMock()
-        top_ufs_result.fetchall.return_value = [
-            MagicMock(uf="SP", total=Decimal("18000000000.00")),
-            MagicMock(uf="RJ", total=Decimal("8500000000.00")),
-        ]
-        
-        # Mock para top operadoras
-        top_operadoras_result = MagicMock()
-        top_operadoras_result.fetchall.return_value = [
-            MagicMock(razao_social="BRADESCO", cnpj="12345", total=Decimal("5200000000.00")),
-        ]
-        
-        # Configura retornos sequenciais
-        mock_session.execute.side_effect = [
-            main_result,
-            top_ufs_result,
-            top_operadoras_result,
-        ]
-        
         service = AnalyticsService(mock_session)
         
         # Act
@@ -62,32 +134,18 @@ class TestAnalyticsService:
         assert result.media_geral == 36000000.00
         assert len(result.top_ufs) == 2
         assert result.top_ufs[0]["uf"] == "SP"
+        mock_session.execute.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_estatisticas_agregadas_with_uf_filter(self, mock_session):
         """Deve aplicar filtro de UF nas estatísticas."""
         # Arrange
-        main_result = MagicMock()
-        main_result.fetchone.return_value = MagicMock(
-            total_operadoras=450,
-            total_despesas=Decimal("18000000000.00"),
-            media_geral=Decimal("40000000.00")
+        mock_session.execute.return_value = estatisticas_result(
+            totais=(450, Decimal("18000000000.00"), Decimal("40000000.00")),
+            ufs=[("SP", Decimal("18000000000.00"))],
+            operadoras=[],
         )
         
-        top_ufs_result = MagicMock()
-        top_ufs_result.fetchall.return_value = [
-            MagicMock(uf="SP", total=Decimal("18000000000.00")),
-        ]
-        
-        top_operadoras_result = MagicMock()
-        top_operadoras_result.fetchall.return_value = []
-        
-        mock_session.execute.side_effect = [
-            main_result,
-            top_ufs_result,
-            top_operadoras_result,
-        ]
-        
         service = AnalyticsService(mock_session)
         
         # Act
@@ -102,22 +160,12 @@ class TestAnalyticsService:
     async def test_get_estatisticas_empty_database(self, mock_session):
         """Deve tratar banco vazio graciosamente."""
         # Arrange
-        main_result = MagicMock()
-        main_result.fetchone.return_value = MagicMock(
-            total_operadoras=0,
-            total_despesas=None,
-            media_geral=None
+        mock_session.execute.return_value = estatisticas_result(
+            totais=(0, None, None),
+            ufs=[],
+            operadoras=[],
         )
         
-        empty_result = MagicMock()
-        empty_result.fetchall.return_value = []
-        
-        mock_session.execute.side_effect = [
-            main_result,
-            empty_result,
-            empty_result,
-        ]
-        
         service = AnalyticsService(mock_session)
         
         # Act
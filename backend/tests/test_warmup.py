@@ -0,0 +1,97 @@
+"""
+Testes para o aquecimento do cache na inicialização.
+"""
+import asyncio
+
+import pytest
+
+from api.warmup import CacheWarmer, default_jobs
+
+
+class TestCacheWarmer:
+    """Testes para CacheWarmer."""
+
+    @pytest.mark.asyncio
+    async def test_runs_jobs_with_bounded_concurrency(self):
+        """Não deve executar mais consultas simultâneas que o limite configurado."""
+        # Arrange
+        running = 0
+        peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        async def ufs_loader():
+            return ["SP", "RJ", "MG"]
+
+        warmer = CacheWarmer(
+            concurrency=2,
+            ufs_loader=ufs_loader,
+            jobs_builder=lambda ufs: [job for _ in range(len(ufs) * 3)],
+        )
+
+        # Act
+        progress = await warmer.run()
+
+        # Assert
+        assert peak == 2
+        assert progress.status == "completed"
+        assert progress.done == progress.total == 9
+
+    @pytest.mark.asyncio
+    async def test_counts_failed_jobs(self):
+        """Falhas individuais devem ser contadas sem interromper o aquecimento."""
+        # Arrange
+        async def ok():
+            return None
+
+        async def broken():
+            raise RuntimeError("timeout")
+
+        async def ufs_loader():
+            return []
+
+        warmer = CacheWarmer(ufs_loader=ufs_loader, jobs_builder=lambda ufs: [ok, broken, ok])
+
+        # Act
+        progress = await warmer.run()
+
+        # Assert
+        assert progress.status == "completed_with_errors"
+        assert progress.done == 3
+        assert progress.failed == 1
+
+    @pytest.mark.asyncio
+    async def test_start_does_not_block(self):
+        """start deve agendar o aquecimento em segundo plano e retornar logo."""
+        # Arrange
+        release = asyncio.Event()
+
+        async def ufs_loader():
+            await release.wait()
+            return []
+
+        warmer = CacheWarmer(ufs_loader=ufs_loader, jobs_builder=lambda ufs: [])
+
+        # Act
+        task = warmer.start()
+        await asyncio.sleep(0)
+        status_while_running = warmer.progress.status
+        release.set()
+        await task
+
+        # Assert
+        assert status_while_running == "running"
+        assert warmer.progress.status == "completed"
+
+    def test_default_jobs_cover_all_and_each_uf(self):
+        """Deve gerar estatísticas, crescimento, acima-média e dashboard para 'todas' e cada UF."""
+        # Act
+        jobs = default_jobs(["SP", "RJ"])
+
+        # Assert
+        assert len(jobs) == 1 + 3 * 3 + 3
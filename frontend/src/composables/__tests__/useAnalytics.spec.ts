@@ -156,6 +156,41 @@ describe('useAnalytics', () => {
     });
   });
 
+  describe('fetchDashboard', () => {
+    it('deve preencher todos os dados com uma única requisição', async () => {
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: () => Promise.resolve({
+          estatisticas: mockEstatisticas,
+          crescimento: [],
+          despesas_por_uf: [{ uf: 'SP', total_despesas: 18000000000.0 }],
+          acima_media: { total_operadoras: 0, operadoras: [] },
+        }),
+      });
+
+      const { fetchDashboard, estatisticas, despesasPorUF, operadorasAcimaMedia } = useAnalytics();
+
+      await fetchDashboard('SP');
+
+      expect(mockFetch).toHaveBeenCalledTimes(1);
+      expect(mockFetch).toHaveBeenCalledWith('/api/dashboard?uf=SP');
+      expect(estatisticas.value?.total_operadoras).toBe(1250);
+      expect(despesasPorUF.value).toHaveLength(1);
+      expect(operadorasAcimaMedia.value?.total_operadoras).toBe(0);
+    });
+
+    it('deve tratar resposta não ok', async () => {
+      mockFetch.mockResolvedValueOnce({ ok: false, status: 500 });
+
+      const { fetchDashboard, error, errorType } = useAnalytics();
+
+      await fetchDashboard();
+
+      expect(error.value).toBe('Erro ao buscar dados do dashboard');
+      expect(errorType.value).toBe('server');
+    });
+  });
+
   describe('formatCurrency', () => {
     it('deve formatar valores em reais', () => {
       const { formatCurrency } = useAnalytics();
@@ -1,5 +1,5 @@
 import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
-import { useOperadoras, type OperadoraListResponse } from '@/composables/useOperadoras';
+import { useOperadoras, LIST_FIELDS, type OperadoraListResponse } from '@/composables/useOperadoras';
 import { nextTick } from 'vue';
 
 // Mock do fetch global
@@ -99,6 +99,20 @@ describe('useOperadoras', () => {
       expect(fetchUrl).toContain('cursor=TESTE');
     });
 
+    it('deve pedir apenas os campos exibidos na tabela', async () => {
+      mockFetch.mockResolvedValueOnce({
+        ok: true,
+        json: () => Promise.resolve(mockResponse),
+      });
+
+      const { fetchOperadoras } = useOperadoras();
+
+      await fetchOperadoras();
+
+      const fetchUrl = mockFetch.mock.calls[0]?.[0] as string;
+      expect(new URL(fetchUrl, 'http://localhost').searchParams.get('fields')).toBe(LIST_FIELDS);
+    });
+
     it('deve atualizar hasNext e hasPrev corretamente', async () => {
       mockFetch.mockResolvedValueOnce({
         ok: true,
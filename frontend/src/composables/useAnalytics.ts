@@ -127,15 +127,42 @@ export function useAnalytics() {
     }
   };
 
+  // Uma única requisição com todos os dados do dashboard (consultas em paralelo no backend)
+  const fetchDashboard = async (uf?: string) => {
+    try {
+      loading.value = true;
+      error.value = null;
+      errorType.value = null;
+      const params = uf ? `?uf=${encodeURIComponent(uf)}` : '';
+      const response = await fetch(`${API_BASE}/dashboard${params}`);
+      if (!response.ok) {
+        if (response.status >= 500) {
+          errorType.value = 'server';
+        } else if (response.status === 404) {
+          errorType.value = 'not-found';
+        } else {
+          errorType.value = 'generic';
+        }
+        throw new Error('Erro ao buscar dados do dashboard');
+      }
+      const data = await response.json();
+      estatisticas.value = data.estatisticas;
+      topCrescimento.value = data.crescimento;
+      despesasPorUF.value = data.despesas_por_uf;
+      operadorasAcimaMedia.value = data.acima_media;
+    } catch (e) {
+      if (!errorType.value) {
+        errorType.value = 'network';
+      }
+      error.value = e instanceof Error ? e.message : 'Erro desconhecido';
+      console.error('Erro ao buscar dados do dashboard:', e);
+    } finally {
+      loading.value = false;
+    }
+  };
+
   const fetchAll = async (uf?: string) => {
-    loading.value = true;
-    await Promise.all([
-      fetchEstatisticas(uf),
-      fetchTopCrescimento(5, uf),
-      fetchDespesasPorUF(),
-      fetchOperadorasAcimaMedia(2, uf),
-    ]);
-    loading.value = false;
+    await fetchDashboard(uf);
   };
 
   // Computed filtered data based on selectedUF
@@ -192,6 +219,7 @@ export function useAnalytics() {
     fetchTopCrescimento,
     fetchDespesasPorUF,
     fetchOperadorasAcimaMedia,
+    fetchDashboard,
     fetchAll,
     setUF,
   };
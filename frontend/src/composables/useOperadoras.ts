@@ -22,6 +22,9 @@ export interface OperadoraListResponse {
   has_prev: boolean;
 }
 
+// Colunas exibidas na tabela: a API lê e devolve só esses campos (fields=)
+export const LIST_FIELDS = 'id,registro_ans,cnpj,razao_social,modalidade,uf';
+
 export function useOperadoras() {
   const operadoras = ref<Operadora[]>([]);
   const total = ref(0);
@@ -62,6 +65,7 @@ export function useOperadoras() {
       const params = new URLSearchParams({
         page: String(pageNum),
         limit: String(pageSize),
+        fields: LIST_FIELDS,
       });
       if (searchValue) params.append('search', searchValue);
       if (ufValue) params.append('uf', ufValue);
@@ -69,10 +73,8 @@ export function useOperadoras() {
       if (cursor) params.append('cursor', cursor);
 
       const res = await fetch(`${API_BASE}/operadoras?${params.toString()}`, {
-        cache: 'no-store',
-        headers: {
-          'Cache-Control': 'no-cache',
-        },
+        // Revalida com If-None-Match: a API responde 304 se os dados não mudaram
+        cache: 'no-cache',
       });
 
       if (!res.ok) {
@@ -203,16 +205,15 @@ export function useOperadoras() {
         page: String(targetPage),
         limit: String(limit.value),
         offset: String(offset),
+        fields: LIST_FIELDS,
       });
       if (search.value) params.append('search', search.value);
       if (uf.value) params.append('uf', uf.value);
       if (modalidade.value) params.append('modalidade', modalidade.value);
 
       const res = await fetch(`${API_BASE}/operadoras?${params.toString()}`, {
-        cache: 'no-store',
-        headers: {
-          'Cache-Control': 'no-cache',
-        },
+        // Revalida com If-None-Match: a API responde 304 se os dados não mudaram
+        cache: 'no-cache',
       });
 
       if (!res.ok) {